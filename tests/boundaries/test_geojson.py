@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.boundaries.serializers import GeographyBoundarySerializer
+from wazimap_ng.boundaries.services.geojson import update_geojson
+from wazimap_ng.boundaries.views import geography_item_helper, geography_children_helper
+from wazimap_ng.datasets.models import Geography
+
+from tests.boundaries.factories import GeographyBoundaryFactory
+
+
+@pytest.fixture
+def parent():
+    return Geography.add_root(name="Country", code="ZA", level="country", version="test")
+
+@pytest.fixture
+def children(parent):
+    return [
+        parent.add_child(name=f"Province {idx}", code=f"P{idx}", level="province", version="test")
+        for idx in range(2)
+    ]
+
+@pytest.fixture
+def boundaries(parent, children):
+    return [GeographyBoundaryFactory(geography=geography) for geography in [parent, *children]]
+
+
+# Boundary changes are processed once the save is committed
+@pytest.mark.django_db(transaction=True)
+class TestGeoJSON:
+    def test_feature_is_stored_on_save(self, boundaries):
+        boundary = GeographyBoundary.objects.get(pk=boundaries[1].pk)
+
+        assert json.loads(boundary.geojson) == json.loads(json.dumps(GeographyBoundarySerializer(boundary).data))
+        assert json.loads(boundary.geojson)["properties"]["parent"] == "ZA"
+
+    def test_feature_is_updated_with_geography(self, boundaries, children):
+        children[0].name = "Renamed"
+        children[0].save()
+
+        boundary = GeographyBoundary.objects.get(pk=boundaries[1].pk)
+        assert json.loads(boundary.geojson)["properties"]["name"] == "Renamed"
+
+    def test_children_are_updated_with_parent_code(self, parent, boundaries):
+        parent.code = "ZA2"
+        parent.save()
+
+        boundary = GeographyBoundary.objects.get(pk=boundaries[2].pk)
+        assert json.loads(boundary.geojson)["properties"]["parent"] == "ZA2"
+
+    def test_update_geojson(self, boundaries):
+        GeographyBoundary.objects.update(geojson=None)
+
+        assert update_geojson(GeographyBoundary.objects.all()) == 3
+        assert GeographyBoundary.objects.filter(geojson__isnull=True).count() == 0
+
+    def test_geography_item_helper(self, boundaries):
+        expected = GeographyBoundarySerializer(GeographyBoundary.objects.get(pk=boundaries[0].pk)).data
+
+        assert json.loads(geography_item_helper("ZA", "test")) == json.loads(json.dumps(expected))
+
+    def test_geography_children_helper(self, boundaries):
+        GeographyBoundary.objects.filter(pk=boundaries[2].pk).update(geojson=None)
+
+        data = json.loads(geography_children_helper("ZA", "test"))
+        assert list(data) == ["province"]
+        assert data["province"]["type"] == "FeatureCollection"
+        assert sorted(f["properties"]["code"] for f in data["province"]["features"]) == ["P0", "P1"]
@@ -0,0 +1,71 @@
+import json
+import math
+
+import pytest
+from django.contrib.gis.geos import Polygon, MultiPolygon
+from django.urls import reverse
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.boundaries.services.tiles import get_tile_resolution
+from wazimap_ng.boundaries.views import geography_item_helper
+from wazimap_ng.datasets.models import Geography
+
+from tests.boundaries.factories import GeographyBoundaryFactory
+
+
+def detailed_polygon(points=500):
+    # A circle with a small wobble that disappears when simplified
+    coords = [
+        (
+            28 + (1 + 0.001 * (idx % 2)) * math.cos(2 * math.pi * idx / points),
+            -26 + (1 + 0.001 * (idx % 2)) * math.sin(2 * math.pi * idx / points)
+        )
+        for idx in range(points)
+    ]
+    return MultiPolygon([Polygon(coords + coords[:1])])
+
+
+def vertex_count(feature):
+    return sum(len(ring) for polygon in feature["geometry"]["coordinates"] for ring in polygon)
+
+
+@pytest.fixture
+def boundary():
+    geography = Geography.add_root(name="Country", code="ZA", level="country", version="test")
+    return GeographyBoundaryFactory(geography=geography, geom=detailed_polygon())
+
+
+# Boundary changes are processed once the save is committed
+@pytest.mark.django_db(transaction=True)
+class TestResolutions:
+    def test_resolutions_are_computed_on_save(self, boundary):
+        boundary = GeographyBoundary.objects.get(pk=boundary.pk)
+
+        assert boundary.geom_low is not None
+        assert boundary.geom_high is not None
+        assert boundary.geom_low.num_coords < boundary.geom_cache.num_coords <= boundary.geom_high.num_coords
+
+    def test_item_resolution(self, boundary):
+        low = json.loads(geography_item_helper("ZA", "test", "low"))
+        medium = json.loads(geography_item_helper("ZA", "test", "medium"))
+
+        assert vertex_count(low) < vertex_count(medium)
+        assert low["properties"] == medium["properties"]
+
+    def test_unsimplified_boundary_falls_back(self, boundary):
+        GeographyBoundary.objects.filter(pk=boundary.pk).update(geom_low=None)
+
+        low = json.loads(geography_item_helper("ZA", "test", "low"))
+        medium = json.loads(geography_item_helper("ZA", "test", "medium"))
+        assert low["geometry"] == medium["geometry"]
+
+    def test_invalid_resolution(self, client, boundary):
+        url = reverse("boundaries-code", kwargs={"code": "ZA", "version": "test"})
+        response = client.get(url, {"resolution": "ward"})
+        assert response.status_code == 400
+
+
+def test_tile_resolution():
+    assert get_tile_resolution(0) == "low"
+    assert get_tile_resolution(7) == "medium"
+    assert get_tile_resolution(14) == "high"
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from django.contrib.gis.geos import Polygon, MultiPolygon
+from django.urls import reverse
+
+from wazimap_ng.boundaries import topojson
+from wazimap_ng.datasets.models import Geography
+
+from tests.boundaries.factories import GeographyBoundaryFactory
+
+
+def square(x, y, size=1):
+    return [[x, y], [x, y + size], [x + size, y + size], [x + size, y], [x, y]]
+
+
+def feature(rings, code):
+    return {
+        "type": "Feature", "id": code,
+        "geometry": {"type": "MultiPolygon", "coordinates": [rings]},
+        "properties": {"code": code}
+    }
+
+
+def decode_arc(topology, idx):
+    arc = topology["arcs"][~idx if idx < 0 else idx]
+    x = y = 0
+    points = []
+    for dx, dy in arc:
+        x += dx
+        y += dy
+        points.append((x, y))
+    return points[::-1] if idx < 0 else points
+
+
+def decode_ring(topology, arcs):
+    points = []
+    for idx in arcs:
+        arc = decode_arc(topology, idx)
+        points.extend(arc[1:] if points else arc)
+    return points
+
+
+def same_ring(ring, expected):
+    # Rings may start at a different point
+    ring, expected = ring[:-1], expected[:-1]
+    start = ring.index(expected[0])
+    return ring[start:] + ring[:start] == expected
+
+
+class TestTopology:
+    def test_shared_edges_are_stored_once(self):
+        features = [feature([square(x, y)], f"{x}{y}") for x in range(3) for y in range(3)]
+        topology = topojson.topology({"ward": features}, quantization=4)
+
+        # 24 unit edges, the 4 outer corners join two edges into one arc
+        assert len(topology["arcs"]) == 20
+
+        quantize = topojson.Quantizer(topology["bbox"], 4)
+        for f, geometry in zip(features, topology["objects"]["ward"]["geometries"]):
+            ring = decode_ring(topology, geometry["arcs"][0][0])
+            expected = [quantize(point) for point in f["geometry"]["coordinates"][0][0]]
+            assert same_ring(ring, expected)
+
+    def test_hole_matching_neighbour(self):
+        outer = feature([square(0, 0, 4), square(1, 1, 2)[::-1]], "outer")
+        inner = feature([square(1, 1, 2)], "inner")
+        topology = topojson.topology({"level": [outer, inner]}, quantization=5)
+
+        outer_arcs, inner_arcs = [g["arcs"] for g in topology["objects"]["level"]["geometries"]]
+        assert len(topology["arcs"]) == 2
+        assert inner_arcs[0][0] == [~outer_arcs[0][1][0]]
+
+    def test_properties_and_id(self):
+        topology = topojson.topology({"level": [feature([square(0, 0)], "A")]})
+        geometry = topology["objects"]["level"]["geometries"][0]
+
+        assert geometry["id"] == "A"
+        assert geometry["properties"] == {"code": "A"}
+        assert topology["transform"]["translate"] == [0, 0]
+
+    def test_collapsed_polygon(self):
+        tiny = feature([square(0, 0, 0.0000001)], "tiny")
+        topology = topojson.topology({"level": [feature([square(0, 0, 10)], "big"), tiny]}, quantization=100)
+
+        assert topology["objects"]["level"]["geometries"][1] == {"type": None, "id": "tiny", "properties": {"code": "tiny"}}
+
+
+@pytest.mark.django_db
+class TestTopoJSONChildren:
+    def test_children_topology(self, client):
+        parent = Geography.add_root(name="Country", code="ZA", level="country", version="test")
+        GeographyBoundaryFactory(geography=parent)
+        for idx in range(2):
+            child = parent.add_child(name=f"Province {idx}", code=f"P{idx}", level="province", version="test")
+            GeographyBoundaryFactory(geography=child, geom=MultiPolygon([Polygon(square(idx * 10, 0, 10))]))
+
+        url = reverse("boundaries-children", kwargs={"code": "ZA", "version": "test"})
+        response = client.get(url, {"boundary_format": "topojson"})
+        assert response.status_code == 200
+
+        data = json.loads(response.content)
+        assert data["type"] == "Topology"
+        geometries = data["objects"]["province"]["geometries"]
+        assert sorted(g["properties"]["code"] for g in geometries) == ["P0", "P1"]
+        # The shared edge is one arc used in both directions
+        arcs = [set(g["arcs"][0][0]) for g in geometries]
+        assert any(~idx in arcs[1] for idx in arcs[0])
+
+    def test_invalid_format(self, client):
+        Geography.add_root(name="Country", code="ZA", level="country", version="test")
+        url = reverse("boundaries-children", kwargs={"code": "ZA", "version": "test"})
+        response = client.get(url, {"boundary_format": "kml"})
+        assert response.status_code == 400
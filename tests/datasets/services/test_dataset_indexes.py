@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection, DatabaseError
+
+from wazimap_ng.datasets.models import DatasetData
+from wazimap_ng.datasets.services.dataset_indexes import (
+    get_dataset_indexes, get_group_index_name, update_dataset_indexes
+)
+from tests.datasets.factories import DatasetFactory, DatasetDataFactory, GeographyFactory
+
+
+def test_group_index_name():
+    name = get_group_index_name(12, "age group")
+
+    assert name.startswith("idx_datasetdata_12_")
+    assert name != get_group_index_name(12, "gender")
+    assert name != get_group_index_name(1, "age group")
+
+
+@pytest.mark.django_db
+def test_update_dataset_indexes():
+    dataset = DatasetFactory(groups=["age group", "gender's"])
+    other = DatasetFactory(groups=["age group"])
+    update_dataset_indexes(other)
+
+    created, dropped = update_dataset_indexes(dataset)
+    assert sorted(created) == sorted(get_group_index_name(dataset.id, g) for g in dataset.groups)
+    assert dropped == []
+    assert get_dataset_indexes(dataset.id) == set(created)
+
+    dataset.groups = ["gender's"]
+    created, dropped = update_dataset_indexes(dataset)
+    assert created == []
+    assert dropped == [get_group_index_name(dataset.id, "age group")]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_indexes_are_dropped_with_dataset():
+    dataset = DatasetFactory(groups=["age group"])
+    other = DatasetFactory(groups=["age group"])
+    update_dataset_indexes(dataset)
+    update_dataset_indexes(other)
+
+    dataset_id = dataset.id
+    dataset.delete()
+
+    assert get_dataset_indexes(dataset_id) == set()
+    assert len(get_dataset_indexes(other.id)) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_invalid_indexes_are_rebuilt():
+    dataset = DatasetFactory(groups=["age group"])
+    geography = GeographyFactory()
+    for _ in range(2):
+        DatasetDataFactory(dataset=dataset, geography=geography, data={"age group": "15", "count": 1})
+
+    # A unique index on duplicate rows fails to build concurrently and is left invalid
+    name = get_group_index_name(dataset.id, "age group")
+    with pytest.raises(DatabaseError):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY {name} ON {DatasetData._meta.db_table} "
+                f"((data -> 'age group')) WHERE dataset_id = {dataset.id}"
+            )
+
+    assert get_dataset_indexes(dataset.id) == set()
+    assert get_dataset_indexes(dataset.id, include_invalid=True) == {name}
+
+    created, dropped = update_dataset_indexes(dataset)
+    assert created == [name]
+    assert dropped == []
+    assert get_dataset_indexes(dataset.id) == {name}
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pytest
+
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.datasets.services import geography_resolver
+from tests.datasets.factories import GeographyFactory
+
+
+@pytest.fixture(autouse=True)
+def clear_resolver():
+    geography_resolver.clear()
+    yield
+    geography_resolver.clear()
+
+
+@pytest.mark.django_db
+def test_resolve():
+    geography = GeographyFactory(code="ZA", version="resolver_v1")
+
+    assert geography_resolver.resolve("ZA", "resolver_v1") == geography.id
+
+    with pytest.raises(Geography.DoesNotExist):
+        geography_resolver.resolve("ZA", "resolver_v2")
+
+
+@pytest.mark.django_db
+def test_single_query_per_version(django_assert_num_queries):
+    GeographyFactory(code="ZA", version="resolver_v1")
+    GeographyFactory(code="WC", version="resolver_v1")
+
+    with django_assert_num_queries(1):
+        geography_resolver.resolve("ZA", "resolver_v1")
+        geography_resolver.resolve("WC", "resolver_v1")
+
+
+@pytest.mark.django_db
+def test_expires_when_geography_changes():
+    GeographyFactory(code="ZA", version="resolver_v1")
+    geography_resolver.resolve("ZA", "resolver_v1")
+
+    geography = GeographyFactory(code="WC", version="resolver_v1")
+    assert geography_resolver.resolve("WC", "resolver_v1") == geography.id
+
+    geography.delete()
+    with pytest.raises(Geography.DoesNotExist):
+        geography_resolver.resolve("WC", "resolver_v1")
+
+
+@patch("wazimap_ng.datasets.services.geography_resolver.load_code_map", side_effect=lambda version: {"ZA": version})
+def test_bounded_versions(mock_load_code_map, settings):
+    settings.GEOGRAPHY_RESOLVER_MAX_VERSIONS = 2
+
+    geography_resolver.resolve("ZA", "v1")
+    geography_resolver.resolve("ZA", "v2")
+    geography_resolver.resolve("ZA", "v1")
+    geography_resolver.resolve("ZA", "v3")
+
+    assert list(geography_resolver._code_maps) == ["v1", "v3"]
+
+
+@pytest.mark.django_db
+def test_resolve_geography(django_assert_num_queries):
+    geography = GeographyFactory(code="ZA", version="resolver_v1")
+
+    assert geography_resolver.resolve_geography("ZA", "resolver_v1") == geography
+    with django_assert_num_queries(0):
+        assert geography_resolver.resolve_geography("ZA", "resolver_v1") == geography
+
+    geography.name = "Renamed"
+    geography.save()
+    assert geography_resolver.resolve_geography("ZA", "resolver_v1").name == "Renamed"
+
+    with pytest.raises(Geography.DoesNotExist):
+        geography_resolver.resolve_geography("ZA", "resolver_v2")
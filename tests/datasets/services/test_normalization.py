@@ -0,0 +1,111 @@
+import pytest
+from django.db import connection
+
+from wazimap_ng.datasets.models import DatasetData, DatasetGroupValue, IndicatorData
+from wazimap_ng.datasets.services.normalization import decode, get_group_positions, normalize_dataset
+from wazimap_ng.datasets.tasks.indicator_data_extraction import grouped_data_extraction, grouped_totals_query
+from tests.datasets.factories import DatasetFactory, DatasetDataFactory, GeographyFactory, IndicatorFactory, UniverseFactory
+
+
+@pytest.fixture
+def dataset():
+    dataset = DatasetFactory(groups=["gender", "age", "race"])
+    geo1 = GeographyFactory()
+    geo2 = GeographyFactory()
+
+    rows = [
+        (geo1, {"gender": "male", "age": "15", "race": "A", "count": "1"}),
+        (geo1, {"gender": "male", "age": "16", "race": "B", "count": "2"}),
+        (geo1, {"gender": "female", "age": "15", "race": "A", "count": "4"}),
+        (geo1, {"gender": "female", "age": "15", "race": "B", "count": ""}),
+        (geo2, {"gender": "male", "age": "16", "race": "A", "count": "8"}),
+        (geo2, {"gender": "female", "age": "16", "count": "16"}),
+    ]
+    for geography, data in rows:
+        DatasetDataFactory(dataset=dataset, geography=geography, data=data)
+
+    return dataset
+
+
+def get_totals(indicator, normalized):
+    sql, params, _, other_groups, decoders = grouped_totals_query(indicator, normalized=normalized)
+    num_groups = len(other_groups) + 1
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return sorted((
+        (row[0], *[decode(value, decoder) for value, decoder in zip(row[1:1 + num_groups], decoders)], *row[1 + num_groups:])
+        for row in rows
+    ), key=repr)
+
+
+@pytest.mark.django_db
+def test_normalize_dataset(dataset):
+    assert normalize_dataset(dataset) == 6
+    assert normalize_dataset(dataset) == 0
+
+    positions = get_group_positions(dataset.id)
+    assert sorted(positions, key=positions.get) == ["age", "gender", "race"]
+
+    race_values = dict(
+        DatasetGroupValue.objects.filter(dataset=dataset, group="race").values_list("value", "code")
+    )
+    assert set(race_values) == {'"A"', '"B"'}
+
+    rows = {row.data["count"]: row for row in DatasetData.objects.filter(dataset=dataset)}
+    assert rows["8"].count == 8.0
+    assert rows[""].count is None
+    assert rows["8"].codes[positions["race"]] == race_values['"A"']
+    assert rows["16"].codes[positions["race"]] is None
+
+
+@pytest.mark.django_db
+def test_normalize_appended_group(dataset):
+    normalize_dataset(dataset)
+
+    DatasetDataFactory(dataset=dataset, data={"gender": "male", "region": "north", "count": "3"})
+    dataset.groups = dataset.groups + ["region"]
+
+    assert normalize_dataset(dataset) == 1
+    positions = get_group_positions(dataset.id)
+    assert positions["region"] == 3
+
+    row = DatasetData.objects.get(dataset=dataset, data__region="north")
+    assert len(row.codes) == 4
+    assert row.codes[positions["age"]] is None
+
+
+@pytest.mark.django_db
+def test_normalized_extraction_matches_json_extraction(dataset, settings):
+    normalize_dataset(dataset)
+    indicator = IndicatorFactory(dataset=dataset, groups=["gender"])
+
+    assert get_totals(indicator, True) == get_totals(indicator, False)
+
+    grouped_data_extraction(indicator)
+    expected = dict(IndicatorData.objects.filter(indicator=indicator).values_list("geography_id", "data"))
+    IndicatorData.objects.filter(indicator=indicator).delete()
+
+    settings.NORMALIZED_DATASET_STORAGE = True
+    grouped_data_extraction(indicator)
+    data = dict(IndicatorData.objects.filter(indicator=indicator).values_list("geography_id", "data"))
+
+    assert data.keys() == expected.keys()
+    for geography_id, indicator_data in data.items():
+        assert indicator_data["subindicators"] == expected[geography_id]["subindicators"]
+        for group, subindicators in indicator_data["groups"].items():
+            for subindicator, totals in subindicators.items():
+                assert sorted(totals, key=repr) == sorted(expected[geography_id]["groups"][group][subindicator], key=repr)
+
+
+@pytest.mark.django_db
+def test_normalized_query_skips_json_data(dataset):
+    normalize_dataset(dataset)
+    indicator = IndicatorFactory(dataset=dataset, groups=["gender"])
+
+    sql, _, _, _, _ = grouped_totals_query(indicator, normalized=True)
+    assert '"data"' not in sql
+    assert '"count" IS NOT NULL' in sql
+
+    indicator.universe = UniverseFactory(filters={"race__in": ["A"]})
+    assert get_totals(indicator, True) == get_totals(indicator, False)
@@ -0,0 +1,110 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from wazimap_ng.datasets.models import IndicatorData, IndicatorDataRollup
+from wazimap_ng.datasets.tasks.indicator_data_extraction import grouped_data_extraction
+from wazimap_ng.datasets.tasks.dataset_indicator_extraction import dataset_indicator_extraction
+from tests.datasets.factories import (
+    DatasetFactory, DatasetDataFactory, DatasetFileFactory, GeographyFactory, IndicatorFactory, UniverseFactory
+)
+
+
+def sorted_indicator_data(indicator):
+    data = {}
+    for geography_id, indicator_data in IndicatorData.objects.filter(indicator=indicator).values_list("geography_id", "data"):
+        for subindicators in indicator_data["groups"].values():
+            for subindicator, totals in subindicators.items():
+                subindicators[subindicator] = sorted(totals, key=json.dumps)
+        data[geography_id] = indicator_data
+    return data
+
+
+@pytest.fixture
+def dataset():
+    dataset = DatasetFactory(groups=["gender", "age", "race"])
+    geo1 = GeographyFactory()
+    geo2 = GeographyFactory()
+
+    rows = [
+        (geo1, {"gender": "male", "age": "15", "race": "A", "count": "1"}),
+        (geo1, {"gender": "male", "age": "16", "race": "B", "count": "2"}),
+        (geo1, {"gender": "female", "age": "15", "race": "A", "count": "4"}),
+        (geo1, {"gender": "female", "age": "15", "race": "B", "count": ""}),
+        (geo2, {"gender": "male", "age": "16", "race": "A", "count": "8"}),
+        (geo2, {"gender": "female", "age": "16", "count": "16"}),
+    ]
+    for geography, data in rows:
+        DatasetDataFactory(dataset=dataset, geography=geography, data=data)
+
+    return dataset
+
+
+@pytest.mark.django_db
+def test_dataset_indicator_extraction_matches_grouped_extraction(dataset):
+    indicators = [
+        IndicatorFactory(dataset=dataset, groups=["gender"]),
+        IndicatorFactory(dataset=dataset, groups=["age"]),
+        IndicatorFactory(dataset=dataset, groups=["gender"], universe=UniverseFactory(filters={"race": "A"})),
+        IndicatorFactory(dataset=dataset, groups=["age"], universe=UniverseFactory(filters={"gender__in": ["female"]})),
+    ]
+
+    expected = {}
+    for indicator in indicators:
+        grouped_data_extraction(indicator)
+        expected[indicator.id] = sorted_indicator_data(indicator)
+        IndicatorData.objects.filter(indicator=indicator).delete()
+
+    dataset_file = DatasetFileFactory(dataset_id=dataset.id)
+    result = dataset_indicator_extraction(dataset, dataset_file=dataset_file)
+
+    assert result["indicators"] == [indicator.id for indicator in indicators]
+    for indicator in indicators:
+        assert sorted_indicator_data(indicator) == expected[indicator.id]
+        assert IndicatorDataRollup.objects.filter(indicator=indicator).exists()
+
+    universe_data = sorted_indicator_data(indicators[2])
+    assert [universe_data[k]["subindicators"] for k in sorted(universe_data)] == [{"male": 1.0, "female": 4.0}, {"male": 8.0}]
+
+    lookup_data = sorted_indicator_data(indicators[3])
+    assert [lookup_data[k]["subindicators"] for k in sorted(lookup_data)] == [{"15": 4.0}, {"16": 16.0}]
+
+    dataset_file.refresh_from_db()
+    assert dataset_file.progress["extraction_status"] == "done"
+    assert dataset_file.progress["indicators_done"] == 4
+    assert dataset_file.progress["indicators_total"] == 4
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("wazimap_ng.datasets.tasks.dataset_indicator_extraction.update_indicator_profiles")
+def test_full_extraction_reports_progress_and_updates_profiles(update_indicator_profiles, dataset):
+    indicators = [
+        IndicatorFactory(dataset=dataset, groups=["gender"]),
+        IndicatorFactory(dataset=dataset, groups=["gender", "age"]),
+    ]
+
+    dataset_indicator_extraction(dataset)
+
+    dataset.refresh_from_db()
+    assert dataset.extraction_progress["extraction_status"] == "done"
+    assert dataset.extraction_progress["indicators_done"] == 2
+    assert dataset.extraction_progress["indicators_total"] == 2
+    update_indicator_profiles.assert_called_once_with([indicator.id for indicator in indicators])
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("wazimap_ng.datasets.tasks.dataset_indicator_extraction.extract_indicator_data")
+def test_progress_is_committed_per_indicator(extract_indicator_data, dataset):
+    extract_indicator_data.side_effect = RuntimeError
+    indicator = IndicatorFactory(dataset=dataset, groups=["gender"])
+    IndicatorFactory(dataset=dataset, groups=["gender", "age"])
+
+    dataset_file = DatasetFileFactory(dataset_id=dataset.id)
+    with pytest.raises(RuntimeError):
+        dataset_indicator_extraction(dataset, dataset_file=dataset_file)
+
+    # The single group indicator is kept even though a later indicator failed
+    dataset_file.refresh_from_db()
+    assert dataset_file.progress["indicators_done"] == 1
+    assert IndicatorData.objects.filter(indicator=indicator).exists()
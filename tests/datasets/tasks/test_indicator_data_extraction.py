@@ -0,0 +1,145 @@
+from unittest.mock import patch
+
+import pytest
+
+from wazimap_ng.datasets.models import Geography, IndicatorData, IndicatorDataRollup
+from wazimap_ng.datasets.tasks.indicator_data_extraction import (
+    indicator_data_extraction, subindicator_data_extraction, grouped_data_extraction, rollup_extraction
+)
+from wazimap_ng.datasets.tasks.dataset_indicator_extraction import incremental_indicator_extraction
+from tests.datasets.factories import (
+    DatasetFactory, DatasetDataFactory, DatasetFileFactory, GeographyFactory, IndicatorFactory, IndicatorDataFactory
+)
+
+
+def sorted_indicator_data(indicator):
+    data = {}
+    for geography_id, indicator_data in IndicatorData.objects.filter(indicator=indicator).values_list("geography_id", "data"):
+        for subindicators in indicator_data["groups"].values():
+            for subindicator, totals in subindicators.items():
+                subindicators[subindicator] = sorted(totals, key=lambda x: x["gender"])
+        data[geography_id] = indicator_data
+    return data
+
+
+@pytest.fixture
+def indicator():
+    dataset = DatasetFactory(groups=["gender", "age", "race"])
+    geo1 = GeographyFactory()
+    geo2 = GeographyFactory()
+
+    rows = [
+        (geo1, {"gender": "male", "age": "15", "race": "A", "count": "1"}),
+        (geo1, {"gender": "male", "age": "16", "race": "B", "count": "2"}),
+        (geo1, {"gender": "female", "age": "15", "race": "A", "count": "4"}),
+        (geo1, {"gender": "female", "age": "15", "race": "B", "count": ""}),
+        (geo2, {"gender": "male", "age": "16", "race": "A", "count": "8"}),
+        (geo2, {"gender": "female", "age": "16", "count": "16"}),
+    ]
+    for geography, data in rows:
+        DatasetDataFactory(dataset=dataset, geography=geography, data=data)
+
+    return IndicatorFactory(dataset=dataset, groups=["gender"])
+
+
+@pytest.mark.django_db
+def test_grouped_data_extraction(indicator):
+    grouped_data_extraction(indicator)
+    data = sorted_indicator_data(indicator)
+
+    assert len(data) == 2
+    geo1_data, geo2_data = [data[k] for k in sorted(data)]
+
+    assert geo1_data["subindicators"] == {"male": 3.0, "female": 4.0}
+    assert geo1_data["groups"]["age"] == {
+        "15": [{"gender": "female", "count": 4.0}, {"gender": "male", "count": 1.0}],
+        "16": [{"gender": "male", "count": 2.0}],
+    }
+    assert geo2_data["groups"]["race"] == {
+        "A": [{"gender": "male", "count": 8.0}],
+    }
+
+
+@pytest.mark.django_db
+def test_grouped_data_extraction_matches_subindicator_extraction(indicator):
+    subindicator_data_extraction(indicator)
+    expected = sorted_indicator_data(indicator)
+
+    IndicatorData.objects.filter(indicator=indicator).delete()
+
+    grouped_data_extraction(indicator)
+    assert sorted_indicator_data(indicator) == expected
+
+
+@pytest.mark.django_db
+def test_rollup_extraction():
+    indicator = IndicatorFactory()
+    root = Geography.add_root(name="Country", code="ZA", level="country", version="test")
+    province1 = root.add_child(name="Province 1", code="P1", level="province", version="test")
+    province2 = root.add_child(name="Province 2", code="P2", level="province", version="test")
+
+    for geography, subindicators in [
+        (root, {"male": 100, "female": 110}),
+        (province1, {"male": 40, "female": 60}),
+        (province2, {"male": 60.5}),
+    ]:
+        IndicatorDataFactory(indicator=indicator, geography=geography, data={"subindicators": subindicators, "groups": {}})
+
+    rollup_extraction(indicator)
+
+    rollups = {
+        r.parent_path: r
+        for r in IndicatorDataRollup.objects.filter(indicator=indicator, version="test")
+    }
+    assert rollups.keys() == {"", root.path}
+    assert rollups[""].subindicators == {"male": 100, "female": 110}
+    assert rollups[root.path].subindicators == {"male": 100.5, "female": 60}
+    assert rollups[root.path].children == {
+        "P1": {"subindicators": {"male": 40, "female": 60}, "groups": {}},
+        "P2": {"subindicators": {"male": 60.5}, "groups": {}},
+    }
+
+
+@pytest.mark.django_db
+def test_incremental_indicator_extraction():
+    dataset = DatasetFactory(groups=["gender"])
+    indicator = IndicatorFactory(dataset=dataset, groups=["gender"])
+    root = Geography.add_root(name="Country", code="ZA", level="country", version="test")
+    province1 = root.add_child(name="Province 1", code="P1", level="province", version="test")
+    province2 = root.add_child(name="Province 2", code="P2", level="province", version="test")
+
+    DatasetDataFactory(dataset=dataset, geography=province1, data={"gender": "male", "count": "1"})
+    DatasetDataFactory(dataset=dataset, geography=province2, data={"gender": "male", "count": "2"})
+    indicator_data_extraction(indicator)
+
+    # Untouched geographies keep their data
+    IndicatorData.objects.filter(indicator=indicator, geography=province2).update(
+        data={"subindicators": {"male": 20}, "groups": {}}
+    )
+
+    DatasetDataFactory(dataset=dataset, geography=province1, data={"gender": "female", "count": "4"})
+    dataset_file = DatasetFileFactory(dataset_id=dataset.id, geography_ids=[province1.id])
+    result = incremental_indicator_extraction(dataset_file)
+
+    assert result["indicators"] == [indicator.id]
+    data = dict(IndicatorData.objects.filter(indicator=indicator).values_list("geography__code", "data"))
+    assert data["P1"]["subindicators"] == {"male": 1.0, "female": 4.0}
+    assert data["P2"]["subindicators"] == {"male": 20}
+
+    rollup = IndicatorDataRollup.objects.get(indicator=indicator, parent_path=root.path, version="test")
+    assert rollup.subindicators == {"male": 21, "female": 4.0}
+    assert rollup.children.keys() == {"P1", "P2"}
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("wazimap_ng.datasets.tasks.dataset_indicator_extraction.update_indicator_profiles")
+def test_incremental_extraction_updates_profiles(update_indicator_profiles):
+    dataset = DatasetFactory(groups=["gender"])
+    indicator = IndicatorFactory(dataset=dataset, groups=["gender"])
+    geography = GeographyFactory()
+    DatasetDataFactory(dataset=dataset, geography=geography, data={"gender": "male", "count": "1"})
+
+    dataset_file = DatasetFileFactory(dataset_id=dataset.id, geography_ids=[geography.id])
+    incremental_indicator_extraction(dataset_file)
+
+    update_indicator_profiles.assert_called_once_with([indicator.id])
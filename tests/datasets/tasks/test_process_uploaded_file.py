@@ -1,10 +1,15 @@
 import csv
 import codecs
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from unittest.mock import patch
 
 import pytest
 
-from wazimap_ng.datasets.tasks.process_uploaded_file import process_csv
+import pandas as pd
+
+from wazimap_ng.datasets.tasks.process_uploaded_file import process_chunks, process_csv
+from wazimap_ng.datasets.tasks.upload_pipeline import process_csv_pipeline, read_line_chunks
 from tests.datasets.factories import DatasetFactory, GeographyFactory, GeographyHierarchyFactory, DatasetFileFactory
 
 def generate_file(data, header, encoding="utf8"):
@@ -82,3 +87,79 @@ class TestUploadFile:
             assert dd.data["field1"] == ed[1]
             assert dd.data["field2"] == ed[2]
             assert dd.data["count"] == str(ed[3])
+
+    def test_process_csv_with_copy(self, dataset, data, geographies, settings):
+        settings.COPY_DATASET_UPLOADS = True
+        csv_data, header, encoding = data
+        datasetfile = create_datasetfile(csv_data, encoding, header)
+
+        output = process_csv(dataset, datasetfile.document.open("rb"))
+        datasetdata = dataset.datasetdata_set.all()
+
+        assert output["rows"] == len(csv_data)
+        assert len(datasetdata) == len(csv_data)
+
+        for dd, ed in zip(datasetdata, csv_data):
+            assert dd.geography.code == ed[0]
+            assert dd.data["field1"] == ed[1]
+            assert dd.data["field2"] == ed[2]
+            assert dd.data["count"] == str(ed[3])
+
+
+@patch("wazimap_ng.datasets.tasks.process_uploaded_file.process_file_data", return_value=([], []))
+def test_process_chunks_row_numbers(process_file_data):
+    # Arrow chunks can be shorter than the chunk size
+    chunks = [pd.DataFrame({"count": range(size)}) for size in [2, 3, 1]]
+
+    output = process_chunks("dataset", ["count"], iter(chunks))
+
+    assert [call[0][2] for call in process_file_data.call_args_list] == [1, 3, 6]
+    assert output["rows"] == 6
+
+
+def test_read_line_chunks():
+    buffer = BytesIO(b"geography,count\nA,1\nB,2\nC,3\n")
+
+    assert list(read_line_chunks(buffer, 2)) == [b"A,1\nB,2\n", b"C,3\n"]
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("wazimap_ng.datasets.tasks.upload_pipeline.get_executor", side_effect=ThreadPoolExecutor)
+def test_process_csv_pipeline(mock_get_executor, dataset, geographies):
+    csv_data = good_data + [("MISSING", "F1_value_3", "F2_value_3", 333), ("GEOCODE_1", "F1_value_4", "F2_value_4", "abc")]
+    datasetfile = create_datasetfile(csv_data, "utf8", good_header)
+
+    output = process_csv_pipeline(datasetfile, dataset, chunksize=1)
+
+    assert output["rows"] == 4
+    assert output["warning_logs"] == [["MISSING", "F1_value_3", "F2_value_3", "333"]]
+    assert len(output["error_logs"]) == 1
+    assert output["error_logs"][0]["line_error"][0]["CSV Line Number"] == 5
+
+    datasetdata = sorted(dataset.datasetdata_set.all(), key=lambda dd: dd.geography.code)
+    assert len(datasetdata) == len(good_data)
+    for dd, ed in zip(datasetdata, good_data):
+        assert dd.geography.code == ed[0]
+        assert dd.data == {"field1": ed[1], "field2": ed[2], "count": str(ed[3])}
+
+    datasetfile.refresh_from_db()
+    assert datasetfile.progress["status"] == "done"
+    assert datasetfile.progress["chunks_done"] == 4
+
+    dataset.refresh_from_db()
+    assert sorted(dataset.groups) == ["age group", "field1", "field2"]
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("wazimap_ng.datasets.tasks.upload_pipeline.get_executor", side_effect=ThreadPoolExecutor)
+def test_process_csv_pipeline_byte_order_mark(mock_get_executor, dataset, geographies):
+    datasetfile = create_datasetfile(good_data, "utf-8-sig", good_header)
+
+    output = process_csv_pipeline(datasetfile, dataset, chunksize=1)
+
+    assert output["rows"] == len(good_data)
+    assert output["error_logs"] == []
+
+    datasetdata = sorted(dataset.datasetdata_set.all(), key=lambda dd: dd.geography.code)
+    assert [dd.geography.code for dd in datasetdata] == [ed[0] for ed in good_data]
+    assert all("geography" not in dd.data for dd in datasetdata)
@@ -2,6 +2,7 @@ from unittest.mock import patch
 from unittest.mock import Mock
 
 from django_mock_queries.query import MockSet, MockModel
+import pandas as pd
 import pytest
 
 from wazimap_ng.datasets import dataloader
@@ -9,21 +10,22 @@ from wazimap_ng.datasets import models
 
 pytestmark = pytest.mark.django_db
 
-@patch('wazimap_ng.datasets.models.Geography.objects.get', side_effect=lambda code, version: (code, version))
-def test_load_geography(mock_objects):
-    o = ("X", "Y")
-    assert  dataloader.load_geography(*o) == o
+def test_load_geography():
+    assert dataloader.load_geography("x", {"X": "Y"}) == "Y"
 
-@patch('wazimap_ng.datasets.models.Geography.objects.get', side_effect=lambda code, version: (code, version))
-def test_correct_geography_cache(mock_objects):
-    o = ("X", "Y")
-    assert  dataloader.load_geography(*o) == o
+    with pytest.raises(models.Geography.DoesNotExist):
+        dataloader.load_geography("Z", {"X": "Y"})
 
-    p = ("X", "Z")
-    assert  dataloader.load_geography(*p) == p
-    
-    q = ("Z", "Y")
-    assert  dataloader.load_geography(*q) == q
+@patch('wazimap_ng.datasets.services.geography_resolver.get_code_map', side_effect=lambda version: {"X": 1, "Y": 2})
+def test_load_geography_ids(mock_get_code_map):
+    ids = dataloader.load_geography_ids(pd.Series(["x", "Y", "Z"]), "version")
+    assert ids.tolist()[:2] == [1, 2]
+    assert ids.isna().tolist() == [False, False, True]
+
+@pytest.mark.parametrize("value", [None, float("nan")])
+def test_validate_missing_count(value):
+    errors = dataloader.validate_count(value, 5)
+    assert errors == [{"CSV Line Number": 5, "Field Name": "count", "Error Details": "Missing data for count"}]
 
 
 @pytest.fixture
@@ -44,6 +46,11 @@ def good_input_with_groups():
 class TestLoadData:
     pytestmark = pytest.mark.django_db
 
+    @pytest.fixture(autouse=True)
+    def get_code_map(self):
+        with patch('wazimap_ng.datasets.services.geography_resolver.get_code_map', return_value={}) as get_code_map:
+            yield get_code_map
+
     @patch('wazimap_ng.datasets.models.DatasetData')
     @patch('wazimap_ng.datasets.dataloader.load_geography')
     def test_bulk_create_lt_10000(self, load_geography, MockDatasetData, good_input):
@@ -69,14 +76,15 @@ class TestLoadData:
 
     @patch('wazimap_ng.datasets.models.DatasetData')
     @patch('wazimap_ng.datasets.dataloader.load_geography')
-    def test_bulk_check_load_geography_call(self, load_geography, MockDatasetData, good_input):
+    def test_bulk_check_load_geography_call(self, load_geography, MockDatasetData, get_code_map, good_input):
         dataset = Mock()
         dataset.geography_hierarchy.version = 9999
         load_geography.return_value = "XXX"
 
         dataloader.loaddata(dataset, good_input, 0)
 
-        load_geography.assert_called_with("YYY", 9999)
+        get_code_map.assert_called_once_with(9999)
+        load_geography.assert_called_with("YYY", get_code_map.return_value)
 
     @pytest.mark.django_db
     @patch('wazimap_ng.datasets.models.DatasetData')
@@ -133,10 +141,96 @@ class TestLoadData:
         assert create_groups.call_count == 1
         create_groups.assert_called_with(dataset, ["group1", "group2"])
 
+    @patch('wazimap_ng.datasets.dataloader.create_groups')
+    @patch('wazimap_ng.datasets.dataloader.copy_datarows')
+    @patch('wazimap_ng.datasets.dataloader.load_geography')
+    def test_copy_datarows(self, load_geography, copy_datarows, create_groups, good_input, settings):
+        settings.COPY_DATASET_UPLOADS = True
+        dataset = Mock(spec=models.Dataset)
+        load_geography.return_value = 1
+
+        input_data = [dict(good_input[0]) for i in range(10001)]
+
+        dataloader.loaddata(dataset, input_data, 0)
+
+        assert copy_datarows.call_count == 2
+        datarows = copy_datarows.call_args_list[0][0][1]
+        assert len(datarows) == 10000
+        assert datarows[0] == (1, {"count": 111})
+
     datasetdata = MockSet()
     datasetdata_objects = patch('wazimap_ng.datasets.models.DatasetData.objects', datasetdata)
 
 
+
+class TestLoadDataFrame:
+    @pytest.fixture
+    def df(self):
+        return pd.DataFrame([
+            {"geography": "XXX", "group1": "A", "count": "111"},
+            {"geography": "ZZZ", "group1": "A", "count": "222"},
+            {"geography": "YYY", "group1": "B", "count": None},
+            {"geography": "YYY", "group1": "B", "count": "abc"},
+            {"geography": "YYY", "group1": "C", "count": "333"},
+        ])
+
+    @patch('wazimap_ng.datasets.dataloader.create_groups')
+    @patch('wazimap_ng.datasets.models.DatasetData')
+    @patch('wazimap_ng.datasets.dataloader.load_geography_ids')
+    def test_validation(self, load_geography_ids, MockDatasetData, create_groups, df):
+        dataset = Mock(spec=models.Dataset)
+        load_geography_ids.return_value = pd.Series([1, None, 2, 2, 2])
+
+        (errors, warnings) = dataloader.loaddata_frame(dataset, df, 10)
+
+        assert warnings == [["ZZZ", "A", "222"]]
+        assert len(errors) == 2
+        assert errors[0]["line_error"][0]["CSV Line Number"] == 13
+        assert errors[0]["line_error"][0]["Error Details"] == "Missing data for count"
+        assert errors[1]["line_error"][0]["CSV Line Number"] == 14
+        assert errors[1]["values"] == ["YYY", "B", "abc"]
+
+        assert MockDatasetData.call_count == 2
+        assert MockDatasetData.call_args_list[0][1]["geography_id"] == 1
+        assert MockDatasetData.call_args_list[0][1]["data"] == {"group1": "A", "count": "111"}
+        assert MockDatasetData.call_args_list[1][1]["geography_id"] == 2
+        MockDatasetData.objects.bulk_create.assert_called_once()
+        create_groups.assert_called_with(dataset, ["group1"])
+
+    @patch('wazimap_ng.datasets.dataloader.load_geography_ids')
+    def test_typed_columns(self, load_geography_ids):
+        # Excel chunks keep their column types
+        df = pd.DataFrame({
+            "geography": ["XXX", "YYY"],
+            "age": [15, 17],
+            "count": [1.5, 2.0],
+        })
+        load_geography_ids.return_value = pd.Series([1, 2])
+
+        valid_ids, records, errors, warnings = dataloader.validate_frame(df, "version", 0)
+
+        assert valid_ids == [1, 2]
+        assert records == [{"age": 15, "count": 1.5}, {"age": 17, "count": 2.0}]
+        assert isinstance(records[0]["age"], int)
+
+
+def test_stringify_groups():
+    # Parquet and arrow chunks are converted before they are validated
+    df = pd.DataFrame({
+        "geography": ["XXX", "YYY", "YYY"],
+        "age": pd.Series([15, None, 17], dtype=object),
+        "group1": ["A", None, "B"],
+        "gaps": [15.0, float("nan"), 16.0],
+        "score": [1.5, float("nan"), 2.0],
+        "count": [1.5, 2.0, 3.0],
+    })
+
+    records = dataloader.stringify_groups(df).to_dict("records")
+
+    assert records[0] == {"geography": "XXX", "age": "15", "group1": "A", "gaps": "15", "score": "1.5", "count": 1.5}
+    assert records[2] == {"geography": "YYY", "age": "17", "group1": "B", "gaps": "16", "score": "2.0", "count": 3.0}
+    assert [records[1][column] for column in ["age", "group1", "gaps", "score"]] == [None, None, None, None]
+
 class TestCreateGroups:
     @patch('wazimap_ng.datasets.models.Group.objects')
     @patch('wazimap_ng.datasets.models.DatasetData.objects')
@@ -0,0 +1,53 @@
+from io import BytesIO
+
+import openpyxl
+import pytest
+from django.core.files import File
+
+from wazimap_ng.datasets.excel_reader import read_excel_chunks
+
+
+def generate_workbook(rows, header):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+
+    buffer = BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return File(buffer, name="test.xlsx")
+
+
+def test_read_excel_chunks():
+    rows = [("GEOCODE_%d" % idx, "F1_value", float(idx)) for idx in range(5)]
+    document = generate_workbook(rows, ["Geography", "Field1 ", "Count"])
+
+    columns, chunks = read_excel_chunks(document, 2)
+    chunks = list(chunks)
+
+    assert list(columns) == ["geography", "field1", "count"]
+    assert [len(df) for df in chunks] == [2, 2, 1]
+    assert chunks[2].to_dict("records") == [{"geography": "GEOCODE_4", "field1": "F1_value", "count": 4}]
+
+
+def test_skips_empty_rows():
+    rows = [("GEOCODE_1", 1), (None, None), ("GEOCODE_2", 2)]
+    document = generate_workbook(rows, ["Geography", "Count"])
+
+    _, chunks = read_excel_chunks(document, 10)
+
+    assert [df.to_dict("records") for df in chunks] == [[
+        {"geography": "GEOCODE_1", "count": 1},
+        {"geography": "GEOCODE_2", "count": 2},
+    ]]
+
+
+def test_empty_workbook():
+    document = generate_workbook([], [])
+
+    columns, chunks = read_excel_chunks(document, 10)
+
+    assert len(columns) == 0
+    assert list(chunks) == []
@@ -0,0 +1,86 @@
+from io import BytesIO
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.files import File
+
+from wazimap_ng.general.services.arrow_reader import is_arrow_file, read_arrow_chunks, read_arrow_columns
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc
+import pyarrow.parquet
+
+
+@pytest.fixture
+def table():
+    return pa.table({
+        "Geography": ["GEO1", "GEO2", "GEO3"],
+        "Age ": [15, 16, None],
+        "Count": [1.5, 2.0, 3.0],
+    })
+
+
+def parquet_file(table, **kwargs):
+    buffer = BytesIO()
+    pyarrow.parquet.write_table(table, buffer, **kwargs)
+    return File(BytesIO(buffer.getvalue()), name="data.parquet")
+
+
+def arrow_file(table, writer=pyarrow.ipc.new_file):
+    sink = pa.BufferOutputStream()
+    with writer(sink, table.schema) as ipc_writer:
+        ipc_writer.write_table(table)
+    return File(BytesIO(sink.getvalue().to_pybytes()), name="data.arrow")
+
+
+def test_is_arrow_file():
+    assert is_arrow_file("data.parquet")
+    assert is_arrow_file("data.FEATHER")
+    assert is_arrow_file("data.arrow")
+    assert not is_arrow_file("data.csv")
+
+
+def test_read_arrow_columns(table):
+    assert list(read_arrow_columns(parquet_file(table))) == ["geography", "age", "count"]
+
+
+def test_read_parquet_row_groups_in_chunks(table):
+    columns, chunks = read_arrow_chunks(parquet_file(table, row_group_size=2), chunksize=1)
+    chunks = list(chunks)
+
+    assert list(columns) == ["geography", "age", "count"]
+    assert len(chunks) == 3
+    assert [df["geography"].iloc[0] for df in chunks] == ["GEO1", "GEO2", "GEO3"]
+
+
+@pytest.mark.parametrize("writer", [pyarrow.ipc.new_file, pyarrow.ipc.new_stream])
+def test_read_arrow_typed_columns(table, writer):
+    _, chunks = read_arrow_chunks(arrow_file(table, writer), chunksize=10)
+    df = next(chunks)
+
+    assert list(df["age"][:2]) == [15, 16]
+    assert df["age"].iloc[2] is None
+    assert list(df["count"]) == [1.5, 2.0, 3.0]
+
+
+def test_memory_map_is_closed(table, tmp_path):
+    path = tmp_path / "data.parquet"
+    pyarrow.parquet.write_table(table, str(path))
+    document = Mock(path=str(path), _committed=True)
+    document.name = "data.parquet"
+
+    sources = []
+    open_memory_map = pyarrow.memory_map
+    def memory_map(path):
+        sources.append(open_memory_map(path))
+        return sources[-1]
+
+    with patch("pyarrow.memory_map", side_effect=memory_map):
+        _, chunks = read_arrow_chunks(document, chunksize=10)
+        assert len(next(chunks)) == 3
+        assert not sources[-1].closed
+        assert list(chunks) == []
+
+    # One for the schema and one for the data
+    assert len(sources) == 2
+    assert all(source.closed for source in sources)
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache as django_cache
+
+from tests.profile.factories import ProfileFactory
+from tests.datasets.factories import GeographyFactory
+
+from wazimap_ng.general.models import MaterializedProfile
+from wazimap_ng.general.services import materialization
+
+
+@pytest.fixture
+def profile():
+    return ProfileFactory()
+
+@pytest.fixture
+def geography(profile):
+    return profile.geography_hierarchy.root_geography
+
+@pytest.fixture
+def materialized(profile, geography):
+    return MaterializedProfile.objects.create(
+        profile=profile, geography=geography, content_version="v1", payload='{"a":1}'
+    )
+
+
+@pytest.mark.django_db
+class TestGetMaterializedPayload:
+    def test_unversioned_profile(self, profile, geography, materialized):
+        django_cache.delete("etag-Profile-%s" % profile.id)
+        assert materialization.get_materialized_payload(profile.id, geography.code) is None
+
+    def test_current_version(self, profile, geography, materialized):
+        django_cache.set("etag-Profile-%s" % profile.id, "v1")
+        assert materialization.get_materialized_payload(profile.id, geography.code) == '{"a":1}'
+
+    def test_stale_version(self, profile, geography, materialized):
+        django_cache.set("etag-Profile-%s" % profile.id, "v2")
+        assert materialization.get_materialized_payload(profile.id, geography.code) is None
+
+    def test_other_geography_version(self, profile, geography):
+        other = GeographyFactory(code=geography.code, version="other_version")
+        MaterializedProfile.objects.create(
+            profile=profile, geography=other, content_version="v1", payload='{"other":1}'
+        )
+        django_cache.set("etag-Profile-%s" % profile.id, "v1")
+        assert materialization.get_materialized_payload(profile.id, geography.code) is None
+
+
+@pytest.mark.django_db
+class TestMaterializeGeographies:
+    @patch("wazimap_ng.general.services.materialization.render_consolidated_profile")
+    def test_stores_payload(self, mock_render, profile, geography):
+        mock_render.return_value = '{"b":2}'
+        django_cache.set("etag-Profile-%s" % profile.id, "v3")
+
+        count = materialization.materialize_geographies(profile, [geography], "v3")
+
+        assert count == 1
+        obj = MaterializedProfile.objects.get(profile=profile, geography=geography)
+        assert obj.content_version == "v3"
+        assert obj.payload == '{"b":2}'
+
+    @patch("wazimap_ng.general.services.materialization.render_consolidated_profile")
+    def test_stops_when_superseded(self, mock_render, profile, geography):
+        django_cache.set("etag-Profile-%s" % profile.id, "newer")
+
+        count = materialization.materialize_geographies(profile, [geography], "older")
+
+        assert count == 0
+        assert mock_render.call_count == 0
@@ -0,0 +1,43 @@
+from io import StringIO
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+
+from tests.boundaries.factories import GeographyBoundaryFactory
+from tests.datasets.factories import GeographyFactory
+from tests.points.factories import LocationFactory
+
+from wazimap_ng.general.services.query_plans import summarize_plan
+
+
+def test_summarize_plan():
+    plan = {
+        "Plan": {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "points_location"},
+                {"Node Type": "Index Scan", "Relation Name": "boundaries_geographyboundary", "Index Name": "idx_boundaries_geom"},
+            ]
+        },
+        "Execution Time": 1.5
+    }
+
+    assert summarize_plan(plan) == {
+        "indexes": ["idx_boundaries_geom"],
+        "seq_scans": ["points_location"],
+        "time": 1.5,
+    }
+
+
+@pytest.mark.django_db
+def test_explain_spatial_queries():
+    GeographyBoundaryFactory(geography=GeographyFactory())
+    LocationFactory(coordinates=Point(25, 25))
+
+    out = StringIO()
+    call_command("explain_spatial_queries", stdout=out)
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert all(line.startswith("OK") for line in lines)
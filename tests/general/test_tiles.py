@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.core.cache import cache as django_cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tests.points.factories import ProfileCategoryFactory, LocationFactory
+from tests.boundaries.factories import GeographyBoundaryFactory
+from tests.datasets.factories import GeographyFactory
+
+from wazimap_ng.general.services.tiles import tile_envelope, is_valid_tile, WORLD_EXTENT, MVT_CONTENT_TYPE
+
+
+class TestTileEnvelope:
+    def test_world_tile(self):
+        assert tile_envelope(0, 0, 0) == (-WORLD_EXTENT, -WORLD_EXTENT, WORLD_EXTENT, WORLD_EXTENT)
+
+    def test_quadrants(self):
+        assert tile_envelope(1, 0, 0) == (-WORLD_EXTENT, 0, 0, WORLD_EXTENT)
+        assert tile_envelope(1, 1, 1) == (0, -WORLD_EXTENT, WORLD_EXTENT, 0)
+
+    def test_valid_tiles(self):
+        assert is_valid_tile(0, 0, 0)
+        assert is_valid_tile(3, 7, 7)
+        assert not is_valid_tile(3, 8, 0)
+        assert not is_valid_tile(3, 0, -1)
+        assert not is_valid_tile(30, 0, 0)
+
+
+@pytest.fixture
+def profile_category():
+    return ProfileCategoryFactory()
+
+
+def tile_url(profile_category, z=0, x=0, y=0):
+    return reverse("category-points-tile", kwargs={
+        "profile_id": profile_category.profile_id, "profile_category_id": profile_category.id,
+        "z": z, "x": x, "y": y
+    })
+
+
+@pytest.mark.django_db
+class TestLocationTile:
+    def test_tile(self, client, profile_category):
+        LocationFactory(category=profile_category.category, coordinates=Point(28.0, -26.0))
+
+        response = client.get(tile_url(profile_category))
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == MVT_CONTENT_TYPE
+        assert len(response.content) > 0
+
+    def test_empty_tile(self, client, profile_category):
+        # Locations are in the southern hemisphere, tile 1/0/0 is the north west quadrant
+        LocationFactory(category=profile_category.category, coordinates=Point(28.0, -26.0))
+
+        response = client.get(tile_url(profile_category, 1, 0, 0))
+
+        assert response.status_code == 200
+        assert response.content == b""
+
+    def test_invalid_tile(self, client, profile_category):
+        response = client.get(tile_url(profile_category, 1, 2, 0))
+        assert response.status_code == 404
+
+    def test_private_profile(self, client, profile_category, django_user_model):
+        profile = profile_category.profile
+        profile.permission_type = "private"
+        profile.save()
+
+        response = client.get(tile_url(profile_category))
+        assert response.status_code == 401
+
+        api_client = APIClient()
+        api_client.force_authenticate(django_user_model.objects.create_superuser("admin", "admin@example.com", "password"))
+        response = api_client.get(tile_url(profile_category))
+        assert response.status_code == 200
+        assert response["Content-Type"] == MVT_CONTENT_TYPE
+
+    def test_wrong_profile(self, client, profile_category):
+        other = ProfileCategoryFactory()
+        response = client.get(reverse("category-points-tile", kwargs={
+            "profile_id": other.profile_id, "profile_category_id": profile_category.id, "z": 0, "x": 0, "y": 0
+        }))
+        assert response.status_code == 404
+
+    @patch("wazimap_ng.points.views.get_location_tile", return_value=b"tile")
+    def test_tile_is_invalidated_by_location_save(self, get_location_tile, client, profile_category):
+        django_cache.clear()
+        client.get(tile_url(profile_category))
+        client.get(tile_url(profile_category))
+        assert get_location_tile.call_count == 1
+
+        LocationFactory(category=profile_category.category)
+        client.get(tile_url(profile_category))
+        assert get_location_tile.call_count == 2
+
+
+@pytest.mark.django_db
+class TestBoundaryTile:
+    def test_tile(self, client):
+        geography = GeographyFactory(version="tiles", level="country")
+        GeographyBoundaryFactory(geography=geography)
+
+        url = reverse("boundaries-tile", kwargs={"version": "tiles", "z": 1, "x": 1, "y": 0})
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == MVT_CONTENT_TYPE
+        assert len(response.content) > 0
+
+        response = client.get(url, {"level": "province"})
+        assert response.content == b""
@@ -0,0 +1,90 @@
+import pytest
+from django.contrib.gis.geos import Point, Polygon, MultiPolygon
+
+from tests.boundaries.factories import GeographyBoundaryFactory
+from tests.points.factories import CategoryFactory, LocationFactory, ProfileCategoryFactory
+from tests.profile.factories import ProfileFactory
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.points.models import Location, LocationGeography
+from wazimap_ng.points.services.locations import get_locations
+from wazimap_ng.points.services.membership import update_location_memberships, update_boundary_memberships
+from wazimap_ng.points.views import boundary_point_count_helper
+
+
+def square(x, y, size):
+    return MultiPolygon([Polygon(((x, y), (x, y + size), (x + size, y + size), (x + size, y), (x, y)))])
+
+
+@pytest.fixture
+def country():
+    return Geography.add_root(name="Country", code="ZA", level="country", version="test")
+
+@pytest.fixture
+def provinces(country):
+    return [
+        country.add_child(name=f"Province {idx}", code=f"P{idx}", level="province", version="test")
+        for idx in range(2)
+    ]
+
+@pytest.fixture
+def boundaries(country, provinces):
+    return [
+        GeographyBoundaryFactory(geography=country, geom=square(0, 0, 20)),
+        GeographyBoundaryFactory(geography=provinces[0], geom=square(0, 0, 10)),
+        GeographyBoundaryFactory(geography=provinces[1], geom=square(10, 0, 10)),
+    ]
+
+@pytest.fixture
+def category():
+    return CategoryFactory()
+
+@pytest.fixture
+def locations(boundaries, category):
+    return [
+        LocationFactory(category=category, coordinates=Point(5, 5)),
+        LocationFactory(category=category, coordinates=Point(15, 5)),
+        LocationFactory(category=category, coordinates=Point(30, 30)),
+    ]
+
+
+def member_codes(location):
+    return sorted(
+        LocationGeography.objects.filter(location=location).values_list("geography__code", flat=True)
+    )
+
+
+@pytest.mark.django_db
+class TestMembership:
+    def test_saved_locations_are_placed(self, locations):
+        assert member_codes(locations[0]) == ["P0", "ZA"]
+        assert member_codes(locations[1]) == ["P1", "ZA"]
+        assert member_codes(locations[2]) == []
+
+    def test_bulk_created_locations(self, boundaries, category):
+        Location.objects.bulk_create([Location(category=category, name="Bulk", coordinates=Point(5, 5))])
+        location = Location.objects.get(name="Bulk")
+        assert member_codes(location) == []
+
+        update_location_memberships(Location.objects.filter(category=category))
+        assert member_codes(location) == ["P0", "ZA"]
+
+    def test_moved_boundary(self, locations, boundaries):
+        GeographyBoundary.objects.filter(pk=boundaries[1].pk).update(geom=square(20, 20, 20))
+        update_boundary_memberships(GeographyBoundary.objects.filter(pk=boundaries[1].pk))
+
+        assert member_codes(locations[0]) == ["ZA"]
+        assert member_codes(locations[2]) == ["P0"]
+
+    def test_get_locations(self, locations, category):
+        profile = ProfileFactory(geography_hierarchy__root_geography=Geography.objects.get(code="ZA"))
+        queryset = get_locations(Location.objects.all(), profile, category, "P1")
+
+        assert list(queryset) == [locations[1]]
+
+    def test_point_counts(self, locations, category, provinces):
+        profile_category = ProfileCategoryFactory(category=category)
+        themes = boundary_point_count_helper(profile_category.profile, provinces[0])
+
+        assert themes[0]["subthemes"][0]["count"] == 1
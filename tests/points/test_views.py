@@ -220,3 +220,76 @@ class TestLocationView(APITestCase):
         self.assert_http_200_ok()
         assert data["type"] == "FeatureCollection"
         assert data["features"] == []
+
+
+class TestLocationPagination(APITestCase):
+
+    def setUp(self):
+        self.profile = ProfileFactory()
+        self.category = CategoryFactory(profile=self.profile)
+        self.profile_category = ProfileCategoryFactory(profile=self.profile, category=self.category)
+        self.locations = [
+            LocationFactory(category=self.category, coordinates=Point(idx, idx))
+            for idx in range(5)
+        ]
+
+    def get_points(self, **params):
+        return self.get(
+            "category-points", profile_id=self.profile.id,
+            profile_category_id=self.profile_category.id, data=params
+        )
+
+    def test_unpaginated_by_default(self):
+        response = self.get_points()
+
+        self.assert_http_200_ok()
+        assert len(response.data["features"]) == 5
+        assert "next" not in response.data
+
+    def test_cursor_pages(self):
+        response = self.get_points(page_size=2)
+        ids = [f["id"] for f in response.data["features"]]
+        pages = 1
+
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            ids.extend(f["id"] for f in response.data["features"])
+            pages += 1
+
+        assert pages == 3
+        assert ids == [location.id for location in self.locations]
+
+    def test_default_page_size(self):
+        with self.settings(LOCATIONS_PAGE_SIZE=3):
+            response = self.get_points()
+
+        assert response.data["type"] == "FeatureCollection"
+        assert len(response.data["features"]) == 3
+        assert response.data["next"] is not None
+
+    def test_bbox(self):
+        response = self.get_points(bbox="0.5,0.5,3.5,3.5")
+
+        self.assert_http_200_ok()
+        assert [f["id"] for f in response.data["features"]] == [l.id for l in self.locations[1:4]]
+
+    def test_invalid_bbox(self):
+        self.get_points(bbox="1,2,3")
+        self.assert_http_400_bad_request()
+
+    def test_geography_code_param(self):
+        geography = GeographyFactory(version=self.profile.geography_hierarchy.root_geography.version)
+        GeographyBoundaryFactory(geography=geography, geom=MultiPolygon([
+            Polygon(((1.5, 1.5), (1.5, 10.0), (10.0, 10.0), (10.0, 1.5), (1.5, 1.5)))
+        ]))
+
+        response = self.get_points(geography_code=geography.code)
+
+        assert [f["id"] for f in response.data["features"]] == [l.id for l in self.locations[2:]]
+
+    def test_light(self):
+        response = self.get_points(light="true")
+
+        feature = response.data["features"][0]
+        assert set(feature["properties"]) == {"name"}
+        assert feature["geometry"]["type"] == "Point"
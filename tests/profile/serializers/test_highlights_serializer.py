@@ -0,0 +1,67 @@
+import pytest
+
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.profile.serializers import HighlightsSerializer, IndicatorDataLookup
+
+from tests.datasets.factories import IndicatorFactory, IndicatorDataFactory
+from tests.profile.factories import ProfileFactory, ProfileHighlightFactory
+
+
+@pytest.fixture
+def geographies():
+    return [
+        Geography.add_root(name=f"Geography {idx}", code=f"GEO{idx}", level="province", version="test")
+        for idx in range(3)
+    ]
+
+@pytest.fixture
+def profile():
+    return ProfileFactory()
+
+@pytest.fixture
+def highlights(profile, geographies):
+    highlights = []
+    for idx, denominator in enumerate(["absolute_value", "subindicators", "sibling"]):
+        indicator = IndicatorFactory(subindicators=["male", "female"])
+        for geography, count in zip(geographies, [10, 20, 70]):
+            IndicatorDataFactory(
+                indicator=indicator, geography=geography,
+                data={"subindicators": {"male": count, "female": count * 3}, "groups": {}}
+            )
+        highlights.append(ProfileHighlightFactory(
+            profile=profile, indicator=indicator, subindicator=1, denominator=denominator,
+            label=f"Highlight {idx}", order=idx
+        ))
+    return highlights
+
+
+@pytest.mark.django_db
+class TestHighlightsSerializer:
+    def test_values(self, profile, geographies, highlights):
+        assert HighlightsSerializer(profile, geographies[1]) == [
+            {"label": "Highlight 0", "value": 60, "method": "absolute_value"},
+            {"label": "Highlight 1", "value": 0.75, "method": "subindicators"},
+            {"label": "Highlight 2", "value": 0.2, "method": "sibling"},
+        ]
+
+    def test_siblings_in_other_versions_are_ignored(self, profile, geographies, highlights):
+        other = Geography.add_root(name="Other", code="GEO0", level="province", version="other")
+        IndicatorDataFactory(
+            indicator=highlights[2].indicator, geography=other,
+            data={"subindicators": {"male": 1000, "female": 1000}, "groups": {}}
+        )
+
+        values = HighlightsSerializer(profile, geographies[1])
+        assert values[2]["value"] == 0.2
+
+    def test_num_queries(self, profile, geographies, highlights, django_assert_num_queries):
+        # One query for the highlights, one for the sibling rollups and one for the IndicatorData
+        with django_assert_num_queries(3):
+            HighlightsSerializer(profile, geographies[0])
+
+    def test_shared_lookup(self, profile, geographies, highlights, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            lookup = IndicatorDataLookup(profile, geographies[0])
+
+        with django_assert_num_queries(1):
+            HighlightsSerializer(profile, geographies[0], lookup)
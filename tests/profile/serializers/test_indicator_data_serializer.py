@@ -1,9 +1,20 @@
+import copy
+import json
+from types import SimpleNamespace
+
 import pytest
 
 from tests.profile.factories import ProfileFactory, ProfileIndicatorFactory
 from tests.datasets.factories import GeographyFactory, IndicatorDataFactory, MetaDataFactory
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.datasets.tasks.indicator_data_extraction import rollup_extraction
 
-from wazimap_ng.profile.serializers.indicator_data_serializer import get_indicator_data
+from wazimap_ng.profile.serializers.indicator_data_serializer import (
+    get_indicator_data, get_children_indicator_data, build_indicator_tree
+)
+from wazimap_ng.profile.management.commands.benchmark_profile_builder import (
+    merge_indicator_tree, generate_profile
+)
 
 @pytest.fixture
 def profile():
@@ -86,3 +97,101 @@ def test_get_indicator_data(geography, profile_indicators):
     results = get_indicator_data(profile, [geography])
     assert len(results) == 2
 
+
+
+@pytest.fixture
+def parent_geography(profile_indicators):
+    parent = Geography.add_root(name="Parent", code="PARENT", level="country", version="test")
+    for idx in range(3):
+        child = parent.add_child(name=f"Child {idx}", code=f"CHILD{idx}", level="province", version="test")
+        for pi in profile_indicators:
+            IndicatorDataFactory(
+                geography=child, indicator=pi.indicator,
+                data={"groups": {}, "subindicators": {"male": idx}}
+            )
+    return Geography.objects.get(pk=parent.pk)
+
+def sort_rows(rows):
+    return sorted(rows, key=lambda row: (row["profile_indicator_label"], row["jsdata"]["subindicators"]["male"]))
+
+@pytest.mark.django_db
+def test_get_children_indicator_data_from_rollups(profile_indicators, parent_geography, django_assert_num_queries):
+    profile = profile_indicators[0].profile
+    expected = sort_rows(get_indicator_data(profile, parent_geography.get_children()))
+
+    for pi in profile_indicators:
+        rollup_extraction(pi.indicator)
+
+    with django_assert_num_queries(2):
+        rows = get_children_indicator_data(profile, parent_geography)
+
+    assert len(rows) == 6
+    assert sort_rows(rows) == expected
+
+@pytest.mark.django_db
+def test_get_children_indicator_data_without_rollups(profile_indicators, parent_geography):
+    profile = profile_indicators[0].profile
+    pi1, pi2 = profile_indicators
+    rollup_extraction(pi1.indicator)
+
+    rows = get_children_indicator_data(profile, parent_geography)
+    assert sort_rows(rows) == sort_rows(get_indicator_data(profile, parent_geography.get_children()))
+
+
+def make_row(category, subcategory, label, groups, subindicators, description="Description", code="PARENT"):
+    return {
+        "jsdata": {"groups": groups, "subindicators": subindicators},
+        "geography_code": code,
+        "description": description,
+        "choropleth_method": "subindicator",
+        "metadata_source": "Source",
+        "metadata_description": "Metadata description",
+        "metadata_url": None,
+        "licence_name": None,
+        "licence_url": None,
+        "indicator_chart_configuration": {"types": ["bar"]},
+        "category": category,
+        "subcategory": subcategory,
+        "profile_indicator_label": label,
+    }
+
+def make_groups():
+    return {"age": {"15": {"male": {"count": 1}, "female": {"count": 2}}}}
+
+def assert_same_tree(subcategories, indicator_data, children_indicator_data):
+    # Both builders modify the rows they are given
+    expected = merge_indicator_tree(*copy.deepcopy((subcategories, indicator_data, children_indicator_data)))
+    output = build_indicator_tree(*copy.deepcopy((subcategories, indicator_data, children_indicator_data)))
+    assert json.dumps(output) == json.dumps(expected)
+
+def test_build_indicator_tree_matches_merged_tree():
+    category = SimpleNamespace(name="Demographics", description="People")
+    subcategories = [
+        SimpleNamespace(name="Population", description="Counts", category=category),
+        SimpleNamespace(name="Empty", description="No indicators", category=category),
+    ]
+    indicator_data = [
+        make_row("Demographics", "Population", "Gender", make_groups(), {"male": 3, "female": 4}),
+        make_row("Demographics", "Population", "Empty", {}, {}),
+        make_row("Other", "Uncategorised", "Gender", make_groups(), {"male": 5}),
+    ]
+    children_indicator_data = [
+        make_row("Demographics", "Population", "Gender", make_groups(), {"male": 1, "female": 2}, "Child", "CHILD1"),
+        make_row(
+            "Demographics", "Population", "Gender", {"age": {"16": {None: {"count": 7}}}}, {"other": 9}, "Child", "CHILD2"
+        ),
+        make_row("Demographics", "Children only", "Race", {}, {}, code="CHILD1"),
+        make_row("Demographics", "Children only", "Language", make_groups(), {"zulu": 1}, code="CHILD1"),
+    ]
+
+    assert_same_tree(subcategories, indicator_data, children_indicator_data)
+
+    tree = build_indicator_tree(*copy.deepcopy((subcategories, indicator_data, children_indicator_data)))
+    gender = tree["Demographics"]["subcategories"]["Population"]["indicators"]["Gender"]
+    assert gender["groups"]["age"]["15"]["male"]["children"] == {"CHILD1": 1}
+    assert gender["groups"]["age"]["16"][None]["children"] == {"CHILD2": 7}
+    assert gender["subindicators"]["male"] == {"count": 3, "children": {"CHILD1": 1}}
+    assert gender["subindicators"]["other"] == {"children": {"CHILD2": 9}}
+
+def test_build_indicator_tree_matches_merged_tree_for_generated_profile():
+    assert_same_tree(*generate_profile(indicators=60, children=3, groups=2, subindicators=3))
@@ -0,0 +1,100 @@
+import pytest
+
+from wazimap_ng.datasets.models import Geography, IndicatorDataRollup
+from wazimap_ng.profile.serializers import MetricsSerializer, IndicatorDataLookup
+
+from tests.datasets.factories import IndicatorFactory, IndicatorDataFactory
+from tests.profile.factories import ProfileFactory, ProfileKeyMetricsFactory
+
+
+@pytest.fixture
+def geographies():
+    return [
+        Geography.add_root(name=f"Geography {idx}", code=f"GEO{idx}", level="province", version="test")
+        for idx in range(3)
+    ]
+
+@pytest.fixture
+def profile():
+    return ProfileFactory()
+
+@pytest.fixture
+def indicators(geographies):
+    indicators = []
+    for idx in range(4):
+        indicator = IndicatorFactory(subindicators=["male", "female"])
+        for geography, count in zip(geographies, [10, 20, 70]):
+            IndicatorDataFactory(
+                indicator=indicator, geography=geography,
+                data={"subindicators": {"male": count, "female": count * 3}, "groups": {}}
+            )
+        indicators.append(indicator)
+    return indicators
+
+@pytest.fixture
+def key_metrics(profile, indicators):
+    denominators = ["absolute_value", "subindicators", "sibling", "sibling"]
+    return [
+        ProfileKeyMetricsFactory(
+            profile=profile, variable=indicator, subindicator=0, denominator=denominator,
+            label=f"Metric {idx}", order=idx
+        )
+        for idx, (indicator, denominator) in enumerate(zip(indicators, denominators))
+    ]
+
+
+def get_values(metrics_js):
+    values = []
+    for category in metrics_js.values():
+        for subcategory in category["subcategories"].values():
+            values.extend((m["label"], m["value"], m["method"]) for m in subcategory["key_metrics"])
+    return sorted(values)
+
+
+@pytest.mark.django_db
+class TestMetricsSerializer:
+    def test_values(self, profile, geographies, key_metrics):
+        values = get_values(MetricsSerializer(profile, geographies[0]))
+
+        assert values == [
+            ("Metric 0", 10, "absolute_value"),
+            ("Metric 1", 0.25, "subindicators"),
+            ("Metric 2", 0.1, "sibling"),
+            ("Metric 3", 0.1, "sibling"),
+        ]
+
+    def test_missing_data(self, profile, key_metrics):
+        geography = Geography.add_root(name="Empty", code="EMPTY", level="province", version="other")
+
+        assert MetricsSerializer(profile, geography) == {}
+
+    def test_num_queries(self, profile, geographies, key_metrics, django_assert_num_queries):
+        # One query for the key metrics, one for the sibling rollups and one for the IndicatorData
+        with django_assert_num_queries(3):
+            MetricsSerializer(profile, geographies[0])
+
+    def test_num_queries_does_not_grow_with_metrics(self, profile, geographies, key_metrics, django_assert_num_queries):
+        for idx in range(10):
+            ProfileKeyMetricsFactory(
+                profile=profile, variable=IndicatorFactory(subindicators=["male"]),
+                subindicator=0, denominator="sibling", order=10 + idx
+            )
+
+        with django_assert_num_queries(3):
+            MetricsSerializer(profile, geographies[0])
+
+    def test_shared_lookup(self, profile, geographies, key_metrics, django_assert_num_queries):
+        lookup = IndicatorDataLookup(profile, geographies[0])
+
+        with django_assert_num_queries(1):
+            MetricsSerializer(profile, geographies[0], lookup)
+
+    def test_sibling_rollup(self, profile, geographies, indicators, key_metrics):
+        IndicatorDataRollup.objects.create(
+            indicator=indicators[2], parent_path="", version="test", subindicators={"male": 40, "female": 120}
+        )
+
+        values = get_values(MetricsSerializer(profile, geographies[0]))
+
+        assert values[2] == ("Metric 2", 0.25, "sibling")
+        assert values[3] == ("Metric 3", 0.1, "sibling")
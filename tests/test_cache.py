@@ -15,8 +15,10 @@ from tests.datasets.factories import (
     IndicatorFactory, GeographyFactory, DatasetDataFactory, GroupFactory,
     GeographyHierarchyFactory, IndicatorDataFactory
 )
+from tests.boundaries.factories import GeographyBoundaryFactory
 
 from wazimap_ng import cache
+from wazimap_ng.general.models import ProfileVersion
 
 
 @patch("django.http.request")
@@ -70,7 +72,7 @@ def test_last_modified_profile_updated(mock_last_modified, mock_request):
 
     assert cache.last_modified_profile_updated(mock_request, 1, "ZA") == 9999
 
-    mock_last_modified.assert_called_with(mock_request, 1, "etag-Profile-1")
+    assert mock_last_modified.call_args[0] == (mock_request, 1, "etag-Profile-1")
 
 
 @patch("django.http.request")
@@ -97,18 +99,42 @@ def test_last_modified_point_updated(mock_last_modified, mock_request):
     assert cache.last_modified_point_updated(mock_request, profile_id) is None
 
 
-@patch("wazimap_ng.cache.datetime")
-def test_update_profile_cache_signal(mock_datetime):
-    profile = namedtuple("profile", "id")
-    profile.id = 1
-
-    mock_datetime.now.return_value = "Some time"
+@pytest.mark.django_db
+def test_update_profile_cache_signal():
+    profile = ProfileFactory()
 
     cache.update_profile_cache(profile)
 
     key = "etag-Profile-%s" % profile.id
+    assert django_cache.get(key) == ProfileVersion.objects.get(profile=profile).version
 
-    assert django_cache.get(key) == "Some time"
+
+@pytest.mark.django_db
+class TestProfileVersion:
+    def test_unversioned_profile(self):
+        profile = ProfileFactory()
+        django_cache.delete("etag-Profile-%s" % profile.id)
+
+        assert cache.get_profile_version(profile.id) is None
+
+    def test_version_survives_cache_eviction(self):
+        profile = ProfileFactory()
+        cache.update_profile_cache(profile)
+        version = cache.get_profile_version(profile.id)
+
+        django_cache.delete("etag-Profile-%s" % profile.id)
+
+        assert cache.get_profile_version(profile.id) == version
+
+    def test_ensure_profile_version_is_shared(self):
+        profile = ProfileFactory()
+        version = cache.ensure_profile_version(profile.id)
+
+        # Another worker with an empty cache gets the same version
+        django_cache.delete("etag-Profile-%s" % profile.id)
+
+        assert cache.ensure_profile_version(profile.id) == version
+        assert ProfileVersion.objects.filter(profile=profile).count() == 1
 
 
 @patch("wazimap_ng.cache.datetime")
@@ -133,6 +159,59 @@ def test_update_point_cache_signal(mock_datetime):
     assert django_cache.get(key) == "Some time"
 
 
+def test_cache_decorator_tag_invalidation():
+    calls = []
+
+    @cache.cache_decorator("test_tagged", tags=lambda code, version: ["test-tag-%s" % version])
+    def helper(code, version):
+        calls.append(code)
+        return len(calls)
+
+    assert helper("ZA", "v1") == 1
+    assert helper("ZA", "v1") == 1
+
+    cache.invalidate_tag("test-tag-v2")
+    assert helper("ZA", "v1") == 1
+
+    cache.invalidate_tag("test-tag-v1")
+    assert helper("ZA", "v1") == 2
+    assert calls == ["ZA", "ZA"]
+
+
+def test_invalidate_missing_tag():
+    django_cache.delete("tag-test-missing")
+    cache.invalidate_tag("test-missing")
+
+    assert django_cache.get("tag-test-missing") is not None
+
+
+def test_cache_stats(settings):
+    settings.CACHE_STATS_SAMPLE_RATE = 1
+    django_cache.delete_many(["stats-etag-Profile-hits", "stats-etag-Profile-misses"])
+
+    cache.record_lookup("etag-Profile", True)
+    cache.record_lookup("etag-Profile", True)
+    cache.record_lookup("etag-Profile", True)
+    cache.record_lookup("etag-Profile", False)
+
+    stats = cache.get_cache_stats()["etag-Profile"]
+    assert stats == {"hits": 3, "misses": 1, "hit_ratio": 0.75}
+
+
+def test_cache_stats_disabled(settings):
+    settings.CACHE_STATS_SAMPLE_RATE = 0
+    django_cache.delete_many(["stats-etag-Profile-hits", "stats-etag-Profile-misses"])
+
+    cache.record_lookup("etag-Profile", True)
+
+    assert cache.get_cache_stats()["etag-Profile"]["hits"] == 0
+
+
+def test_key_prefix():
+    assert cache.key_prefix("etag-Profile-1") == "etag-Profile"
+    assert cache.key_prefix("etag-Location-profile-1-2") == "etag-Location-profile"
+
+
 @pytest.mark.django_db
 class TestCache(unittest.TestCase):
     @patch('wazimap_ng.cache.update_profile_cache', autospec=True)
@@ -238,3 +317,46 @@ class TestCache(unittest.TestCase):
             call(profile2),
         ]
         mock_update_profile_cache.assert_has_calls(calls, any_order=True)
+
+
+@pytest.mark.django_db
+@patch("wazimap_ng.cache.async_task")
+@patch("wazimap_ng.cache.transaction.on_commit", side_effect=lambda func: func())
+class TestDeferGeographyUpdates:
+    def test_saves_queue_a_task_each(self, mock_on_commit, mock_async_task):
+        geography = GeographyFactory()
+        GeographyBoundaryFactory(geography=geography)
+
+        tasks = [c[0][0] for c in mock_async_task.call_args_list]
+        assert tasks == [
+            "wazimap_ng.boundaries.tasks.encode_geography_boundaries",
+            "wazimap_ng.boundaries.tasks.process_boundary",
+        ]
+
+    def test_deferred_saves_queue_one_task_per_version(self, mock_on_commit, mock_async_task):
+        with cache.defer_geography_updates():
+            for _ in range(3):
+                geography = GeographyFactory(version="2016")
+                GeographyBoundaryFactory(geography=geography)
+            GeographyBoundaryFactory(geography=GeographyFactory(version="2011"))
+
+            with cache.defer_geography_updates():
+                GeographyFactory(version="2016")
+
+            assert mock_async_task.call_count == 0
+
+        versions = sorted(c[0][1] for c in mock_async_task.call_args_list)
+        assert versions == ["2011", "2016"]
+        assert {c[0][0] for c in mock_async_task.call_args_list} == {
+            "wazimap_ng.boundaries.tasks.process_geography_version"
+        }
+
+    def test_nothing_is_queued_when_the_block_fails(self, mock_on_commit, mock_async_task):
+        with pytest.raises(ValueError):
+            with cache.defer_geography_updates():
+                GeographyFactory(version="2016")
+                raise ValueError
+
+        assert mock_async_task.call_count == 0
+        GeographyFactory(version="2016")
+        assert mock_async_task.call_count == 1
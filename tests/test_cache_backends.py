@@ -0,0 +1,50 @@
+import pytest
+
+from wazimap_ng.cache_backends import RedisCache
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_cache():
+    backend = RedisCache("redis://localhost:6379/0", {
+        "KEY_PREFIX": "test",
+        "OPTIONS": {"CLIENT_CLASS": "fakeredis.FakeRedis"},
+    })
+    yield backend
+    backend.clear()
+
+
+def test_set_get(redis_cache):
+    redis_cache.set("key", {"a": [1, 2]})
+    assert redis_cache.get("key") == {"a": [1, 2]}
+    assert redis_cache.get("missing", "default") == "default"
+
+
+def test_add(redis_cache):
+    assert redis_cache.add("key", "first")
+    assert not redis_cache.add("key", "second")
+    assert redis_cache.get("key") == "first"
+
+
+def test_incr(redis_cache):
+    with pytest.raises(ValueError):
+        redis_cache.incr("counter")
+
+    redis_cache.add("counter", 1, None)
+    assert redis_cache.incr("counter") == 2
+    assert redis_cache.incr("counter", 5) == 7
+    assert redis_cache.get("counter") == 7
+
+
+def test_get_many_delete_many(redis_cache):
+    redis_cache.set_many({"a": 1, "b": "two"})
+    assert redis_cache.get_many(["a", "b", "c"]) == {"a": 1, "b": "two"}
+
+    redis_cache.delete_many(["a", "b"])
+    assert redis_cache.get_many(["a", "b"]) == {}
+
+
+def test_expired_timeout(redis_cache):
+    redis_cache.set("key", "value", 0)
+    assert not redis_cache.has_key("key")
@@ -0,0 +1,126 @@
+import datetime
+import decimal
+import json
+from collections import OrderedDict
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+from rest_framework.decorators import api_view
+
+from wazimap_ng import streaming
+from wazimap_ng.streaming import JSONFragment, StreamingJSONResponse, iter_json, iter_chunks, json_response, render
+
+
+@pytest.fixture
+def data():
+    return OrderedDict([
+        ("profile_data", {
+            "Category": {
+                "subcategories": {
+                    "Subcategory": {"indicators": {"Indicator": {"subindicators": {"M": {"children": {None: 1.5}}}}}}
+                }
+            }
+        }),
+        ("numbers", [1, 2.25, decimal.Decimal("3.5"), None, True]),
+        ("text", "Ünïcode \"quoted\""),
+        ("updated", datetime.datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc)),
+        ("empty", {}),
+        ("keys", {1: "int", None: "none", False: "bool"}),
+    ])
+
+
+def test_iter_json_matches_json_renderer(data):
+    expected = JSONRenderer().render(data)
+
+    for depth in range(5):
+        assert b"".join(iter_json(data, depth)) == expected
+
+
+def test_iter_json_matches_json_renderer_without_orjson(data, monkeypatch):
+    monkeypatch.setattr(streaming, "orjson", None)
+
+    assert b"".join(iter_json(data)) == JSONRenderer().render(data)
+
+
+def test_iter_json_consumes_generators():
+    features = ({"id": idx} for idx in range(3))
+
+    assert json.loads(b"".join(iter_json({"features": features}))) == {
+        "features": [{"id": 0}, {"id": 1}, {"id": 2}]
+    }
+
+
+def test_fragments_are_written_as_is():
+    feature = '{"type":"Feature","properties":{"name":"Ünïcode"}}'
+    data = {"boundary": JSONFragment(feature), "layers": [JSONFragment(feature)], "count": 1}
+
+    assert render(data) == ('{"boundary":%s,"layers":[%s],"count":1}' % (feature, feature)).encode("utf-8")
+
+
+def test_iter_chunks():
+    chunks = list(iter_chunks([b"a" * 5, b"b" * 5, b"c" * 3], chunk_size=8))
+
+    assert chunks == [b"aaaaabbbbb", b"ccc"]
+
+
+def test_streaming_json_response(data):
+    response = StreamingJSONResponse(data)
+
+    assert response["Content-Type"] == "application/json"
+    assert response.data is data
+    assert b"".join(response.streaming_content) == JSONRenderer().render(data)
+
+
+@api_view()
+def view(request):
+    return json_response(request, {"a": 1})
+
+
+def test_json_response_streams_json(settings):
+    settings.STREAM_JSON_RESPONSES = True
+
+    response = view(APIRequestFactory().get("/", {"format": "json"}))
+
+    assert isinstance(response, StreamingJSONResponse)
+    assert b"".join(response.streaming_content) == b'{"a":1}'
+
+
+def test_json_response_is_not_streamed_when_disabled(settings):
+    settings.STREAM_JSON_RESPONSES = False
+
+    response = view(APIRequestFactory().get("/", {"format": "json"}))
+
+    assert not isinstance(response, StreamingJSONResponse)
+    assert response.data == {"a": 1}
+
+
+@api_view()
+def fragment_view(request):
+    return json_response(request, {"boundary": JSONFragment('{"type":"Feature"}')}, fragments=True)
+
+
+def test_json_response_renders_fragments_when_not_streamed(settings):
+    settings.STREAM_JSON_RESPONSES = False
+
+    response = fragment_view(APIRequestFactory().get("/", {"format": "json"}))
+
+    assert response["Content-Type"] == "application/json"
+    assert response.content == b'{"boundary":{"type":"Feature"}}'
+
+
+@pytest.mark.skipif(streaming.orjson is None, reason="orjson is not installed")
+def test_orjson_output_differs_from_json_renderer():
+    numbers = [1e-7, 1e16, 0.1, 2.5]
+
+    assert json.loads(streaming.dumps(numbers)) == json.loads(JSONRenderer().render(numbers))
+    assert streaming.dumps([float("nan"), float("inf"), float("-inf")]) == b"[null,null,null]"
+    with pytest.raises(ValueError):
+        JSONRenderer().render([float("nan")])
+
+
+def test_non_finite_floats_raise_without_orjson(monkeypatch):
+    monkeypatch.setattr(streaming, "orjson", None)
+
+    with pytest.raises(ValueError):
+        streaming.dumps([float("nan")])
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.boundaries.services.geojson import update_geojson
+from wazimap_ng.cache import geography_tag, invalidate_tag
+
+
+class Command(BaseCommand):
+    help = """Stores the encoded GeoJSON feature of every boundary. Features are encoded whenever a boundary
+or its geography is saved, this is needed for boundaries loaded before that and after bulk updates.
+Example: python3 manage.py encode_boundaries --version 'SA Boundaries 2016' --missing"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--version", type=str, default=None, help="Only encode boundaries of this geography version.")
+        parser.add_argument("--missing", action="store_true", help="Only encode boundaries without a stored feature.")
+
+    def handle(self, *args, **options):
+        boundaries = GeographyBoundary.objects.order_by("id")
+        if options["version"] is not None:
+            boundaries = boundaries.filter(geography__version=options["version"])
+        if options["missing"]:
+            boundaries = boundaries.filter(geojson__isnull=True)
+
+        versions = set(boundaries.order_by().values_list("geography__version", flat=True).distinct())
+        count = update_geojson(boundaries)
+        for version in versions:
+            invalidate_tag(geography_tag % version)
+
+        self.stdout.write(f"Encoded {count} boundaries")
@@ -7,6 +7,7 @@ from django.contrib.gis.geos import GEOSGeometry, MultiPolygon, Polygon
 
 from wazimap_ng.datasets.models import Geography
 from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.cache import defer_geography_updates
 
 import fiona
 from shapely.geometry import shape as shapely_shape
@@ -108,8 +109,10 @@ class Command(BaseCommand):
         self.check_field_map(field_map)
 
         shape = fiona.open(shapefile)
-        for idx, s in enumerate(shape):
-            self.process_shape(s, field_map, level, version)
+        # Simplification, location memberships and features are updated by one task for the version
+        with defer_geography_updates():
+            for idx, s in enumerate(shape):
+                self.process_shape(s, field_map, level, version)
 
         print(f"{idx + 1} geographies successfully loaded")
 
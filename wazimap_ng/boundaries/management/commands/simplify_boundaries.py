@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from wazimap_ng.boundaries.models import GeographyBoundary, RESOLUTIONS
+from wazimap_ng.boundaries.services.simplification import update_resolutions
+from wazimap_ng.cache import geography_tag, invalidate_tag
+
+
+class Command(BaseCommand):
+    help = f"""Computes the simplified geometries served at each boundary resolution ({", ".join(RESOLUTIONS)}).
+Geometries are simplified whenever a boundary is saved, this is needed for boundaries loaded before that,
+after bulk updates and when the simplification settings change.
+Example: python3 manage.py simplify_boundaries --version 'SA Boundaries 2016' --batch-size 500"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--version", type=str, default=None, help="Only simplify boundaries of this geography version.")
+        parser.add_argument("--batch-size", type=int, default=500, help="Boundaries simplified per UPDATE.")
+
+    def handle(self, *args, **options):
+        boundaries = GeographyBoundary.objects.order_by("id")
+        if options["version"] is not None:
+            boundaries = boundaries.filter(geography__version=options["version"])
+
+        ids = list(boundaries.values_list("id", flat=True))
+        versions = set(boundaries.order_by().values_list("geography__version", flat=True).distinct())
+
+        batch_size = options["batch_size"]
+        count = 0
+        for idx in range(0, len(ids), batch_size):
+            count += update_resolutions(GeographyBoundary.objects.filter(id__in=ids[idx:idx + batch_size]))
+            self.stdout.write(f"Simplified {count} of {len(ids)} boundaries")
+
+        for version in versions:
+            invalidate_tag(geography_tag % version)
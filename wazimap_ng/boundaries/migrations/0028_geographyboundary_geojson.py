@@ -0,0 +1,18 @@
+# Generated by Django 2.2.13 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundaries', '0027_auto_20200624_0311'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geographyboundary',
+            name='geojson',
+            field=models.TextField(blank=True, editable=False, null=True),
+        ),
+    ]
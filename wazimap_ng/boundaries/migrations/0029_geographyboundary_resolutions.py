@@ -0,0 +1,24 @@
+# Generated by Django 2.2.13 on 2026-10-18 15:02
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundaries', '0028_geographyboundary_geojson'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='geographyboundary',
+            name='geom_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, editable=False, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='geographyboundary',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, editable=False, null=True, srid=4326),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.13 on 2026-10-18 16:20
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+import wazimap_ng.boundaries.fields
+
+
+def spatial_index_sql(column):
+    # Django doesn't drop or create spatial indexes when spatial_index changes
+    index = f"boundaries_geographyboundary_{column}_id"
+    return migrations.RunSQL(
+        f"DROP INDEX IF EXISTS {index}",
+        f"CREATE INDEX IF NOT EXISTS {index} ON boundaries_geographyboundary USING GIST ({column})",
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boundaries', '0029_geographyboundary_resolutions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='geographyboundary',
+            name='geom',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='geographyboundary',
+            name='geom_cache',
+            field=wazimap_ng.boundaries.fields.CachedMultiPolygonField(blank=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='geographyboundary',
+            name='geom_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, editable=False, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AlterField(
+            model_name='geographyboundary',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, editable=False, null=True, spatial_index=False, srid=4326),
+        ),
+        spatial_index_sql("geom"),
+        spatial_index_sql("geom_cache"),
+        spatial_index_sql("geom_high"),
+        spatial_index_sql("geom_low"),
+        migrations.AddIndex(
+            model_name='geographyboundary',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['geom'], name='idx_boundaries_geom'),
+        ),
+    ]
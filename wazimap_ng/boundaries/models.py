@@ -1,12 +1,22 @@
 from django.db import models
 
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GistIndex
 from ..datasets.models import Geography
 from .fields import CachedMultiPolygonField
 from ..points.models import Location
 from django_q.tasks import async_task
 from wazimap_ng.general.models import BaseModel
 
+# Simplified geometries served at each resolution: (field, simplification tolerance, precision).
+# medium is the geom_cache computed on save, low and high are computed by simplify_boundaries.
+RESOLUTIONS = {
+    "low": ("geom_low", 0.01, 3),
+    "medium": ("geom_cache", 0.002, 4),
+    "high": ("geom_high", 0.0002, 5),
+}
+DEFAULT_RESOLUTION = "medium"
+
 class GeographyBoundaryManager(models.Manager):
     # Deal with a situation where there are multiple geographies with the same code
     # TODO perhaps define a key to include level
@@ -19,7 +29,18 @@ class GeographyBoundary(BaseModel):
     geography = models.OneToOneField(Geography, on_delete=models.PROTECT, null=False)
 
     area = models.FloatField()
-    geom = models.MultiPolygonField(srid=4326, null=True)
-    geom_cache = CachedMultiPolygonField(field_name="geom")
+    # Spatial predicates only run against geom, which is indexed explicitly in Meta. The
+    # simplified geometries are only served and don't need spatial indexes.
+    geom = models.MultiPolygonField(srid=4326, null=True, spatial_index=False)
+    geom_cache = CachedMultiPolygonField(field_name="geom", spatial_index=False)
+    geom_low = models.MultiPolygonField(srid=4326, null=True, blank=True, editable=False, spatial_index=False)
+    geom_high = models.MultiPolygonField(srid=4326, null=True, blank=True, editable=False, spatial_index=False)
+    # GeoJSON feature of geom_cache, encoded whenever the boundary or its geography is saved
+    geojson = models.TextField(null=True, blank=True, editable=False)
     objects = GeographyBoundaryManager()
+
+    class Meta:
+        indexes = [
+            GistIndex(fields=["geom"], name="idx_boundaries_geom"),
+        ]
   
@@ -11,18 +11,19 @@ from django.db.models import Count
 
 
 class GeographySerializer(GeoFeatureModelSerializer):
-    geom = GeometrySerializerMethodField()
+    geom_cache = GeometrySerializerMethodField()
     parent = serializers.SerializerMethodField()
 
-    # TODO might want simplification to come from settings.py
-    def __init__(self, *args, simplification=0.005, parentCode=None, **kwargs):
+    def __init__(self, *args, resolution=models.DEFAULT_RESOLUTION, parentCode=None, **kwargs):
         super(GeographySerializer, self).__init__(*args, **kwargs)
-        self.simplification = simplification
+        self.resolution = resolution
         self.parentCode = parentCode
 
 
-    def get_geom(self, obj):
-        return obj.geom_cache
+    def get_geom_cache(self, obj):
+        field, _, _ = models.RESOLUTIONS[self.resolution]
+        # Fall back to geom_cache for boundaries that have not been simplified yet
+        return getattr(obj, field) or obj.geom_cache
 
     def get_parent(self, obj):
         if self.parentCode is not None:
@@ -45,9 +46,6 @@ class GeographyBoundarySerializer(GeographySerializer):
     version = serializers.SerializerMethodField()
     #themes = serializers.SerializerMethodField()
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, simplification=0.005, **kwargs)
-
     def get_level(self, obj):
         return obj.geography.level
 
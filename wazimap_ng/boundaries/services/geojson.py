@@ -0,0 +1,60 @@
+import logging
+
+from wazimap_ng.streaming import dumps
+
+from .. import models
+from ..serializers import GeographyBoundarySerializer
+
+logger = logging.getLogger(__name__)
+
+
+def encode_boundary(boundary, resolution=models.DEFAULT_RESOLUTION, parent_code=None):
+    """
+    Returns the GeoJSON feature of a boundary as it is served by the boundary endpoints.
+    """
+    serializer = GeographyBoundarySerializer(boundary, resolution=resolution, parentCode=parent_code)
+    return dumps(serializer.data).decode("utf-8")
+
+
+def update_geojson(boundaries):
+    """
+    Stores the encoded feature of every boundary in the queryset. Boundaries that can't be
+    encoded are logged and left to be encoded on request. Returns the number of boundaries
+    updated.
+    """
+    count = 0
+    for boundary in boundaries.select_related("geography").iterator():
+        try:
+            feature = encode_boundary(boundary)
+        except Exception:
+            logger.exception(f"Could not encode the boundary of {boundary.geography}")
+            continue
+
+        models.GeographyBoundary.objects.filter(pk=boundary.pk).update(geojson=feature)
+        count += 1
+    return count
+
+
+def get_geojson(boundary, resolution=models.DEFAULT_RESOLUTION, parent_code=None):
+    """
+    Returns the feature of a boundary at the given resolution. Features at the default
+    resolution are stored, others and those that have not been stored yet are encoded.
+    """
+    if resolution == models.DEFAULT_RESOLUTION and boundary.geojson is not None:
+        return boundary.geojson
+    return encode_boundary(boundary, resolution, parent_code)
+
+
+def get_deferred_fields(resolution=models.DEFAULT_RESOLUTION):
+    """
+    Returns the geometry fields that are not needed to get the features at this resolution.
+    """
+    fields = {"geom", *(field for field, _, _ in models.RESOLUTIONS.values())}
+    if resolution != models.DEFAULT_RESOLUTION:
+        # geom_cache is the fallback for boundaries without simplified geometries
+        fields -= {models.RESOLUTIONS[resolution][0], "geom_cache"}
+    return fields
+
+
+def feature_collection(features):
+    return '{"type":"FeatureCollection","features":[' + ",".join(features) + ']}'
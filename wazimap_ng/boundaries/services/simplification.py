@@ -0,0 +1,46 @@
+from django.db import connection
+
+from .. import models
+
+SIMPLIFY_SQL = "ST_Multi(ST_CollectionExtract(ST_MakeValid(ST_SnapToGrid(ST_SimplifyPreserveTopology(geom, %s), %s)), 3))"
+
+
+def get_simplified_fields():
+    # geom_cache is computed by CachedMultiPolygonField when the boundary is saved
+    return [
+        (field, tolerance, precision)
+        for field, tolerance, precision in models.RESOLUTIONS.values()
+        if field != "geom_cache"
+    ]
+
+
+def update_resolutions(boundaries):
+    """
+    Computes the simplified geometries of every boundary in the queryset in a single
+    UPDATE. Geometries that collapse when simplified are stored as NULL and served at
+    the default resolution instead. Returns the number of boundaries updated.
+    """
+    fields = get_simplified_fields()
+    table = connection.ops.quote_name(models.GeographyBoundary._meta.db_table)
+
+    params = []
+    expressions = []
+    for field, tolerance, precision in fields:
+        expressions.append(f"{SIMPLIFY_SQL} AS {field}")
+        params.extend([tolerance, 10 ** -precision])
+
+    assignments = ", ".join(
+        f"{field} = CASE WHEN ST_IsEmpty(s.{field}) THEN NULL ELSE s.{field} END"
+        for field, _, _ in fields
+    )
+    ids_sql, ids_params = boundaries.values("pk").query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {table} AS b SET {assignments}
+            FROM (
+                SELECT id, {", ".join(expressions)} FROM {table} WHERE id IN ({ids_sql})
+            ) s
+            WHERE b.id = s.id
+        """, params + list(ids_params))
+        return cursor.rowcount
@@ -0,0 +1,55 @@
+from django.db import connection
+
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.general.services.tiles import render_tile
+
+from .. import models
+
+BOUNDARY_TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 3857) AS geom
+    ), features AS (
+        SELECT
+            ST_AsMVTGeom(
+                ST_Transform(COALESCE(b.{geom_field}, b.geom_cache, b.geom), 3857), bounds.geom, %(extent)s, %(buffer)s, true
+            ) AS geom,
+            g.code, g.name, g.level, g.version, b.area
+        FROM {boundary_table} b
+        JOIN {geography_table} g ON g.id = b.geography_id
+        CROSS JOIN bounds
+        WHERE g.version = %(version)s
+            AND b.geom && ST_Transform(bounds.geom, 4326)
+            {level_filter}
+    )
+    SELECT ST_AsMVT(features, 'boundaries', %(extent)s, 'geom') FROM features WHERE geom IS NOT NULL
+"""
+
+
+# Resolution served up to each zoom level, higher zoom levels are served at high resolution
+TILE_RESOLUTIONS = [(5, "low"), (9, "medium")]
+
+
+def get_tile_resolution(z):
+    for max_zoom, resolution in TILE_RESOLUTIONS:
+        if z <= max_zoom:
+            return resolution
+    return "high"
+
+
+def get_boundary_tile_sql(z, level=None):
+    geom_field, _, _ = models.RESOLUTIONS[get_tile_resolution(z)]
+    return BOUNDARY_TILE_SQL.format(
+        geom_field=geom_field,
+        boundary_table=connection.ops.quote_name(models.GeographyBoundary._meta.db_table),
+        geography_table=connection.ops.quote_name(Geography._meta.db_table),
+        level_filter="AND g.level = %(level)s" if level else ""
+    )
+
+
+def get_boundary_tile(version, z, x, y, level=None):
+    """
+    Returns a vector tile with a "boundaries" layer holding the boundaries of this
+    version that intersect the tile, optionally only those of one level. Boundaries are
+    simplified to the resolution of the zoom level.
+    """
+    return render_tile(get_boundary_tile_sql(z, level), z, x, y, version=version, level=level)
@@ -0,0 +1,79 @@
+import logging
+
+from django.db.models import Q
+
+from wazimap_ng.cache import invalidate_tag, geography_tag, geography_codes_tag
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.points.services.membership import update_boundary_memberships
+
+from .models import GeographyBoundary
+from .services.geojson import update_geojson
+from .services.simplification import update_resolutions
+
+logger = logging.getLogger(__name__)
+
+
+def process_boundary(boundary_id, **kwargs):
+    """
+    Recompute the simplified geometries, location memberships and stored
+    feature of a saved boundary. Triggered by cache.geography_boundary_updated.
+    """
+    boundaries = GeographyBoundary.objects.filter(pk=boundary_id)
+    boundary = boundaries.select_related("geography").first()
+    if boundary is None:
+        return {"model": "boundary", "id": boundary_id, "deleted": True}
+
+    update_resolutions(boundaries)
+    update_boundary_memberships(boundaries)
+    update_geojson(boundaries)
+    invalidate_tag(geography_tag % boundary.geography.version)
+
+    return {
+        "model": "boundary",
+        "name": boundary.geography.code,
+        "id": boundary_id,
+    }
+
+
+def encode_geography_boundaries(geography_id, **kwargs):
+    """
+    Re-encode the stored features of a geography and its children, which
+    include the geography's name and code. Triggered by cache.geography_updated.
+    """
+    geography = Geography.objects.filter(pk=geography_id).first()
+    if geography is None:
+        return {"model": "geography", "id": geography_id, "deleted": True}
+
+    count = update_geojson(GeographyBoundary.objects.filter(
+        Q(geography=geography) | Q(geography__in=geography.get_children())
+    ))
+    invalidate_tag(geography_tag % geography.version)
+    logger.info(f"Re-encoded {count} boundaries for {geography}")
+
+    return {
+        "model": "geography",
+        "name": geography.code,
+        "id": geography_id,
+        "boundaries": count,
+    }
+
+
+def process_geography_version(version, **kwargs):
+    """
+    Does what process_boundary and encode_geography_boundaries do for every boundary of
+    a geography version at once. Queued by cache.defer_geography_updates after bulk loads.
+    """
+    boundaries = GeographyBoundary.objects.filter(geography__version=version)
+
+    count = update_resolutions(boundaries)
+    update_boundary_memberships(boundaries)
+    update_geojson(boundaries)
+    invalidate_tag(geography_tag % version)
+    invalidate_tag(geography_codes_tag % version)
+    logger.info(f"Processed {count} boundaries for version {version}")
+
+    return {
+        "model": "version",
+        "name": version,
+        "boundaries": count,
+    }
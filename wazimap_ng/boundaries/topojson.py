@@ -0,0 +1,203 @@
+"""
+Converts GeoJSON features into a quantized TopoJSON topology
+(https://github.com/topojson/topojson-specification). Edges that are shared by
+neighbouring boundaries are stored once as arcs which are referenced by every
+geometry that uses them.
+"""
+
+DEFAULT_QUANTIZATION = 100000
+
+
+def iter_polygons(geometry):
+    if geometry is None:
+        return []
+    elif geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+
+def get_bbox(features):
+    xs = []
+    ys = []
+    for feature in features:
+        for polygon in iter_polygons(feature["geometry"]):
+            for ring in polygon:
+                xs.extend(x for x, _ in ring)
+                ys.extend(y for _, y in ring)
+
+    if not xs:
+        return [0, 0, 0, 0]
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+class Quantizer:
+    def __init__(self, bbox, quantization):
+        x0, y0, x1, y1 = bbox
+        self.translate = [x0, y0]
+        self.scale = [
+            (x1 - x0) / (quantization - 1) if x1 > x0 else 1,
+            (y1 - y0) / (quantization - 1) if y1 > y0 else 1,
+        ]
+
+    def __call__(self, point):
+        return (
+            round((point[0] - self.translate[0]) / self.scale[0]),
+            round((point[1] - self.translate[1]) / self.scale[1]),
+        )
+
+
+def quantize_ring(ring, quantize):
+    """
+    Returns the quantized ring without repeated points and without the closing point, or
+    None if the ring collapses.
+    """
+    points = []
+    for point in ring:
+        point = quantize(point)
+        if not points or points[-1] != point:
+            points.append(point)
+
+    if len(points) > 1 and points[0] == points[-1]:
+        points.pop()
+
+    if len(points) < 3:
+        return None
+    return points
+
+
+def find_junctions(rings):
+    """
+    Returns the points where rings meet or part ways, i.e. points that do not have the
+    same two neighbours in every ring that they are part of.
+    """
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        size = len(ring)
+        for idx, point in enumerate(ring):
+            pair = frozenset((ring[idx - 1], ring[(idx + 1) % size]))
+            if neighbours.setdefault(point, pair) != pair:
+                junctions.add(point)
+    return junctions
+
+
+def cut_ring(ring, junctions):
+    """
+    Splits a ring into arcs that start and end at junctions. Rings without junctions are
+    a single closed arc starting at their smallest point so that identical rings match.
+    """
+    starts = [idx for idx, point in enumerate(ring) if point in junctions]
+    start = starts[0] if starts else ring.index(min(ring))
+
+    ring = ring[start:] + ring[:start]
+    ring.append(ring[0])
+    if not starts:
+        return [ring]
+
+    arcs = []
+    last = 0
+    for idx in range(1, len(ring)):
+        if ring[idx] in junctions:
+            arcs.append(ring[last:idx + 1])
+            last = idx
+    return arcs
+
+
+class ArcIndex:
+    def __init__(self):
+        self.arcs = []
+        self.index = {}
+
+    def add(self, points):
+        """
+        Returns the index of the arc, or its ones' complement if the arc is stored in the
+        opposite direction.
+        """
+        key = tuple(points)
+        if key in self.index:
+            return self.index[key]
+
+        reverse = key[::-1]
+        if reverse in self.index:
+            return ~self.index[reverse]
+
+        self.index[key] = len(self.arcs)
+        self.arcs.append(key)
+        return self.index[key]
+
+    def encode(self):
+        # Quantized arcs are delta encoded
+        encoded = []
+        for arc in self.arcs:
+            previous_x, previous_y = arc[0]
+            positions = [[previous_x, previous_y]]
+            for x, y in arc[1:]:
+                positions.append([x - previous_x, y - previous_y])
+                previous_x, previous_y = x, y
+            encoded.append(positions)
+        return encoded
+
+
+def quantize_feature(feature, quantize):
+    polygons = []
+    for polygon in iter_polygons(feature["geometry"]):
+        rings = [quantize_ring(ring, quantize) for ring in polygon]
+        # Drop polygons whose exterior collapsed as well as collapsed holes
+        if rings and rings[0] is not None:
+            polygons.append([ring for ring in rings if ring is not None])
+    return polygons
+
+
+def topology(objects, quantization=DEFAULT_QUANTIZATION):
+    """
+    Builds a topology from a dict of object name to a list of GeoJSON features. Every
+    object becomes a GeometryCollection of MultiPolygons which keep the id and
+    properties of their feature.
+    """
+    features = [feature for object_features in objects.values() for feature in object_features]
+    bbox = get_bbox(features)
+    quantize = Quantizer(bbox, quantization)
+
+    quantized = {
+        name: [(feature, quantize_feature(feature, quantize)) for feature in object_features]
+        for name, object_features in objects.items()
+    }
+    junctions = find_junctions(
+        ring
+        for object_features in quantized.values()
+        for _, polygons in object_features
+        for polygon in polygons
+        for ring in polygon
+    )
+
+    arc_index = ArcIndex()
+    topology_objects = {}
+    for name, object_features in quantized.items():
+        geometries = []
+        for feature, polygons in object_features:
+            geometry = {"type": None}
+            if polygons:
+                geometry = {
+                    "type": "MultiPolygon",
+                    "arcs": [
+                        [[arc_index.add(arc) for arc in cut_ring(ring, junctions)] for ring in polygon]
+                        for polygon in polygons
+                    ]
+                }
+
+            if feature.get("id") is not None:
+                geometry["id"] = feature["id"]
+            geometry["properties"] = feature.get("properties") or {}
+            geometries.append(geometry)
+
+        topology_objects[name] = {"type": "GeometryCollection", "geometries": geometries}
+
+    return {
+        "type": "Topology",
+        "bbox": bbox,
+        "transform": {"scale": quantize.scale, "translate": quantize.translate},
+        "objects": topology_objects,
+        "arcs": arc_index.encode(),
+    }
@@ -1,4 +1,7 @@
-from django.http import Http404
+import json
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
 from django.core.serializers import serialize
 from django.views.decorators.http import condition
@@ -8,12 +11,19 @@ from django.shortcuts import get_object_or_404
 from rest_framework import generics
 from rest_framework.decorators import api_view
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from . import models
 from . import serializers
 from ..datasets.models import Geography
-from ..cache import cache_decorator
+from ..cache import cache_decorator, geography_tags, boundary_tile_tags
+from ..general.services.tiles import is_valid_tile, MVT_CONTENT_TYPE
+from ..streaming import dumps
+from .services import geojson, tiles
+from . import topojson
+
+BOUNDARY_FORMATS = ("geojson", "topojson")
 
 class GeographySwitchMixin(object):
     def _get_classes(self, geo_type):
@@ -31,38 +41,101 @@ class GeographySwitchMixin(object):
             return geos[1]
         return geos[0]
 
-@cache_decorator("geography_item")
-def geography_item_helper(code, version):
-    geography = get_object_or_404(Geography, code=code, version=version)
-    serializer = serializers.GeographyBoundarySerializer(geography.geographyboundary)
-    data = serializer.data
+def get_resolution(request):
+    resolution = request.GET.get("resolution", models.DEFAULT_RESOLUTION)
+    if resolution not in models.RESOLUTIONS:
+        raise ValidationError({"resolution": f"Must be one of {', '.join(models.RESOLUTIONS)}"})
+    return resolution
+
+
+def get_boundary_format(request):
+    boundary_format = request.GET.get("boundary_format", "geojson")
+    if boundary_format not in BOUNDARY_FORMATS:
+        raise ValidationError({"boundary_format": f"Must be one of {', '.join(BOUNDARY_FORMATS)}"})
+    return boundary_format
 
-    return data
 
+@cache_decorator("geography_item_geojson", tags=geography_tags)
+def geography_item_helper(code, version, resolution=models.DEFAULT_RESOLUTION):
+    boundary = get_object_or_404(
+        models.GeographyBoundary.objects.select_related("geography"),
+        geography__code=code, geography__version=version
+    )
+    return geojson.get_geojson(boundary, resolution)
 
-@cache_decorator("geography_children")
-def geography_children_helper(code, version):
 
+@cache_decorator("geography_children_layers", tags=geography_tags)
+def geography_children_layers_helper(code, version, resolution=models.DEFAULT_RESOLUTION):
+    """
+    Joins the features of the children into one encoded FeatureCollection per level.
+    """
     geography = Geography.objects.get(code=code, version=version)
     child_boundaries = geography.get_child_boundaries()
-    children = geography.get_children()
-    data = {}
-    if len(children) > 0:
-        for child_level, child_level_boundaries in child_boundaries.items():
-            serializer = serializers.GeographyBoundarySerializer(child_level_boundaries, many=True, parentCode=code)
-            data[child_level] = serializer.data
-    return data
+    deferred = geojson.get_deferred_fields(resolution)
+
+    layers = {}
+    for child_level, child_level_boundaries in child_boundaries.items():
+        features = [
+            geojson.get_geojson(b, resolution, parent_code=code)
+            for b in child_level_boundaries.defer(*deferred)
+        ]
+        layers[child_level] = geojson.feature_collection(features)
+    return layers
+
+
+def geography_children_helper(code, version, resolution=models.DEFAULT_RESOLUTION):
+    layers = geography_children_layers_helper(code, version, resolution)
+    return "{" + ",".join(
+        dumps(child_level).decode("utf-8") + ":" + layer for child_level, layer in layers.items()
+    ) + "}"
+
+
+@cache_decorator("geography_children_topojson", tags=geography_tags)
+def geography_children_topology_helper(code, version, resolution=models.DEFAULT_RESOLUTION, level=None):
+    """
+    Returns the children as a TopoJSON topology with an object per level, or only the
+    object of the given level.
+    """
+    children = json.loads(geography_children_helper(code, version, resolution))
+    objects = {
+        child_level: collection["features"]
+        for child_level, collection in children.items()
+        if level is None or child_level == level
+    }
+    quantization = getattr(settings, "TOPOJSON_QUANTIZATION", topojson.DEFAULT_QUANTIZATION)
+    return dumps(topojson.topology(objects, quantization)).decode("utf-8")
 
 
 class GeographyChildren(GeographySwitchMixin, generics.ListAPIView):
     def get(self, request, code, version):
-        js = geography_children_helper(code, version)
-        return Response(js)
+        resolution = get_resolution(request)
+        if get_boundary_format(request) == "topojson":
+            js = geography_children_topology_helper(code, version, resolution)
+        else:
+            js = geography_children_helper(code, version, resolution)
+        return HttpResponse(js, content_type="application/json")
 
 class GeographyItem(GeographySwitchMixin, generics.RetrieveAPIView):
     def get(self, request, code, version=""):
-        js = geography_item_helper(code, version)
-        return Response(js)
+        js = geography_item_helper(code, version, get_resolution(request))
+        return HttpResponse(js, content_type="application/json")
 
 class GeographyList(GeographySwitchMixin, generics.ListAPIView):
     pass
+
+
+@cache_decorator("boundary_tile", tags=boundary_tile_tags)
+def boundary_tile_helper(version, z, x, y, level):
+    return tiles.get_boundary_tile(version, z, x, y, level=level)
+
+
+def boundary_tile(request, version, z, x, y):
+    """
+    Returns a Mapbox vector tile of the boundaries of a version. The optional level
+    parameter limits the tile to the boundaries of one level.
+    """
+    if not is_valid_tile(z, x, y):
+        raise Http404
+
+    tile = boundary_tile_helper(version, z, x, y, request.GET.get("level") or None)
+    return HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
@@ -1,16 +1,28 @@
 import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 
+from django.conf import settings
 from django.core.cache import cache
+from django.db import transaction
 from django.db.models import Q
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.http import Http404
+from django.utils import timezone
 from django.views.decorators.cache import cache_control
 from django.views.decorators.vary import vary_on_headers
+from django_q.tasks import async_task
 
 from wazimap_ng.datasets.models import Group, Geography, DatasetData, GeographyHierarchy
 from wazimap_ng.points.models import Location, Category
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.general.models import ProfileVersion
+from wazimap_ng.points.services import membership
 from wazimap_ng.profile.models import ProfileIndicator, ProfileHighlight, IndicatorCategory, IndicatorSubcategory, \
     ProfileKeyMetrics, Profile, Indicator
 from wazimap_ng.profile.services import authentication
@@ -22,6 +34,98 @@ location_key = "etag-Location-profile-%s-%s"
 theme_key = "etag-Theme-profile-%s-%s"
 location_theme_key = "etag-Location-Theme-%s"
 
+tag_key = "tag-%s"
+geography_tag = "geography-version-%s"
+geography_codes_tag = "geography-codes-%s"
+location_tiles_tag = "location-tiles-%s"
+
+stats_key = "stats-%s-%s"
+stats_prefixes = {"etag-Profile", "etag-Location-profile", "etag-Theme-profile"}
+
+# Versions of the geographies saved inside defer_geography_updates
+_deferred = threading.local()
+
+
+########### Stats #################
+def key_prefix(key):
+    return re.split(r"[-_]\d", key, 1)[0]
+
+
+def record_lookup(prefix, hit):
+    """
+    Counts a sample of the lookups, CACHE_STATS_SAMPLE_RATE of them, so that the hit
+    ratio can be followed without adding a cache round trip to every request.
+    """
+    sample_rate = getattr(settings, "CACHE_STATS_SAMPLE_RATE", 0)
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return
+
+    key = stats_key % (prefix, "hits" if hit else "misses")
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_cache_stats():
+    stats = {}
+    for prefix in sorted(stats_prefixes):
+        hits_key, misses_key = stats_key % (prefix, "hits"), stats_key % (prefix, "misses")
+        counts = cache.get_many([hits_key, misses_key])
+        hits = counts.get(hits_key, 0)
+        misses = counts.get(misses_key, 0)
+        total = hits + misses
+        stats[prefix] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / total if total > 0 else None
+        }
+    return stats
+
+
+########### Tags #################
+def new_tag_version():
+    # Starting from the current time rather than 1 ensures that a tag which was evicted
+    # never brings back entries that were stored under an older version
+    return int(time.time() * 1000)
+
+
+def get_tag_versions(tags):
+    keys = [tag_key % tag for tag in tags]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, new_tag_version(), None)
+        versions.update(cache.get_many(missing))
+
+    return [versions.get(key) for key in keys]
+
+
+def invalidate_tag(tag):
+    """
+    Invalidates every cache entry stored with this tag. Entries are not deleted, their
+    keys simply change so they are never read again and expire in time.
+    """
+    key = tag_key % tag
+    logger.debug(f"Invalidating cache tag: {tag}")
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_tag_version(), None)
+
+
+def geography_tags(code, version, *args, **kwargs):
+    return [geography_tag % version]
+
+
+def boundary_tile_tags(version, *args, **kwargs):
+    return [geography_tag % version]
+
+
+def location_tile_tags(category_id, *args, **kwargs):
+    return [location_tiles_tag % category_id]
+
 
 def check_has_permission(request, profile_id):
     try:
@@ -34,10 +138,14 @@ def check_has_permission(request, profile_id):
         raise Http404
 
 
-def last_modified(request, profile_id, key):
+def last_modified(request, profile_id, key, fallback=None):
     if check_has_permission(request, profile_id):
         _last_modified = datetime(year=1970, month=1, day=1)
         c = cache.get(key)
+        record_lookup(key_prefix(key), c is not None)
+
+        if c is None and fallback is not None:
+            c = fallback()
 
         if c is not None:
             return c
@@ -53,7 +161,43 @@ def etag_profile_updated(request, profile_id, geography_code):
 
 def last_modified_profile_updated(request, profile_id, geography_code):
     key = profile_key % profile_id
-    return last_modified(request, profile_id, key)
+    return last_modified(request, profile_id, key, fallback=lambda: load_profile_version(profile_id))
+
+
+def load_profile_version(profile_id):
+    """
+    Reads the content version of a profile from the database into the cache. Returns
+    None if the profile has not been versioned yet.
+    """
+    version = (ProfileVersion.objects
+        .filter(profile_id=profile_id)
+        .values_list("version", flat=True)
+        .first()
+    )
+    if version is not None:
+        cache.add(profile_key % profile_id, version)
+    return version
+
+
+def get_profile_version(profile_id):
+    """
+    Returns the content version of a profile, i.e. the timestamp set by update_profile_cache,
+    or None if the profile has not been versioned yet.
+    """
+    version = cache.get(profile_key % profile_id)
+    if version is None:
+        version = load_profile_version(profile_id)
+    if version is None:
+        return None
+    return str(version)
+
+
+def ensure_profile_version(profile_id):
+    profile_version, _ = ProfileVersion.objects.get_or_create(
+        profile_id=profile_id, defaults={"version": timezone.now()}
+    )
+    cache.add(profile_key % profile_id, profile_version.version)
+    return get_profile_version(profile_id)
 
 
 def etag_point_updated(request, profile_id, profile_category_id=None, theme_id=None, geography_code=None):
@@ -79,7 +223,17 @@ def last_modified_point_updated(request, profile_id, profile_category_id=None, t
 def update_profile_cache(profile):
     logger.info(f"Updating profile cache: {profile}")
     key = profile_key % profile.id
-    cache.set(key, datetime.now())
+    version = timezone.now()
+    ProfileVersion.objects.update_or_create(profile_id=profile.id, defaults={"version": version})
+    cache.set(key, version)
+
+    if getattr(settings, "MATERIALIZE_PROFILES", False):
+        async_task(
+            "wazimap_ng.general.tasks.materialize_profile",
+            profile.id, str(version),
+            task_name=f"Materialize profile: {profile.id}",
+            group=f"materialize-profile-{profile.id}"
+        )
 
 
 def update_point_cache(category):
@@ -88,6 +242,7 @@ def update_point_cache(category):
 
     logger.debug(f"Set cache key (category): {key1}")
     cache.set(key1, datetime.now())
+    invalidate_tag(location_tiles_tag % category.id)
 
 
 @receiver(post_save, sender=ProfileIndicator)
@@ -134,26 +289,81 @@ def subindicator_group_update(sender, instance, **kwargs):
 
 @receiver(post_save, sender=Location)
 def point_updated_location(sender, instance, **kwargs):
+    membership.update_location_memberships(Location.objects.filter(pk=instance.pk))
     update_point_cache(instance.category)
 
 
+@receiver(post_delete, sender=Location)
+def point_deleted_location(sender, instance, **kwargs):
+    invalidate_tag(location_tiles_tag % instance.category_id)
+
+
 @receiver(post_save, sender=Category)
 def point_updated_category(sender, instance, **kwargs):
     update_point_cache(instance)
 
 
-@receiver(post_save, sender=Indicator)
-def indicator_updated(sender, instance, **kwargs):
-    indicator_id = instance.id
+def update_indicator_profiles(indicator_ids):
+    """
+    Updates the cache of every profile that shows one of the indicators.
+    """
     profiles_to_invalidate_cache = Profile.objects.filter(
-        Q(profileindicator__indicator_id=indicator_id)
-        | Q(profilekeymetrics__variable_id=indicator_id)
-        | Q(profilehighlight__indicator_id=indicator_id)
+        Q(profileindicator__indicator_id__in=indicator_ids)
+        | Q(profilekeymetrics__variable_id__in=indicator_ids)
+        | Q(profilehighlight__indicator_id__in=indicator_ids)
     ).distinct()
     for profile_obj in profiles_to_invalidate_cache:
         update_profile_cache(profile_obj)
 
 
+@receiver(post_save, sender=Indicator)
+def indicator_updated(sender, instance, **kwargs):
+    update_indicator_profiles([instance.id])
+
+
+def queue_geography_version(version):
+    transaction.on_commit(lambda: async_task(
+        "wazimap_ng.boundaries.tasks.process_geography_version",
+        version,
+        task_name=f"Process geography version: {version}",
+        group=f"geography-version-{version}"
+    ))
+
+
+def defer_version(version):
+    """
+    Records the version if saves are being deferred. Returns False when they are not.
+    """
+    versions = getattr(_deferred, "versions", None)
+    if versions is None:
+        return False
+    versions.add(version)
+    return True
+
+
+@contextmanager
+def defer_geography_updates():
+    """
+    Geographies and boundaries saved inside the block don't queue a task each. One
+    process_geography_version task is queued per saved version instead, when the
+    transaction commits. Used by bulk loads such as loadshp.
+    """
+    if getattr(_deferred, "versions", None) is not None:
+        yield
+        return
+
+    _deferred.versions = set()
+    try:
+        yield
+        versions = _deferred.versions
+    finally:
+        _deferred.versions = None
+
+    for version in versions:
+        invalidate_tag(geography_codes_tag % version)
+        queue_geography_version(version)
+
+
 @receiver(post_save, sender=Geography)
 def geography_updated(sender, instance, **kwargs):
 
@@ -176,6 +386,38 @@ def geography_updated(sender, instance, **kwargs):
     for profile in Profile.objects.filter(id__in=set(profile_ids)):
         update_profile_cache(profile)
 
+    if defer_version(instance.version):
+        return
+
+    # The stored features include the code of the parent
+    geography_id = instance.id
+    transaction.on_commit(lambda: async_task(
+        "wazimap_ng.boundaries.tasks.encode_geography_boundaries",
+        geography_id,
+        task_name=f"Encode geography boundaries: {geography_id}",
+        group=f"geography-boundaries-{geography_id}"
+    ))
+    invalidate_tag(geography_codes_tag % instance.version)
+
+
+@receiver(post_delete, sender=Geography)
+def geography_deleted(sender, instance, **kwargs):
+    invalidate_tag(geography_codes_tag % instance.version)
+
+
+@receiver(post_save, sender=GeographyBoundary)
+def geography_boundary_updated(sender, instance, **kwargs):
+    if defer_version(instance.geography.version):
+        return
+
+    boundary_id = instance.id
+    transaction.on_commit(lambda: async_task(
+        "wazimap_ng.boundaries.tasks.process_boundary",
+        boundary_id,
+        task_name=f"Process boundary: {boundary_id}",
+        group=f"boundary-{boundary_id}"
+    ))
+
 
 @receiver(post_save, sender=GeographyHierarchy)
 def geography_hierarchy_updated(sender, instance, **kwargs):
@@ -187,10 +429,17 @@ def cache_headers(func):
     return vary_on_headers("Authorization")(cache_control(max_age=0, public=True, must_revalidate=True)(func))
 
 
-def cache_decorator(key, expiry=60 * 60 * 24 * 365):
+def cache_decorator(key, expiry=60 * 60 * 24 * 365, tags=None):
+    """
+    Caches the result of the decorated function. tags is an optional function that
+    receives the same arguments and returns the tags of the entry - invalidating any of
+    those tags with invalidate_tag invalidates the entry on every node sharing the cache.
+    """
     def clean(s):
         return str(s).replace(" ", "-").lower().strip()
 
+    stats_prefixes.add(key)
+
     def _cache_decorator(func):
         def wrapper(*args, **kwargs):
             cache_key = key
@@ -200,7 +449,12 @@ def cache_decorator(key, expiry=60 * 60 * 24 * 365):
             if len(kwargs) > 0:
                 cache_key += "-".join(f"{k}-{v}" for k, v in kwargs.items())
 
+            if tags is not None:
+                versions = get_tag_versions(tags(*args, **kwargs))
+                cache_key += "|" + "-".join(str(v) for v in versions)
+
             cached_obj = cache.get(cache_key)
+            record_lookup(key, cached_obj is not None)
             if cached_obj is not None:
                 return cached_obj
 
@@ -0,0 +1,159 @@
+import pickle
+import time
+
+import redis
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.module_loading import import_string
+
+
+class RedisCache(BaseCache):
+    """
+    Cache backend shared by all web workers and nodes. Integers are stored as plain
+    redis integers so that incr/decr are atomic on the server, everything else is pickled.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "wazimap_ng.cache_backends.RedisCache",
+            "LOCATION": "redis://redis:6379/1",
+            # Optional - any class with a redis.Redis compatible from_url, e.g. fakeredis.FakeRedis
+            "OPTIONS": {"CLIENT_CLASS": "redis.Redis"},
+        }
+    }
+    """
+    # INCRBY creates missing keys, incr must raise ValueError for them instead
+    incr_script = """
+        if redis.call("EXISTS", KEYS[1]) == 1 then
+            return redis.call("INCRBY", KEYS[1], ARGV[1])
+        end
+        return false
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._server = server
+        self._client_class = options.get("CLIENT_CLASS", "redis.Redis")
+        self._client = None
+        self._incr = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            client_class = import_string(self._client_class)
+            self._client = client_class.from_url(self._server)
+        return self._client
+
+    def _encode(self, value):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _decode(self, value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return pickle.loads(value)
+
+    def _expiry_ms(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return None
+        # get_backend_timeout returns an absolute timestamp
+        return int((timeout - time.time()) * 1000)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expiry = self._expiry_ms(timeout)
+        if expiry is not None and expiry <= 0:
+            return False
+        return bool(self.client.set(key, self._encode(value), px=expiry, nx=True))
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        value = self.client.get(key)
+        if value is None:
+            return default
+        return self._decode(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expiry = self._expiry_ms(timeout)
+        if expiry is not None and expiry <= 0:
+            self.client.delete(key)
+            return
+        self.client.set(key, self._encode(value), px=expiry)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        expiry = self._expiry_ms(timeout)
+        if expiry is None:
+            return bool(self.client.persist(key)) or bool(self.client.exists(key))
+        if expiry <= 0:
+            return bool(self.client.delete(key))
+        return bool(self.client.pexpire(key, expiry))
+
+    def delete(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self.client.delete(key)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        keys = list(keys)
+        full_keys = [self.make_key(key, version=version) for key in keys]
+        values = self.client.mget(full_keys)
+        return {
+            key: self._decode(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        pipeline = self.client.pipeline()
+        expiry = self._expiry_ms(timeout)
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            if expiry is not None and expiry <= 0:
+                pipeline.delete(key)
+            else:
+                pipeline.set(key, self._encode(value), px=expiry)
+        pipeline.execute()
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self.client.exists(key))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        if self._incr is None:
+            self._incr = self.client.register_script(self.incr_script)
+
+        value = self._incr(keys=[key], args=[delta])
+        if value is None:
+            raise ValueError("Key '%s' not found" % key)
+        return value
+
+    def clear(self):
+        if self.key_prefix:
+            keys = list(self.client.scan_iter(match=f"{self.key_prefix}:*"))
+            if keys:
+                self.client.delete(*keys)
+        else:
+            self.client.flushdb()
+
+    def close(self, **kwargs):
+        pass
@@ -17,6 +17,24 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 os.environ["GDAL_DATA"] = "/usr/share/gdal/"
 
+
+def get_cache_config(fallback):
+    """
+    Use the shared redis cache when CACHE_REDIS_URL is set so that etags and cached
+    helpers are consistent across gunicorn workers and nodes.
+    """
+    redis_url = os.environ.get("CACHE_REDIS_URL")
+    if redis_url:
+        return {
+            "default": {
+                "BACKEND": "wazimap_ng.cache_backends.RedisCache",
+                "LOCATION": redis_url,
+                "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "wazimap"),
+            }
+        }
+    return {"default": fallback}
+
+
 class Common(QCluster, Configuration):
 
     SERVER_INSTANCE = os.environ.get("SERVER_INSTANCE", "Dev")
@@ -116,13 +134,48 @@ class Common(QCluster, Configuration):
 
     ATOMIC_REQUESTS = truthy(os.environ.get("ATOMIC_REQUESTS", False))
 
-    CACHES = {
-        'default': {
-            # 'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-            # 'LOCATION': 'table_cache',
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        }
-    }
+    # Precompute /all_details/ payloads in the background whenever a profile changes
+    MATERIALIZE_PROFILES = truthy(os.environ.get("MATERIALIZE_PROFILES", False))
+
+    # Extract indicator data with a single GROUPING SETS query instead of one query per subindicator
+    GROUPING_SETS_EXTRACTION = truthy(os.environ.get("GROUPING_SETS_EXTRACTION", False))
+
+    # Load uploaded datasets with COPY FROM STDIN instead of bulk_create
+    COPY_DATASET_UPLOADS = truthy(os.environ.get("COPY_DATASET_UPLOADS", False))
+
+    # Load csv uploads with a pool of workers through a staging table
+    PIPELINE_DATASET_UPLOADS = truthy(os.environ.get("PIPELINE_DATASET_UPLOADS", False))
+    UPLOAD_PIPELINE_WORKERS = int(os.environ.get("UPLOAD_PIPELINE_WORKERS", 4))
+
+    # Re-extract only the geographies touched by an upload for the indicators of the dataset
+    INCREMENTAL_INDICATOR_EXTRACTION = truthy(os.environ.get("INCREMENTAL_INDICATOR_EXTRACTION", False))
+
+    # Index the group keys of the rows of every dataset after an upload
+    DATASET_GROUP_INDEXES = truthy(os.environ.get("DATASET_GROUP_INDEXES", False))
+
+    # Store counts and integer coded group values next to the json of dataset rows and extract from them
+    NORMALIZED_DATASET_STORAGE = truthy(os.environ.get("NORMALIZED_DATASET_STORAGE", False))
+
+    # Stream large JSON responses (profiles and children boundaries) instead of rendering them in memory
+    STREAM_JSON_RESPONSES = truthy(os.environ.get("STREAM_JSON_RESPONSES", False))
+
+    # Number of geography versions whose code -> id maps are kept in memory by each process
+    GEOGRAPHY_RESOLVER_MAX_VERSIONS = int(os.environ.get("GEOGRAPHY_RESOLVER_MAX_VERSIONS", 4))
+
+    # Default page size of the points of a collection, all points are returned in one page when unset
+    LOCATIONS_PAGE_SIZE = int(os.environ.get("LOCATIONS_PAGE_SIZE", 0)) or None
+
+    # Number of grid steps along each axis that TopoJSON boundary coordinates are quantized to
+    TOPOJSON_QUANTIZATION = int(os.environ.get("TOPOJSON_QUANTIZATION", 100000))
+
+    # Fraction of cache lookups counted in the admin cache stats, 0 disables them
+    CACHE_STATS_SAMPLE_RATE = float(os.environ.get("CACHE_STATS_SAMPLE_RATE", 0))
+
+    CACHES = get_cache_config({
+        # 'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        # 'LOCATION': 'table_cache',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    })
 
     # General
     APPEND_SLASH = True
@@ -320,7 +373,7 @@ class Common(QCluster, Configuration):
             raise ImproperlyConfigured(error_msg)
 
 FILE_SIZE_LIMIT = 3000 * 1024 * 1024
-ALLOWED_FILE_EXTENSIONS = ["csv", "xls", "xlsx"]
+ALLOWED_FILE_EXTENSIONS = ["csv", "xls", "xlsx", "parquet", "arrow", "feather"]
 
 CHUNK_SIZE_LIMIT = 500000
 
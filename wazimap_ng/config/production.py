@@ -1,5 +1,5 @@
 import os
-from .common import Common
+from .common import Common, get_cache_config
 from configurations import Configuration, values
 
 class Production(Common):
@@ -40,12 +40,10 @@ class Production(Common):
     # http://whitenoise.evans.io/en/stable/django.html#using-whitenoise-in-development
     FILE_SIZE_LIMIT = 1000 * 1024 * 1024
 
-    CACHES = {
-        'default': {
-            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
-            'LOCATION': '/var/tmp/django_cache',
-        }
-    }
+    CACHES = get_cache_config({
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/django_cache',
+    })
 
     AWS_ACCESS_KEY_ID = Common.get_env_value('AWS_ACCESS_KEY_ID')
     AWS_SECRET_ACCESS_KEY = Common.get_env_value('AWS_SECRET_ACCESS_KEY')
@@ -34,4 +34,10 @@ class Test(Common):
         }
     }
 
+    # Run background tasks inline
+    Q_CLUSTER = {
+        "orm": "default",
+        "sync": True,
+    }
+
     FILE_SIZE_LIMIT = 3000 * 1024 * 1024
@@ -27,6 +27,27 @@ def set_to_public(modeladmin, request, queryset):
 def set_to_private(modeladmin, request, queryset):
     queryset.make_private()
 
+def extract_indicator_data(modeladmin, request, queryset):
+    for dataset in queryset:
+        task = async_task(
+            "wazimap_ng.datasets.tasks.dataset_indicator_extraction",
+            dataset,
+            task_name=f"Data Extraction: {dataset.name}",
+            hook="wazimap_ng.datasets.hooks.process_task_info",
+            key=request.session.session_key,
+            type="data_extraction", assign=False, notify=True
+        )
+        hooks.add_to_task_list(request.session, task)
+    hooks.custom_admin_notification(
+        request.session,
+        "info",
+        "Process of Data extraction started for %s dataset(s). We will let you know when process is done." % (
+            queryset.count()
+        )
+    )
+
+extract_indicator_data.short_description = "Extract data for all variables"
+
 def get_source(dataset):
     if hasattr(dataset, "metadata"):
         return dataset.metadata.source
@@ -44,8 +65,11 @@ class PermissionTypeFilter(filters.DatasetFilter):
 class DatasetAdmin(DatasetBaseAdminModel):
     exclude = ("groups", )
     inlines = (MetaDataInline,)
-    actions = (set_to_public, set_to_private, delete_selected_data,)
-    list_display = ("name", "permission_type", "geography_hierarchy", "profile", description("source", get_source))
+    actions = (set_to_public, set_to_private, extract_indicator_data, delete_selected_data,)
+    list_display = (
+        "name", "permission_type", "geography_hierarchy", "profile", description("source", get_source),
+        "get_extraction_progress",
+    )
     list_filter = (
         PermissionTypeFilter, filters.GeographyHierarchyFilter,
         filters.ProfileFilter, filters.DatasetMetaDataFilter
@@ -62,12 +86,12 @@ class DatasetAdmin(DatasetBaseAdminModel):
         }),
         ("Dataset Imports", {
             "fields": (
-                "import_dataset", "imported_dataset",
+                "import_dataset", "imported_dataset", "get_extraction_progress",
             )
         }),
     )
 
-    readonly_fields = ("imported_dataset", )
+    readonly_fields = ("imported_dataset", "get_extraction_progress", )
 
     class Media:
         js = ("/static/js/geography_hierarchy.js",)
@@ -94,6 +118,20 @@ class DatasetAdmin(DatasetBaseAdminModel):
 
     imported_dataset.short_description = 'Previously Imported'
 
+    def get_extraction_progress(self, obj):
+        progress = obj.extraction_progress if obj else None
+        if not progress:
+            return "-"
+        message = (
+            f"{progress.get('extraction_status', '-')}: {progress.get('indicators_done', 0)}"
+            f" of {progress.get('indicators_total', 0)} variables"
+        )
+        if progress.get("indicator"):
+            message += f", last {progress['indicator']}"
+        return message
+
+    get_extraction_progress.short_description = 'Extraction progress'
+
     def get_related_fields_data(self, obj):
 
         return [{
@@ -59,14 +59,14 @@ class DatasetFileAdmin(BaseAdminModel):
         }),
         ("Task Details", {
             "fields": (
-            	"get_status", "get_task_link",
+            	"get_status", "get_progress", "get_task_link",
             	"get_warnings", "get_errors",
             )
         }),
     )
 
     readonly_fields = (
-       "name", "get_document", "get_status", "get_task_link",
+       "name", "get_document", "get_status", "get_progress", "get_task_link",
        "get_warnings", "get_errors",
     )
 
@@ -119,6 +119,23 @@ class DatasetFileAdmin(BaseAdminModel):
 
     get_status.short_description = 'Status'
 
+    def get_progress(self, obj):
+        progress = obj.progress
+        if not progress:
+            return "-"
+        message = (
+            f"{progress.get('status', '-')}: {progress.get('rows', 0)} rows in "
+            f"{progress.get('chunks_done', 0)} chunks ({progress.get('percent') or 0}%)"
+        )
+        if "extraction_status" in progress:
+            message += (
+                f", extraction {progress['extraction_status']}: {progress.get('indicators_done', 0)}"
+                f" of {progress.get('indicators_total', 0)} variables"
+            )
+        return message
+
+    get_progress.short_description = 'Progress'
+
     def get_task_link(self, obj):
         if obj.task:
             task_type = "success" if obj.task.success else "failure"
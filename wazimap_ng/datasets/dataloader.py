@@ -1,21 +1,62 @@
+import csv
+import io
+import json
 import math
-import functools
 import logging
 
 import numpy
+import pandas as pd
 
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 
 from . import models
+from .services import geography_resolver
 
 logger = logging.getLogger(__name__)
 
-# TODO should add a memoize decorator here
-@functools.lru_cache()
-def load_geography(geo_code, version):
+def load_geography(geo_code, code_map):
+    """
+    Returns the id of the geography from a code map of its version, see
+    geography_resolver.get_code_map. Raises Geography.DoesNotExist if there is none.
+    """
     geo_code = str(geo_code).upper()
-    geography = models.Geography.objects.get(code=geo_code, version=version)
-    return geography
+    try:
+        return code_map[geo_code]
+    except KeyError:
+        raise models.Geography.DoesNotExist(f"Geography matching code {geo_code} does not exist")
+
+
+def load_geography_ids(geo_codes, version):
+    """
+    Resolves a series of geography codes to geography ids. Codes that do not
+    exist in this version resolve to NaN.
+    """
+    codes = geo_codes.astype(str).str.upper()
+    return codes.map(geography_resolver.get_code_map(version))
+
+
+def validate_count(value, line_no):
+    error_lines = []
+    try:
+        # Empty cells are None in excel and arrow files and NaN in csv files
+        count = float("nan") if value is None else float(value)
+        if math.isnan(count):
+            error_lines.append({
+                "CSV Line Number": line_no,
+                "Field Name": "count",
+                "Error Details": "Missing data for count"
+            })
+
+    except (TypeError, ValueError):
+        error_lines.append({
+            "CSV Line Number": line_no,
+            "Field Name": "count",
+            "Error Details": f"Expected a number in the 'count' column, received {value}"
+        })
+
+    return error_lines
 
 
 def create_groups(dataset, group_names):
@@ -27,6 +68,34 @@ def create_groups(dataset, group_names):
     return groups
 
 
+def copy_datarows(dataset_id, datarows, table=None):
+    """
+    Writes (geography_id, data) pairs straight into the DatasetData table using
+    COPY FROM STDIN which is much faster than inserting model instances. table can
+    be set to a staging table with the same columns.
+    """
+    now = timezone.now().isoformat()
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for geography_id, data in datarows:
+        writer.writerow([now, now, dataset_id, geography_id, json.dumps(data)])
+    buffer.seek(0)
+
+    table = connection.ops.quote_name(table or models.DatasetData._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} (created, updated, dataset_id, geography_id, data) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+
+
+def save_datarows(dataset, datarows, use_copy):
+    if use_copy:
+        copy_datarows(dataset.id, datarows)
+    else:
+        models.DatasetData.objects.bulk_create(datarows, 1000)
+
+
 @transaction.atomic
 def loaddata(dataset, iterable, row_number):
     datarows = []
@@ -35,33 +104,21 @@ def loaddata(dataset, iterable, row_number):
     groups = set()
 
     version = dataset.geography_hierarchy.version
+    use_copy = getattr(settings, "COPY_DATASET_UPLOADS", False)
+    # Read once per chunk, every lookup checks the version in the cache
+    code_map = geography_resolver.get_code_map(version)
 
     for idx, row in enumerate(iterable):
         groups |= set(x for x in row.keys())
         geo_code = row["geography"]
         line_no = row_number+idx+1
-        error_lines = []
         try:
-            geography = load_geography(geo_code, version)
+            geography_id = load_geography(geo_code, code_map)
         except models.Geography.DoesNotExist:
             warnings.append(list(row.values()))
             continue
 
-        try:
-            count = float(row["count"])
-            if math.isnan(count):
-                error_lines.append({
-                    "CSV Line Number": line_no,
-                    "Field Name": "count",
-                    "Error Details": "Missing data for count"
-                })
-
-        except (TypeError, ValueError):
-            error_lines.append({
-                "CSV Line Number": line_no,
-                "Field Name": "count",
-                "Error Details": f"Expected a number in the 'count' column, received {row['count']}"
-            })
+        error_lines = validate_count(row["count"], line_no)
 
         if error_lines:
             errors.append({
@@ -72,15 +129,126 @@ def loaddata(dataset, iterable, row_number):
 
         del row["geography"]
 
-        dd = models.DatasetData(dataset=dataset, geography=geography, data=row)
-        datarows.append(dd)
+        if use_copy:
+            datarows.append((geography_id, row))
+        else:
+            dd = models.DatasetData(dataset=dataset, geography_id=geography_id, data=row)
+            datarows.append(dd)
 
         if len(datarows) >= 10000:
-            models.DatasetData.objects.bulk_create(datarows, 1000)
+            save_datarows(dataset, datarows, use_copy)
             datarows = []
-    models.DatasetData.objects.bulk_create(datarows, 1000)
+    save_datarows(dataset, datarows, use_copy)
+
+    group_list = get_group_list(groups)
+
+    create_groups(dataset, group_list)
+
+    return [errors, warnings]
+
 
-    group_list = sorted(g for g in groups if g.lower() not in ("count", "geography"))
+def strip_columns(df):
+    for column in df.columns[df.dtypes == object]:
+        stripped = df[column].str.strip()
+        # .str returns NaN for values that are not strings
+        df[column] = stripped.where(stripped.notna(), df[column])
+    return df
+
+
+def stringify_groups(df):
+    """
+    Converts the group values of the typed columns of parquet and arrow files to strings
+    so that they are stored as they would be from a csv upload. Float columns that only
+    hold whole numbers, such as integer columns with gaps written by pandas, are written
+    without a trailing .0. Missing values are left as they are.
+    """
+    for column in get_group_list(df.columns):
+        values = df[column]
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+            continue
+        missing = values.isna()
+        present = values[~missing]
+        if pd.api.types.is_float_dtype(values) and ((present % 1 == 0) & (present.abs() < 2 ** 53)).all():
+            values = values.fillna(0).astype("int64")
+        strings = values.astype(str).astype(object)
+        strings[missing] = None
+        df[column] = strings
+    return df
+
+
+def validate_frame(df, version, row_number):
+    """
+    Validates whole columns of a pandas chunk at once. Geographies are resolved with a
+    single lookup per chunk and only rows that fail validation are turned into python
+    objects for the error and warning logs.
+
+    Returns the geography ids and data of the valid rows, the errors and the warnings.
+    """
+    errors = []
+    warnings = []
+
+    df = df.reset_index(drop=True)
+    line_numbers = df.index + row_number + 1
+
+    geography_ids = load_geography_ids(df["geography"], version)
+    missing_geography = geography_ids.isna()
+    warnings.extend(df[missing_geography].values.tolist())
+
+    counts = pd.to_numeric(df["count"], errors="coerce")
+    bad_count = counts.isna() & ~missing_geography
+    for idx in numpy.flatnonzero(bad_count.values):
+        error_lines = validate_count(df["count"].iat[idx], int(line_numbers[idx]))
+        if error_lines:
+            errors.append({
+                "line_error": error_lines,
+                "values": df.iloc[idx].tolist()
+            })
+        else:
+            # to_numeric is stricter than float, e.g. for 1_000
+            bad_count.iat[idx] = False
+
+    valid = ~(missing_geography | bad_count)
+    valid_ids = geography_ids[valid].astype(int).tolist()
+    records = df[valid].drop(columns="geography").to_dict("records")
+
+    return valid_ids, records, errors, warnings
+
+
+def get_group_list(columns):
+    return sorted(g for g in columns if g.lower() not in ("count", "geography"))
+
+
+def update_dataset_groups(dataset, columns):
+    groups = [group for group in columns.to_list() if group not in ["geography", "count"]]
+
+    dataset.groups = list(set(groups + dataset.groups))
+    dataset.save()
+
+
+@transaction.atomic
+def loaddata_frame(dataset, df, row_number):
+    """
+    Same as loaddata but validates the chunk with validate_frame.
+    """
+    version = dataset.geography_hierarchy.version
+    use_copy = getattr(settings, "COPY_DATASET_UPLOADS", False)
+
+    valid_ids, records, errors, warnings = validate_frame(df, version, row_number)
+
+    for start in range(0, max(len(records), 1), 10000):
+        batch = zip(valid_ids[start:start + 10000], records[start:start + 10000])
+        if use_copy:
+            datarows = list(batch)
+        else:
+            datarows = [
+                models.DatasetData(dataset=dataset, geography_id=geography_id, data=row)
+                for geography_id, row in batch
+            ]
+        save_datarows(dataset, datarows, use_copy)
+
+    group_list = []
+    if len(df) > 0:
+        group_list = get_group_list(df.columns)
 
     create_groups(dataset, group_list)
 
@@ -0,0 +1,91 @@
+from itertools import chain, islice
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+import xlrd
+
+
+def xls_cell_value(cell, datemode):
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+        return None
+    elif cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
+    elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+        return bool(cell.value)
+    return cell.value
+
+
+def iter_xlsx_rows(fileobj):
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield row
+    finally:
+        workbook.close()
+
+
+def iter_xls_rows(fileobj):
+    # xls files can not be streamed but the sheet is only parsed once
+    book = xlrd.open_workbook(file_contents=fileobj.read(), on_demand=True)
+    sheet = book.sheet_by_index(0)
+    for idx in range(sheet.nrows):
+        yield [xls_cell_value(cell, book.datemode) for cell in sheet.row(idx)]
+
+
+def iter_rows(document):
+    """
+    Iterates over the rows of the first sheet of a workbook. Integral floats are
+    converted to ints and empty rows are skipped, as pandas.read_excel does.
+    """
+    fileobj = document.open("rb")
+    if Path(document.name).suffix.lower() == ".xlsx":
+        rows = iter_xlsx_rows(fileobj)
+    else:
+        rows = iter_xls_rows(fileobj)
+
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        yield [
+            int(value) if isinstance(value, float) and value.is_integer() else value
+            for value in row
+        ]
+
+
+def get_columns(header, first_row):
+    header = [
+        name if name is not None else f"Unnamed: {idx}"
+        for idx, name in enumerate(header)
+    ]
+    df = pd.DataFrame([first_row] if first_row is not None else [], columns=header)
+    df.dropna(how='any', axis='columns', inplace=True)
+    return df.columns.astype(str).str.lower().str.strip()
+
+
+def read_excel_chunks(document, chunksize):
+    """
+    Reads a workbook in a single pass. Returns the cleaned column names and a generator
+    of DataFrames with at most chunksize rows each.
+    """
+    rows = iter_rows(document)
+    header = next(rows, None)
+    if header is None:
+        return pd.Index([]), iter([])
+
+    first_row = next(rows, None)
+    columns = get_columns(header, first_row)
+    if first_row is not None:
+        rows = chain([first_row], rows)
+
+    def chunks():
+        while True:
+            chunk = list(islice(rows, chunksize))
+            if not chunk:
+                break
+            df = pd.DataFrame(chunk)
+            df.dropna(how='any', axis='columns', inplace=True)
+            df.columns = columns
+            yield df
+
+    return columns, chunks()
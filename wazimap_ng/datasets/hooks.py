@@ -82,8 +82,9 @@ def process_task_info(task):
     obj = next(iter(task.args))
 
     if assign_task:
+        # Only save the task, the object in the task args is stale
         obj.task = task
-        obj.save()
+        obj.save(update_fields=["task"])
 
     if notify:
         notification_type = "success" if task.success else "error"
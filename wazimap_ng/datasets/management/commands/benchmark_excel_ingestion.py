@@ -0,0 +1,75 @@
+import tempfile
+import time
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from wazimap_ng.datasets.excel_reader import read_excel_chunks
+
+
+def write_workbook(path, rows):
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Geography", "Gender", "Age", "Count"])
+    for idx in range(rows):
+        sheet.append([f"GEO{idx % 1000}", "Male" if idx % 2 else "Female", str(idx % 100), idx % 1000])
+    workbook.save(path)
+
+
+def read_streaming(path, chunksize):
+    with path.open("rb") as f:
+        _, chunks = read_excel_chunks(File(f, name=path.name), chunksize)
+        return sum(len(df) for df in chunks)
+
+
+def read_skiprows(path, chunksize):
+    # The previous implementation, kept here for comparison
+    rows = 0
+    skiprows = 1
+    while True:
+        df = pd.read_excel(str(path), nrows=chunksize, skiprows=skiprows, header=None)
+        skiprows += chunksize
+        if not df.shape[0]:
+            break
+        rows += len(df)
+    return rows
+
+
+class Command(BaseCommand):
+    help = """Times reading generated xlsx workbooks of increasing size in chunks, with the single pass
+reader and optionally with the previous skiprows reader which re-reads the workbook for every chunk.
+Example: python3 manage.py benchmark_excel_ingestion --rows 100000 250000 500000 1000000"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[100000, 250000, 500000, 1000000], help="Workbook sizes to benchmark.")
+        parser.add_argument("--chunksize", type=int, default=None, help="Rows per chunk, defaults to CHUNK_SIZE_LIMIT.")
+        parser.add_argument("--skiprows", action="store_true", help="Also time the previous reader. This is slow for large workbooks.")
+
+    def time_reader(self, reader, path, chunksize, rows):
+        start = time.perf_counter()
+        count = reader(path, chunksize)
+        duration = time.perf_counter() - start
+        assert count == rows, f"Expected {rows} rows, read {count}"
+        return duration
+
+    def handle(self, *args, **options):
+        chunksize = options["chunksize"] or getattr(settings, "CHUNK_SIZE_LIMIT", 1000000)
+        readers = [("single pass", read_streaming)]
+        if options["skiprows"]:
+            readers.append(("skiprows", read_skiprows))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for rows in options["rows"]:
+                path = Path(tmpdir) / f"benchmark_{rows}.xlsx"
+                write_workbook(path, rows)
+
+                for name, reader in readers:
+                    duration = self.time_reader(reader, path, chunksize, rows)
+                    self.stdout.write(
+                        f"{name}: {rows} rows in {duration:.2f}s "
+                        f"({duration * 100000 / rows:.2f}s per 100k rows, chunksize {chunksize})"
+                    )
@@ -0,0 +1,106 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from wazimap_ng.datasets.models import Dataset, Indicator, IndicatorData, Geography
+from wazimap_ng.datasets.tasks.indicator_data_extraction import (
+    subindicator_data_extraction, grouped_data_extraction
+)
+from wazimap_ng.profile.models import Profile
+
+def normalize(data):
+    # Totals within a subindicator are not returned in a fixed order
+    for subindicators in data["groups"].values():
+        for subindicator, totals in subindicators.items():
+            subindicators[subindicator] = sorted(totals, key=json.dumps)
+    return data
+
+class Command(BaseCommand):
+    help = """Compares the per subindicator and the GROUPING SETS indicator extraction on a synthetic
+dataset. Everything is created in a transaction that is rolled back at the end.
+Example: python3 manage.py benchmark_indicator_extraction 'Youth Explorer' --rows 5000000"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("profile", type=str, help="Name of the profile whose geography hierarchy is used for the synthetic data.")
+        parser.add_argument("--rows", type=int, default=5000000, help="Number of DatasetData rows to generate.")
+        parser.add_argument("--groups", type=int, default=5, help="Number of groups, including the primary group.")
+        parser.add_argument("--subindicators", type=int, default=100, help="Number of distinct values per group.")
+        parser.add_argument("--geographies", type=int, default=500, help="Maximum number of geographies to spread rows over.")
+
+    def create_dataset(self, profile, options):
+        hierarchy = profile.geography_hierarchy
+        geography_ids = list(
+            Geography.objects.filter(version=hierarchy.version)
+            .values_list("id", flat=True)[:options["geographies"]]
+        )
+        if len(geography_ids) == 0:
+            raise CommandError(f"No geographies found for hierarchy: {hierarchy}")
+
+        groups = [f"group_{idx}" for idx in range(options["groups"])]
+        dataset = Dataset.objects.create(
+            profile=profile, name="Extraction benchmark", geography_hierarchy=hierarchy, groups=groups
+        )
+
+        build_object = ", ".join(
+            f"'{group}', 'value_' || floor(random() * %s)::int" for group in groups
+        )
+        sql = f"""
+            INSERT INTO datasets_datasetdata (created, updated, dataset_id, geography_id, data)
+            SELECT now(), now(), %s, (%s::int[])[1 + i %% %s],
+                jsonb_build_object({build_object}, 'count', (i %% 1000)::text)
+            FROM generate_series(1, %s) AS i
+        """
+        params = [dataset.id, geography_ids, len(geography_ids)]
+        params += [options["subindicators"]] * len(groups)
+        params += [options["rows"]]
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            cursor.execute("ANALYZE datasets_datasetdata")
+
+        indicator = Indicator.objects.create(dataset=dataset, groups=groups[:1], name="Extraction benchmark")
+
+        return indicator, len(geography_ids)
+
+    def run_extraction(self, label, extraction, indicator):
+        IndicatorData.objects.filter(indicator=indicator).delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            extraction(indicator)
+            duration = time.perf_counter() - start
+
+        self.stdout.write(f"{label}: {duration:.2f}s, {len(queries)} queries")
+
+        return {
+            geography_id: normalize(data)
+            for geography_id, data in IndicatorData.objects.filter(indicator=indicator).values_list("geography_id", "data")
+        }
+
+    def handle(self, *args, **options):
+        try:
+            profile = Profile.objects.get(name=options["profile"])
+        except Profile.DoesNotExist:
+            profiles = ", ".join(p.name for p in Profile.objects.all())
+            raise CommandError(f"Profile {options['profile']} does not exist. The following profiles are available: {profiles}")
+
+        with transaction.atomic():
+            start = time.perf_counter()
+            indicator, num_geographies = self.create_dataset(profile, options)
+            self.stdout.write(
+                f"Generated {options['rows']} rows over {num_geographies} geographies "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+
+            subindicator_data = self.run_extraction("Per subindicator", subindicator_data_extraction, indicator)
+            grouped_data = self.run_extraction("GROUPING SETS", grouped_data_extraction, indicator)
+
+            if subindicator_data == grouped_data:
+                self.stdout.write("Both extractions produced the same indicator data")
+            else:
+                self.stderr.write("The extractions produced different indicator data")
+
+            transaction.set_rollback(True)
@@ -0,0 +1,87 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from wazimap_ng.datasets.models import Dataset, DatasetData, DatasetGroupValue, Indicator
+from wazimap_ng.datasets.services.normalization import decode
+from wazimap_ng.datasets.tasks.indicator_data_extraction import grouped_totals_query
+
+
+def get_storage_sizes(dataset):
+    datasetdata_table = connection.ops.quote_name(DatasetData._meta.db_table)
+    dictionary_table = connection.ops.quote_name(DatasetGroupValue._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT count(*), COALESCE(sum(pg_column_size(data)), 0),
+                COALESCE(sum(pg_column_size(codes)), 0) + COALESCE(sum(pg_column_size(count)), 0)
+            FROM {datasetdata_table} WHERE dataset_id = %s
+        """, [dataset.id])
+        rows, json_size, normalized_size = cursor.fetchone()
+        cursor.execute(
+            f"SELECT COALESCE(sum(pg_column_size(v.*)), 0) FROM {dictionary_table} AS v WHERE v.dataset_id = %s",
+            [dataset.id]
+        )
+        dictionary_size = cursor.fetchone()[0]
+    return rows, json_size, normalized_size, dictionary_size
+
+
+class Command(BaseCommand):
+    help = """Compares the storage size and the extraction query time of the json and the normalized columns
+of a dataset. The dataset has to be normalized with normalize_dataset_data first.
+Example: python3 manage.py compare_dataset_storage 12 --group gender --repeat 3"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", type=int, help="Id of the dataset to compare.")
+        parser.add_argument("--group", type=str, default=None, help="Primary group of the extraction, defaults to the first group.")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of times each query is run, the fastest run is reported.")
+
+    def run_query(self, indicator, normalized, repeat):
+        sql, params, _, _, decoders = grouped_totals_query(indicator, normalized=normalized)
+        durations = []
+        for _ in range(repeat):
+            with connection.cursor() as cursor:
+                start = time.perf_counter()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                durations.append(time.perf_counter() - start)
+
+        num_groups = len(decoders)
+        results = sorted((
+            (row[0], *[decode(value, decoder) for value, decoder in zip(row[1:1 + num_groups], decoders)], *row[1 + num_groups:])
+            for row in rows
+        ), key=repr)
+        return min(durations), results
+
+    def handle(self, *args, **options):
+        try:
+            dataset = Dataset.objects.get(pk=options["dataset"])
+        except Dataset.DoesNotExist:
+            raise CommandError(f"Dataset {options['dataset']} does not exist")
+
+        if len(dataset.groups) == 0:
+            raise CommandError(f"Dataset {dataset.name} has no groups")
+
+        if DatasetData.objects.filter(dataset=dataset, codes__isnull=True).exists():
+            raise CommandError(f"Dataset {dataset.name} is not normalized, run normalize_dataset_data first")
+
+        rows, json_size, normalized_size, dictionary_size = get_storage_sizes(dataset)
+        self.stdout.write(f"{rows} rows")
+        self.stdout.write(f"json data: {json_size / 1024 / 1024:.2f} MiB")
+        self.stdout.write(
+            f"normalized count and codes: {normalized_size / 1024 / 1024:.2f} MiB "
+            f"+ {dictionary_size / 1024 / 1024:.2f} MiB dictionary"
+        )
+
+        group = options["group"] or sorted(dataset.groups)[0]
+        indicator = Indicator(dataset=dataset, groups=[group], name="Storage comparison")
+
+        json_time, json_results = self.run_query(indicator, False, options["repeat"])
+        normalized_time, normalized_results = self.run_query(indicator, True, options["repeat"])
+        self.stdout.write(f"json extraction: {json_time:.2f}s")
+        self.stdout.write(f"normalized extraction: {normalized_time:.2f}s")
+
+        if json_results == normalized_results:
+            self.stdout.write("Both extractions returned the same totals")
+        else:
+            self.stderr.write("The extractions returned different totals")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wazimap_ng.datasets.models import Dataset
+from wazimap_ng.datasets.services.dataset_indexes import drop_dataset_indexes, update_dataset_indexes
+
+
+class Command(BaseCommand):
+    help = """Creates a partial index on every group key of the rows of each dataset and drops the indexes of groups
+the dataset no longer has. Uploads do this when DATASET_GROUP_INDEXES is set, this is needed for datasets uploaded before.
+Example: python3 manage.py index_dataset_groups --dataset 12 13"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", type=int, nargs="+", default=None, help="Only index these dataset ids.")
+        parser.add_argument("--drop", action="store_true", help="Drop the group indexes instead of creating them.")
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.order_by("id")
+        if options["dataset"] is not None:
+            datasets = datasets.filter(id__in=options["dataset"])
+
+        if not datasets.exists():
+            raise CommandError("No datasets found")
+
+        for dataset in datasets.iterator():
+            if options["drop"]:
+                dropped = drop_dataset_indexes(dataset.id)
+                self.stdout.write(f"{dataset.name} ({dataset.id}): dropped {len(dropped)} indexes")
+            else:
+                created, dropped = update_dataset_indexes(dataset)
+                self.stdout.write(
+                    f"{dataset.name} ({dataset.id}): created {len(created)} indexes, dropped {len(dropped)}"
+                )
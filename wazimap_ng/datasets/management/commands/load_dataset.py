@@ -19,22 +19,28 @@ class Command(BaseCommand):
         parser.add_argument('profile_name', type=str, help="Name of profile as it exists in the database (case sensisitve).")
         parser.add_argument('dataset_name', type=str, help="This is the name that will be used for the dataset.")
         parser.add_argument('filename', type=str, help="Path to the file to be uploaded.")
+        parser.add_argument(
+            '--sync', action='store_true',
+            help="Process the file in this command instead of a django-q worker. Chunks are then parsed by a pool of processes."
+        )
 
-    def load_file(self, profile, dataset_name, path):
+    def load_file(self, profile, dataset_name, path, sync=False):
         with atomic():
             dataset = Dataset.objects.create(profile=profile, name=dataset_name, geography_hierarchy=profile.geography_hierarchy)
             df = DatasetFile.objects.create(name=dataset_name, dataset_id=dataset.pk, document=File(path.open("rb")))
 
-            uuid = task = async_task(
-                "wazimap_ng.datasets.tasks.process_uploaded_file",
-                df, dataset,
-                task_name=f"Uploading data from command: {dataset.name}",
-                hook="wazimap_ng.datasets.hooks.process_task_info",
-                key="No session",
-                type="upload", assign=True, notify=False
-            )
+        # The pipeline workers use their own connections so the rows have to be committed first
+        uuid = task = async_task(
+            "wazimap_ng.datasets.tasks.process_uploaded_file",
+            df, dataset,
+            task_name=f"Uploading data from command: {dataset.name}",
+            hook="wazimap_ng.datasets.hooks.process_task_info",
+            key="No session",
+            type="upload", assign=True, notify=False,
+            sync=sync
+        )
 
-            return uuid
+        return uuid
 
     def handle(self, *args, **options):
         profile_name = options["profile_name"]
@@ -47,7 +53,7 @@ class Command(BaseCommand):
 
         try:
             profile = Profile.objects.get(name=profile_name)
-            uuid = self.load_file(profile, dataset_name, path)
+            uuid = self.load_file(profile, dataset_name, path, options["sync"])
 
         except Profile.DoesNotExist:
             profiles = ", ".join(p.name for p in Profile.objects.all())
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wazimap_ng.datasets.models import Dataset
+from wazimap_ng.datasets.services.normalization import normalize_dataset
+
+
+class Command(BaseCommand):
+    help = """Fills in the normalized count and codes columns of the rows of each dataset. Uploads do this when
+NORMALIZED_DATASET_STORAGE is set, this is needed for datasets uploaded before. Extraction only uses the normalized
+columns of datasets whose rows are all normalized.
+Example: python3 manage.py normalize_dataset_data --dataset 12 13"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dataset", type=int, nargs="+", default=None, help="Only normalize these dataset ids.")
+        parser.add_argument("--renormalize", action="store_true", help="Also normalize rows that were normalized before.")
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.order_by("id")
+        if options["dataset"] is not None:
+            datasets = datasets.filter(id__in=options["dataset"])
+
+        if not datasets.exists():
+            raise CommandError("No datasets found")
+
+        for dataset in datasets.iterator():
+            rows = normalize_dataset(dataset, renormalize=options["renormalize"])
+            self.stdout.write(f"{dataset.name} ({dataset.id}): normalized {rows} rows")
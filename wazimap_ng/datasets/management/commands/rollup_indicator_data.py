@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from wazimap_ng.datasets.models import Indicator
+from wazimap_ng.datasets.tasks.indicator_data_extraction import rollup_extraction
+
+
+class Command(BaseCommand):
+    help = """Rebuilds the IndicatorDataRollup rows from the existing IndicatorData without re-extracting it.
+Indicators are rolled up whenever they are extracted, this is only needed for data extracted before rollups existed.
+Example: python3 manage.py rollup_indicator_data --indicator 12 13"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--indicator", type=int, nargs="+", default=None, help="Only roll up these indicator ids.")
+
+    def handle(self, *args, **options):
+        indicators = Indicator.objects.order_by("id")
+        if options["indicator"] is not None:
+            indicators = indicators.filter(id__in=options["indicator"])
+
+        if not indicators.exists():
+            raise CommandError("No indicators found")
+
+        for indicator in indicators.iterator():
+            with transaction.atomic():
+                rollup_extraction(indicator)
+            self.stdout.write(f"{indicator.name} ({indicator.id}): rolled up")
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-18 09:12
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0110_metadata_url'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetfile',
+            name='progress',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.13 on 2026-10-18 10:41
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0111_datasetfile_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorDataRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('parent_path', models.CharField(blank=True, max_length=255)),
+                ('version', models.CharField(blank=True, max_length=20)),
+                ('subindicators', django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict)),
+                ('indicator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='datasets.Indicator', verbose_name='variable')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='indicatordatarollup',
+            constraint=models.UniqueConstraint(fields=('indicator', 'parent_path', 'version'), name='unique_indicator_data_rollup'),
+        ),
+    ]
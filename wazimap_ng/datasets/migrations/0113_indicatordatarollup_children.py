@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-18 12:07
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0112_indicatordatarollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicatordatarollup',
+            name='children',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
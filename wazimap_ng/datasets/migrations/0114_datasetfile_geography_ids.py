@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-18 16:42
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0113_indicatordatarollup_children'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetfile',
+            name='geography_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), blank=True, default=list, help_text='Geographies that rows were loaded for from this file.', size=None),
+        ),
+    ]
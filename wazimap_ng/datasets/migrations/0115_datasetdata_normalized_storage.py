@@ -0,0 +1,53 @@
+# Generated by Django 2.2.13 on 2026-10-18 17:25
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0114_datasetfile_geography_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetdata',
+            name='codes',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(null=True), blank=True, null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='datasetdata',
+            name='count',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='datasetdata',
+            index=models.Index(condition=models.Q(codes__isnull=True), fields=['dataset'], name='idx_datasetdata_unnormalized'),
+        ),
+        migrations.CreateModel(
+            name='DatasetGroupValue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('group', models.CharField(max_length=200)),
+                ('position', models.PositiveSmallIntegerField()),
+                ('code', models.PositiveIntegerField()),
+                ('value', models.TextField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='datasets.Dataset')),
+            ],
+            options={
+                'ordering': ['dataset', 'position', 'code'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='datasetgroupvalue',
+            constraint=models.UniqueConstraint(fields=('dataset', 'group', 'value'), name='unique_dataset_group_value'),
+        ),
+        migrations.AddConstraint(
+            model_name='datasetgroupvalue',
+            constraint=models.UniqueConstraint(fields=('dataset', 'position', 'code'), name='unique_dataset_group_code'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.13 on 2026-10-18 18:05
+
+import django.core.validators
+from django.db import migrations, models
+import wazimap_ng.datasets.models.upload
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0115_datasetdata_normalized_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='datasetfile',
+            name='document',
+            field=models.FileField(help_text='\n            Uploaded document should be less than 3000.0 MiB in size and \n            file extensions should be one of csv, xls, xlsx, parquet, arrow, feather.\n        ', upload_to=wazimap_ng.datasets.models.upload.get_file_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['csv', 'xls', 'xlsx', 'parquet', 'arrow', 'feather']), wazimap_ng.datasets.models.upload.file_size]),
+        ),
+    ]
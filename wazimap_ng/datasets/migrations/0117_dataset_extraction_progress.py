@@ -0,0 +1,19 @@
+# Generated by Django 2.2.13 on 2026-10-18 21:40
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0116_datasetfile_arrow_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='extraction_progress',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,7 +1,7 @@
 from .geography import Geography, GeographyHierarchy
 from .dataset import Dataset
-from .indicatordata import IndicatorData
-from .datasetdata import DatasetData
+from .indicatordata import IndicatorData, IndicatorDataRollup
+from .datasetdata import DatasetData, DatasetGroupValue
 from .indicator import Indicator
 from .universe import Universe
 from .metadata import MetaData
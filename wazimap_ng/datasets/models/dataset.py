@@ -1,5 +1,7 @@
-from django.db import models
-from django.contrib.postgres.fields import ArrayField
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.contrib.postgres.fields import ArrayField, JSONField
 
 from .geography import Geography, GeographyHierarchy
 from wazimap_ng.general.models import BaseModel
@@ -22,6 +24,7 @@ class Dataset(BaseModel):
     groups = ArrayField(models.CharField(max_length=200), blank=True, default=list)
     geography_hierarchy = models.ForeignKey(GeographyHierarchy, on_delete=models.CASCADE)
     permission_type = models.CharField(choices=PERMISSION_TYPES, max_length=32, default="private")
+    extraction_progress = JSONField(default=dict, blank=True)
 
     objects = DatasetQuerySet.as_manager()
 
@@ -30,3 +33,12 @@ class Dataset(BaseModel):
 
     class Meta:
         ordering = ["id"]
+
+
+@receiver(post_delete, sender=Dataset)
+def dataset_deleted(sender, instance, **kwargs):
+    # Registered here rather than in cache.py so that deletes run by task workers drop the indexes too
+    from ..services.dataset_indexes import drop_dataset_indexes
+    dataset_id = instance.id
+    # Outside of the delete's transaction the indexes are dropped concurrently
+    transaction.on_commit(lambda: drop_dataset_indexes(dataset_id))
@@ -1,5 +1,5 @@
 from django.db import models
-from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields import JSONField, ArrayField
 
 from .dataset import Dataset
 from .geography import Geography
@@ -10,12 +10,22 @@ from django.db.models.functions import Cast
 from django.contrib.postgres.fields.jsonb import KeyTextTransform
 
 
+def get_universe_filter(universe):
+    """
+    Returns the filters of the universe as a Q on DatasetData, or None if the universe
+    has no filters. Filter keys can use lookups, e.g. {"age__gte": 18}.
+    """
+    filters = universe.filters
+    if filters and isinstance(filters, dict):
+        return models.Q(**{f"data__{k}": v for k, v in filters.items()})
+    return None
+
+
 class DatasetDataQuerySet(models.QuerySet):
     def filter_by_universe(self, universe):
-        filters = universe.filters
-        if filters and isinstance(filters, dict):
-            filters = {f"data__{k}": v for k, v in filters.items()}
-            return self.filter(**filters)
+        universe_filter = get_universe_filter(universe)
+        if universe_filter is not None:
+            return self.filter(universe_filter)
         else:
             return self
 
@@ -42,8 +52,40 @@ class DatasetData(BaseModel):
     dataset = models.ForeignKey(Dataset, null=True, on_delete=models.CASCADE)
     geography = models.ForeignKey(Geography, on_delete=models.CASCADE)
     data = JSONField()
+    # Normalized copies of data, see DatasetGroupValue. codes is NULL until the row is normalized
+    count = models.FloatField(null=True, blank=True)
+    codes = ArrayField(models.IntegerField(null=True), null=True, blank=True)
 
     objects = DatasetDataQuerySet.as_manager()
 
     class Meta:
-        ordering = ["id"]
\ No newline at end of file
+        ordering = ["id"]
+        indexes = [
+            models.Index(
+                fields=["dataset"], name="idx_datasetdata_unnormalized", condition=models.Q(codes__isnull=True)
+            ),
+        ]
+
+
+class DatasetGroupValue(BaseModel):
+    """
+    Dictionary of the values of a group in a dataset. Normalized DatasetData rows hold
+    the code of the value of every group in codes, at the position of the group. A
+    NULL code means the row doesn't have the group. value is the json text of the
+    value so that it can be compared with CAST(data -> group AS text).
+    """
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE)
+    group = models.CharField(max_length=200)
+    position = models.PositiveSmallIntegerField()
+    code = models.PositiveIntegerField()
+    value = models.TextField()
+
+    def __str__(self):
+        return f"{self.dataset.name}|{self.group}|{self.value}"
+
+    class Meta:
+        ordering = ["dataset", "position", "code"]
+        constraints = [
+            models.UniqueConstraint(fields=["dataset", "group", "value"], name="unique_dataset_group_value"),
+            models.UniqueConstraint(fields=["dataset", "position", "code"], name="unique_dataset_group_code"),
+        ]
\ No newline at end of file
@@ -21,3 +21,29 @@ class IndicatorData(BaseModel):
         verbose_name_plural = "Indicator Data items"
 
 
+
+class IndicatorDataRollup(BaseModel):
+    """
+    Aggregates of IndicatorData over the children of a parent geography, refreshed
+    whenever the indicator is extracted. Root geographies are grouped under an empty
+    parent_path. subindicators holds the totals of every subindicator across the
+    children which is the denominator used for sibling comparisons. children holds the
+    data of every child keyed by geography code.
+    """
+    indicator = models.ForeignKey(Indicator, on_delete=models.CASCADE, verbose_name="variable")
+    parent_path = models.CharField(max_length=255, blank=True)
+    version = models.CharField(max_length=20, blank=True)
+    subindicators = JSONField(default=dict, blank=True)
+    children = JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"{self.indicator.name} - {self.parent_path or 'root'} ({self.version})"
+
+    @staticmethod
+    def get_parent_path(path, depth):
+        return path[:(depth - 1) * Geography.steplen]
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["indicator", "parent_path", "version"], name="unique_indicator_data_rollup")
+        ]
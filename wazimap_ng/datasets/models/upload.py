@@ -11,16 +11,19 @@ from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
-from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.fields import JSONField, ArrayField
 from django_q.models import Task
 from .dataset import Dataset
 
 from wazimap_ng import utils
 from wazimap_ng.general.models import BaseModel
+from wazimap_ng.general.services.arrow_reader import is_arrow_file, read_arrow_columns
 
 
 max_filesize = getattr(settings, "FILE_SIZE_LIMIT", 1024 * 1024 * 20)
-allowed_file_extensions = getattr(settings, "ALLOWED_FILE_EXTENSIONS", ["xls", "xlsx", "csv"])
+allowed_file_extensions = getattr(
+    settings, "ALLOWED_FILE_EXTENSIONS", ["xls", "xlsx", "csv", "parquet", "arrow", "feather"]
+)
 
 def file_size(value):
     if value.size > max_filesize:
@@ -45,6 +48,11 @@ class DatasetFile(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.SET_NULL, blank=True, null=True)
     name = name = models.CharField(max_length=60)
     dataset_id = models.PositiveSmallIntegerField(null=True, blank=True)
+    progress = JSONField(default=dict, blank=True)
+    geography_ids = ArrayField(
+        models.PositiveIntegerField(), default=list, blank=True,
+        help_text="Geographies that rows were loaded for from this file."
+    )
 
 
     def __str__(self):
@@ -63,6 +71,8 @@ class DatasetFile(BaseModel):
                 headers = pd.read_excel(book, nrows=1, dtype=str).columns.str.lower()
             elif "csv" in document_name:
                 headers = pd.read_csv(BytesIO(self.document.read()), nrows=1, dtype=str).columns.str.lower()
+            elif is_arrow_file(document_name):
+                headers = read_arrow_columns(self.document)
         except pd.errors.ParserError as e:
             raise ValidationError(
                 "Not able to parse passed file. Error while reading file: %s" % str(e)
@@ -71,6 +81,11 @@ class DatasetFile(BaseModel):
             raise ValidationError(
                 "File seems to be empty. Error while reading file: %s" % str(e)
             )
+        except ValueError as e:
+            # Raised by pyarrow for files that are not parquet or arrow, or when it is not installed
+            raise ValidationError(
+                "Not able to parse passed file. Error while reading file: %s" % str(e)
+            )
 
         required_headers = ["geography", "count"]
 
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+
+from django.db import connection
+
+from ..models import DatasetData
+
+logger = logging.getLogger(__name__)
+
+
+def get_index_prefix(dataset_id):
+    return f"idx_datasetdata_{dataset_id}_"
+
+
+def get_group_index_name(dataset_id, group):
+    # Group names are free text so they are hashed to keep index names valid and short
+    digest = hashlib.md5(group.encode("utf8")).hexdigest()[:10]
+    return f"{get_index_prefix(dataset_id)}{digest}"
+
+
+def get_dataset_indexes(dataset_id, include_invalid=False):
+    """
+    Returns the names of the group indexes that exist for the dataset. A concurrent build
+    that fails leaves an invalid index behind which queries don't use, those are only
+    returned with include_invalid.
+    """
+    pattern = get_index_prefix(dataset_id).replace("_", "\\_") + "%"
+    valid = "" if include_invalid else "AND i.indisvalid"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+                SELECT c.relname FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indexrelid
+                JOIN pg_class t ON t.oid = i.indrelid
+                WHERE t.relname = %s AND c.relname LIKE %s {valid}
+            """,
+            [DatasetData._meta.db_table, pattern]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def create_group_index(dataset_id, group):
+    """
+    Creates a partial expression index on the (data -> group) key of the rows of a dataset.
+    This is the expression used when DatasetData is filtered, grouped or made distinct on
+    a group. The index is built concurrently unless we are in a transaction.
+    """
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY "
+    name = connection.ops.quote_name(get_group_index_name(dataset_id, group))
+    table = connection.ops.quote_name(DatasetData._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ((data -> %s)) WHERE dataset_id = %s",
+            [group, int(dataset_id)]
+        )
+
+
+def drop_index(name):
+    concurrently = "" if connection.in_atomic_block else "CONCURRENTLY "
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {concurrently}IF EXISTS {connection.ops.quote_name(name)}")
+
+
+def update_dataset_indexes(dataset):
+    """
+    Creates an index for every group of the dataset and drops the indexes of groups that
+    the dataset no longer has. Returns the names of the created and dropped indexes.
+    """
+    existing = get_dataset_indexes(dataset.id)
+    invalid = get_dataset_indexes(dataset.id, include_invalid=True) - existing
+    wanted = {get_group_index_name(dataset.id, group): group for group in dataset.groups}
+
+    created = []
+    for name, group in wanted.items():
+        if name not in existing:
+            if name in invalid:
+                # IF NOT EXISTS would skip the build because the invalid index has the same name
+                logger.debug(f"Dropping invalid index {name}")
+                drop_index(name)
+            logger.debug(f"Creating index {name} for {dataset.name} -> {group}")
+            create_group_index(dataset.id, group)
+            created.append(name)
+
+    dropped = sorted((existing | invalid) - wanted.keys())
+    for name in dropped:
+        drop_index(name)
+
+    return created, dropped
+
+
+def drop_dataset_indexes(dataset_id):
+    names = sorted(get_dataset_indexes(dataset_id, include_invalid=True))
+    for name in names:
+        logger.debug(f"Dropping index {name}")
+        drop_index(name)
+    return names
@@ -0,0 +1,86 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from wazimap_ng.cache import get_tag_versions, geography_codes_tag
+
+from ..models import Geography
+
+logger = logging.getLogger(__name__)
+
+_code_maps = OrderedDict()
+_lock = threading.Lock()
+
+
+def load_code_map(version):
+    return dict(Geography.objects.filter(version=version).values_list("code", "id").iterator())
+
+
+def get_entry(version):
+    """
+    Returns the code map of the version and the geographies that were resolved from it.
+    """
+    tag_version = get_tag_versions([geography_codes_tag % version])[0]
+
+    with _lock:
+        cached = _code_maps.get(version)
+        if cached is not None and cached[0] == tag_version:
+            _code_maps.move_to_end(version)
+            return cached[1:]
+
+    logger.debug(f"Loading geography codes for version: {version}")
+    code_map = load_code_map(version)
+    geographies = {}
+
+    with _lock:
+        _code_maps[version] = (tag_version, code_map, geographies)
+        _code_maps.move_to_end(version)
+        max_versions = getattr(settings, "GEOGRAPHY_RESOLVER_MAX_VERSIONS", 4)
+        while len(_code_maps) > max_versions:
+            _code_maps.popitem(last=False)
+
+    return code_map, geographies
+
+
+def get_code_map(version):
+    """
+    Returns a {code: id} dict of every geography in this version. Maps are loaded with a single
+    query and kept for the most recently used versions only. A map is reloaded when a geography
+    in its version is saved or deleted, on any node sharing the cache.
+    """
+    return get_entry(version)[0]
+
+
+def resolve(code, version):
+    """
+    Returns the id of the geography with this code. Raises Geography.DoesNotExist if there is none.
+    """
+    try:
+        return get_code_map(version)[code]
+    except KeyError:
+        raise Geography.DoesNotExist(f"Geography matching code {code} and version {version} does not exist")
+
+
+def resolve_geography(code, version):
+    """
+    Returns the geography with this code. Geographies are loaded once and kept with the code map
+    of their version, so they are reloaded together with it. Raises Geography.DoesNotExist if
+    there is none.
+    """
+    code_map, geographies = get_entry(version)
+    try:
+        geography_id = code_map[code]
+    except KeyError:
+        raise Geography.DoesNotExist(f"Geography matching code {code} and version {version} does not exist")
+
+    geography = geographies.get(geography_id)
+    if geography is None:
+        geography = geographies[geography_id] = Geography.objects.get(pk=geography_id)
+    return geography
+
+
+def clear():
+    with _lock:
+        _code_maps.clear()
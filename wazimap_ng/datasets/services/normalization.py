@@ -0,0 +1,154 @@
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+
+from ..models import DatasetData, DatasetGroupValue
+
+logger = logging.getLogger(__name__)
+
+JSON_COUNT = "CAST(data ->> 'count' AS double precision)"
+
+
+def get_group_positions(dataset_id):
+    return dict(
+        DatasetGroupValue.objects.filter(dataset_id=dataset_id)
+        .order_by().values_list("group", "position").distinct()
+    )
+
+
+def add_group_values(dataset, group, position):
+    """
+    Adds the values of the group that are not in the dictionary yet, coded after the
+    existing ones.
+    """
+    max_code = (DatasetGroupValue.objects
+        .filter(dataset=dataset, group=group)
+        .aggregate(code=Max("code"))["code"] or 0
+    )
+    datasetdata_table = connection.ops.quote_name(DatasetData._meta.db_table)
+    dictionary_table = connection.ops.quote_name(DatasetGroupValue._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {dictionary_table} (created, updated, dataset_id, "group", position, code, value)
+            SELECT now(), now(), %s, %s, %s, %s + row_number() OVER (ORDER BY value), value
+            FROM (
+                SELECT DISTINCT CAST(data -> %s AS text) AS value
+                FROM {datasetdata_table}
+                WHERE dataset_id = %s AND data ? %s
+            ) AS dataset_values
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {dictionary_table} AS existing
+                WHERE existing.dataset_id = %s AND existing."group" = %s AND existing.value = dataset_values.value
+            )
+        """, [dataset.id, group, position, max_code, group, dataset.id, group, dataset.id, group])
+        return cursor.rowcount
+
+
+@transaction.atomic
+def normalize_dataset(dataset, renormalize=False):
+    """
+    Fills in count and codes for the rows of the dataset that are not normalized yet, or
+    for every row when renormalize is True. Groups keep their position once they have
+    values, so rows normalized before a group was added simply have no code for it.
+    Returns the number of rows that were normalized.
+    """
+    positions = get_group_positions(dataset.id)
+    next_position = max(positions.values(), default=-1) + 1
+    for group in sorted(set(dataset.groups)):
+        position = positions.get(group, next_position)
+        added = add_group_values(dataset, group, position)
+        logger.debug(f"Added {added} values for {dataset.name} -> {group}")
+        if group not in positions and added > 0:
+            positions[group] = position
+            next_position += 1
+
+    groups = {position: group for group, position in positions.items()}
+    datasetdata_table = connection.ops.quote_name(DatasetData._meta.db_table)
+    dictionary_table = connection.ops.quote_name(DatasetGroupValue._meta.db_table)
+
+    codes = []
+    params = []
+    for position in range(max(groups, default=-1) + 1):
+        if position not in groups:
+            codes.append("NULL")
+            continue
+        codes.append(f"""(
+            SELECT v.code FROM {dictionary_table} AS v
+            WHERE v.dataset_id = %s AND v.position = %s AND v.value = CAST(d.data -> %s AS text)
+        )""")
+        params += [dataset.id, position, groups[position]]
+
+    sql = f"""
+        UPDATE {datasetdata_table} AS d
+        SET count = CAST(NULLIF(d.data ->> 'count', '') AS double precision),
+            codes = CAST(ARRAY[{", ".join(codes)}] AS integer[])
+        WHERE d.dataset_id = %s
+    """
+    params.append(dataset.id)
+    if not renormalize:
+        sql += " AND d.codes IS NULL"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def is_normalized(dataset):
+    """
+    Normalized columns are used for extraction when NORMALIZED_DATASET_STORAGE is set and
+    every row of the dataset is normalized.
+    """
+    if not getattr(settings, "NORMALIZED_DATASET_STORAGE", False):
+        return False
+    return not DatasetData.objects.filter(dataset=dataset, codes__isnull=True).exists()
+
+
+def get_decoders(dataset_id):
+    """
+    Returns {position: {code: value}} for the groups of the dataset.
+    """
+    decoders = {}
+    values = DatasetGroupValue.objects.filter(dataset_id=dataset_id).values_list("position", "code", "value")
+    for position, code, value in values.iterator():
+        decoders.setdefault(position, {})[code] = value
+    return decoders
+
+
+def get_group_columns(dataset, groups, normalized):
+    """
+    Returns the DatasetData fields to select, an expression for each group and its
+    parameters, the count expression and a decoder for each group. Every group
+    expression returns the json text of the value of the group, or a code that the
+    decoder maps to it when the dataset is normalized.
+    """
+    if not normalized:
+        expressions = ["CAST(data -> %s AS text)" for _ in groups]
+        return ["geography_id", "data"], expressions, list(groups), JSON_COUNT, [None] * len(groups)
+
+    positions = get_group_positions(dataset.id)
+    decoders = get_decoders(dataset.id)
+    expressions = [
+        f"codes[{int(positions[group]) + 1}]" if group in positions else "CAST(NULL AS integer)"
+        for group in groups
+    ]
+    group_decoders = [decoders.get(positions.get(group), {}) for group in groups]
+    return ["geography_id", "codes", "count"], expressions, [], "count", group_decoders
+
+
+def exclude_empty_counts(queryset, normalized):
+    """
+    Excludes the rows without a count, read from the count column when the dataset is
+    normalized so that the json data isn't read.
+    """
+    if normalized:
+        return queryset.filter(count__isnull=False)
+    return queryset.exclude(data__count="")
+
+
+def decode(value, decoder):
+    if decoder is None or value is None:
+        return value
+    return decoder[value]
@@ -3,4 +3,6 @@ from .process_uploaded_file import process_file_data
 from .process_uploaded_file import process_csv
 
 from .indicator_data_extraction import indicator_data_extraction
+from .dataset_indicator_extraction import dataset_indicator_extraction
+from .dataset_indicator_extraction import incremental_indicator_extraction
 from .delete_data import delete_data
\ No newline at end of file
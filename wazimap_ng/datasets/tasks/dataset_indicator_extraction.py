@@ -0,0 +1,253 @@
+import json
+import logging
+
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, Value, When
+
+from wazimap_ng.cache import update_indicator_profiles
+
+from .. import models
+from ..models.datasetdata import get_universe_filter
+from ..services.normalization import decode, exclude_empty_counts, get_group_columns, is_normalized
+from .indicator_data_extraction import (
+    DataAccumulator, get_dataset_data, extract_indicator_data, rollup_extraction
+)
+from .upload_pipeline import update_progress
+
+logger = logging.getLogger(__name__)
+
+
+def get_universe_key(universe):
+    """
+    Indicators whose universes have the same filters share a total.
+    """
+    if universe is None or not universe.filters or not isinstance(universe.filters, dict):
+        return None
+    return json.dumps(universe.filters, sort_keys=True)
+
+
+def dataset_totals_query(dataset, indicators, geography_ids=None, normalized=False):
+    """
+    Builds a single query that returns the totals needed by every indicator of the dataset
+    for every geography. This extends grouped_totals_query to several primary groups and
+    universes. Each row contains:
+
+    geography_id, one column per group (NULL unless the row belongs to a grouping set of
+    that group), one GROUPING() flag per group and one total per universe, filtered with
+    SUM(...) FILTER (WHERE ...).
+
+    Returns the query, its parameters, the group of every column, the universe key of
+    every total and the decoder of every column, see grouped_totals_query.
+    """
+    groups = list(dict.fromkeys(dataset.groups))
+    primary_groups = list(dict.fromkeys(indicator.groups[0] for indicator in indicators))
+    columns = groups + [group for group in primary_groups if group not in groups]
+    names = [f"g{idx}" for idx in range(len(columns))]
+    fields, expressions, expression_params, count, decoders = get_group_columns(dataset, columns, normalized)
+
+    grouping_sets = {}
+    for primary_group in primary_groups:
+        primary_idx = columns.index(primary_group)
+        if primary_group in groups:
+            grouping_sets[frozenset([primary_idx])] = None
+        for idx, group in enumerate(groups):
+            if group != primary_group:
+                grouping_sets[frozenset([primary_idx, idx])] = None
+
+    universes = {}
+    for indicator in indicators:
+        universes.setdefault(get_universe_key(indicator.universe), indicator.universe)
+
+    # Universe filters go through the ORM so that lookups such as age__gte are supported
+    totals = []
+    conditions = {}
+    for idx, (key, universe) in enumerate(universes.items()):
+        if key is None:
+            totals.append("SUM(row_count)")
+            continue
+        conditions[f"u{idx}"] = Case(
+            When(get_universe_filter(universe), then=Value(True)),
+            default=Value(False), output_field=BooleanField()
+        )
+        totals.append(f"SUM(row_count) FILTER (WHERE u{idx})")
+
+    qs = get_dataset_data(indicators[0], geography_ids)
+    qs = exclude_empty_counts(qs, normalized).order_by().annotate(**conditions).values(*fields, *conditions)
+    base_sql, base_params = qs.query.sql_with_params()
+
+    universe_columns = "".join(f"{name}, " for name in conditions)
+    extract_columns = ", ".join(f"{expression} AS {name}" for expression, name in zip(expressions, names))
+    grouping_flags = ", ".join(f"GROUPING({name})" for name in names)
+    sets = ", ".join(
+        "(geography_id, " + ", ".join(names[idx] for idx in sorted(grouping_set)) + ")"
+        for grouping_set in grouping_sets
+    )
+
+    sql = f"""
+        SELECT geography_id, {", ".join(names)}, {grouping_flags}, {", ".join(totals)}
+        FROM (
+            SELECT geography_id, {universe_columns}{extract_columns}, {count} AS row_count
+            FROM ({base_sql}) AS dataset_data
+        ) AS dataset_rows
+        GROUP BY GROUPING SETS ({sets})
+        ORDER BY geography_id
+    """
+    params = [*expression_params, *base_params]
+
+    return sql, params, columns, list(universes), decoders
+
+
+def dataset_data_extraction(dataset, indicators, geography_ids=None, batch_size=1000):
+    """
+    Computes the IndicatorData of several single group indicators of a dataset in a single
+    pass over DatasetData. The result is the same as running grouped_data_extraction for
+    each of them. Existing IndicatorData must be deleted beforehand.
+    """
+    if len(indicators) == 0 or len(dataset.groups) == 0:
+        return
+
+    sql, params, columns, universe_keys, decoders = dataset_totals_query(
+        dataset, indicators, geography_ids, normalized=is_normalized(dataset)
+    )
+    num_columns = len(columns)
+    targets = [
+        (indicator, columns.index(indicator.groups[0]), universe_keys.index(get_universe_key(indicator.universe)))
+        for indicator in indicators
+    ]
+
+    datarows = []
+    accumulators = {}
+
+    def flush(force=False):
+        for indicator_id, accumulator in accumulators.items():
+            datarows.append(models.IndicatorData(
+                indicator_id=indicator_id, geography_id=accumulator.geography_id, data=accumulator.data
+            ))
+        accumulators.clear()
+        if force or len(datarows) >= batch_size:
+            models.IndicatorData.objects.bulk_create(datarows, batch_size)
+            datarows.clear()
+
+    geography_id = None
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor:
+            if row[0] != geography_id:
+                flush()
+                geography_id = row[0]
+
+            values = [decode(value, decoder) for value, decoder in zip(row[1:1 + num_columns], decoders)]
+            flags = row[1 + num_columns:1 + 2 * num_columns]
+            counts = row[1 + 2 * num_columns:]
+            grouped = [idx for idx, flag in enumerate(flags) if flag == 0]
+
+            for indicator, primary_idx, universe_idx in targets:
+                count = counts[universe_idx]
+                if count is None or primary_idx not in grouped:
+                    continue
+
+                other = [idx for idx in grouped if idx != primary_idx]
+                accumulator = accumulators.get(indicator.id)
+                if accumulator is None:
+                    accumulator = accumulators[indicator.id] = DataAccumulator(geography_id)
+
+                primary_value = values[primary_idx]
+                if primary_value is not None:
+                    primary_value = json.loads(primary_value)
+
+                if not other:
+                    # A missing primary group key is not a subindicator
+                    if values[primary_idx] is not None:
+                        accumulator.add_subindicator_count(primary_value, count)
+                elif values[other[0]] is not None:
+                    accumulator.add_count(
+                        columns[other[0]], json.loads(values[other[0]]),
+                        {columns[primary_idx]: primary_value, "count": count}
+                    )
+
+    flush(force=True)
+
+
+def update_extraction_progress(dataset, **progress):
+    dataset.extraction_progress = {**(dataset.extraction_progress or {}), **progress}
+    models.Dataset.objects.filter(pk=dataset.pk).update(extraction_progress=dataset.extraction_progress)
+
+
+def dataset_indicator_extraction(dataset, geography_ids=None, dataset_file=None, **kwargs):
+    """
+    Extracts the IndicatorData of every indicator of the dataset. Indicators with a single
+    group are extracted together in one scan of DatasetData, the others one at a time.
+    Progress is reported per indicator on the dataset, and on the uploaded file when one
+    is passed. Every step commits on its own so that the progress is visible while the
+    extraction runs.
+
+    When geography_ids is passed only those geographies are re-extracted. The profiles
+    that show the indicators are updated once the extraction commits.
+    """
+    indicators = list(dataset.indicator_set.select_related("universe").order_by("id"))
+    total = len(indicators)
+
+    # Progress of a previous extraction is replaced
+    dataset.extraction_progress = {}
+
+    def report(**progress):
+        logger.info(f"Extracting {dataset.name}: {progress}")
+        update_extraction_progress(dataset, indicators_total=total, **progress)
+        if dataset_file is not None:
+            update_progress(dataset_file, indicators_total=total, **progress)
+
+    grouped = [indicator for indicator in indicators if len(indicator.groups) == 1]
+    others = [indicator for indicator in indicators if len(indicator.groups) != 1]
+
+    report(extraction_status="extracting", indicators_done=0)
+
+    with transaction.atomic():
+        indicator_data = models.IndicatorData.objects.filter(indicator__in=grouped)
+        if geography_ids is not None:
+            indicator_data = indicator_data.filter(geography_id__in=geography_ids)
+        indicator_data.delete()
+
+        dataset_data_extraction(dataset, grouped, geography_ids)
+
+    done = 0
+    for indicator in grouped:
+        with transaction.atomic():
+            rollup_extraction(indicator, geography_ids=geography_ids)
+        done += 1
+        report(indicators_done=done, indicator=indicator.name)
+
+    for indicator in others:
+        with transaction.atomic():
+            extract_indicator_data(indicator, geography_ids=geography_ids)
+        done += 1
+        report(indicators_done=done, indicator=indicator.name)
+
+    report(extraction_status="done")
+
+    indicator_ids = [indicator.id for indicator in indicators]
+    transaction.on_commit(lambda: update_indicator_profiles(indicator_ids))
+
+    return {
+        "model": "dataset",
+        "name": dataset.name,
+        "id": dataset.id,
+        "indicators": [indicator.id for indicator in indicators],
+    }
+
+
+def incremental_indicator_extraction(dataset_file, **kwargs):
+    """
+    Re-extracts the indicators of the dataset of an uploaded file for the geographies
+    the file loaded rows for.
+    """
+    dataset = models.Dataset.objects.get(pk=dataset_file.dataset_id)
+    geography_ids = list(dataset_file.geography_ids)
+    if not geography_ids:
+        return {
+            "model": "dataset",
+            "name": dataset.name,
+            "id": dataset.id,
+            "indicators": [],
+        }
+
+    return dataset_indicator_extraction(dataset, geography_ids=geography_ids, dataset_file=dataset_file)
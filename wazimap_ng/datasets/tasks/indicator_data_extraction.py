@@ -2,12 +2,16 @@ import json
 import logging
 from collections import defaultdict
 
-from django.db import transaction
-from django.db.models import Sum, FloatField
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Sum, FloatField
 from django.db.models.functions import Cast
 from django.contrib.postgres.fields.jsonb import KeyTextTransform
 
+from wazimap_ng.cache import update_indicator_profiles
+
 from .. import models
+from ..services.normalization import decode, exclude_empty_counts, get_group_columns, is_normalized
 from itertools import groupby
 
 logger = logging.getLogger(__name__)
@@ -38,6 +42,12 @@ class DataAccumulator:
 
         self.data["subindicators"] = subindicators
 
+    def add_count(self, group, subindicator, datum):
+        self.data["groups"][group].setdefault(subindicator, []).append(datum)
+
+    def add_subindicator_count(self, subindicator, count):
+        self.data["subindicators"][subindicator] = count
+
 class Sorter:
     def __init__(self):
         self.accumulators = {}
@@ -63,17 +73,54 @@ class Sorter:
             accumulator.add_subindicator(datum["data"])
 
 
+def get_dataset_data(indicator, geography_ids=None):
+    qs = models.DatasetData.objects.filter(dataset=indicator.dataset)
+    if geography_ids is not None:
+        qs = qs.filter(geography_id__in=geography_ids)
+    return qs
+
 @transaction.atomic
-def indicator_data_extraction(indicator, **kwargs):
+def indicator_data_extraction(indicator, geography_ids=None, **kwargs):
+    """
+    Extracts the IndicatorData of the indicator. When geography_ids is passed only the
+    data and rollups of those geographies are recomputed, the rest is left untouched.
+    The profiles that show the indicator are updated once the extraction commits.
+    """
+    extract_indicator_data(indicator, geography_ids)
+
+    transaction.on_commit(lambda: update_indicator_profiles([indicator.id]))
+
+    return {
+        "model": "indicator",
+        "name": indicator.name,
+        "id": indicator.id,
+    }
+
+def extract_indicator_data(indicator, geography_ids=None):
+    indicator_data = models.IndicatorData.objects.filter(indicator=indicator)
+    if geography_ids is not None:
+        indicator_data = indicator_data.filter(geography_id__in=geography_ids)
+    indicator_data.delete()
+
+    if getattr(settings, "GROUPING_SETS_EXTRACTION", False) and len(indicator.groups) == 1:
+        grouped_data_extraction(indicator, geography_ids=geography_ids)
+    else:
+        subindicator_data_extraction(indicator, geography_ids=geography_ids)
+
+    rollup_extraction(indicator, geography_ids=geography_ids)
+
+def subindicator_data_extraction(indicator, geography_ids=None):
+    """
+    Runs a separate aggregate query for every subindicator of every group.
+    """
     sorter = Sorter()
     primary_group = indicator.groups[0] # TODO ensure that we only ever have one primary group. Probably need to change the model
 
-    models.IndicatorData.objects.filter(indicator=indicator).delete()
     groups = ["data__" + i for i in indicator.dataset.groups]
 
     for group in indicator.dataset.groups:
         logger.debug(f"Extracting subindicators for: {group}")
-        qs = models.DatasetData.objects.filter(dataset=indicator.dataset, data__has_keys=[group])
+        qs = get_dataset_data(indicator, geography_ids).filter(data__has_keys=[group])
         if group != primary_group:
             subindicators = qs.get_unique_subindicators(group)
 
@@ -97,11 +144,184 @@ def indicator_data_extraction(indicator, **kwargs):
 
     models.IndicatorData.objects.bulk_create(datarows, 1000)
 
+def grouped_totals_query(indicator, geography_ids=None, normalized=False):
+    """
+    Builds a single query that returns the totals of every group/subindicator pair
+    for every geography using GROUPING SETS. Each row contains:
+
+    geography_id, primary group value, one column per other group (NULL unless the row
+    belongs to that group's grouping set), one GROUPING() flag per other group and the count.
+
+    Group values are returned as json text so that a key which is missing (SQL NULL) can be
+    told apart from a key that is set to null. When normalized is True the query aggregates
+    the normalized count and codes columns and values are codes that the returned decoders
+    map back to json text.
+    """
+    primary_group = indicator.groups[0]
+    other_groups = [g for g in dict.fromkeys(indicator.dataset.groups) if g != primary_group]
+    fields, expressions, expression_params, count, decoders = get_group_columns(
+        indicator.dataset, [primary_group, *other_groups], normalized
+    )
+
+    qs = get_dataset_data(indicator, geography_ids)
+    if indicator.universe is not None:
+        qs = qs.filter_by_universe(indicator.universe)
+    qs = exclude_empty_counts(qs, normalized).order_by().values(*fields)
+    base_sql, base_params = qs.query.sql_with_params()
+
+    columns = [f"g{idx}" for idx in range(len(other_groups) + 1)]
+    group_columns = columns[1:]
+
+    grouping_sets = [f"(geography_id, {columns[0]}, {column})" for column in group_columns]
+    if primary_group in indicator.dataset.groups:
+        grouping_sets.insert(0, f"(geography_id, {columns[0]})")
+
+    extract_columns = ", ".join(
+        f"{expression} AS {column}" for expression, column in zip(expressions, columns)
+    )
+    grouping_flags = "".join(f", GROUPING({column})" for column in group_columns)
+
+    sql = f"""
+        SELECT geography_id, {", ".join(columns)}{grouping_flags}, SUM(row_count) AS count
+        FROM (
+            SELECT geography_id, {extract_columns}, {count} AS row_count
+            FROM ({base_sql}) AS dataset_data
+        ) AS dataset_rows
+        GROUP BY GROUPING SETS ({", ".join(grouping_sets)})
+        ORDER BY geography_id
+    """
+    params = [*expression_params, *base_params]
+
+    return sql, params, primary_group, other_groups, decoders
+
+def grouped_data_extraction(indicator, batch_size=1000, geography_ids=None):
+    """
+    Computes the same IndicatorData as subindicator_data_extraction in a single pass over
+    DatasetData. Rows are streamed ordered by geography so only one geography is held in
+    memory at a time.
+    """
+    if len(indicator.dataset.groups) == 0:
+        return
+
+    sql, params, primary_group, other_groups, decoders = grouped_totals_query(
+        indicator, geography_ids, normalized=is_normalized(indicator.dataset)
+    )
+    num_groups = len(other_groups)
+
+    datarows = []
+    accumulator = None
+
+    def flush(force=False):
+        if force or len(datarows) >= batch_size:
+            models.IndicatorData.objects.bulk_create(datarows, batch_size)
+            datarows.clear()
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(sql, params)
+        for row in cursor:
+            geography_id = row[0]
+            primary_value, *values = [
+                decode(value, decoder) for value, decoder in zip(row[1:2 + num_groups], decoders)
+            ]
+            flags = row[2 + num_groups:2 + 2 * num_groups]
+            count = row[-1]
+
+            if accumulator is None or accumulator.geography_id != geography_id:
+                if accumulator is not None:
+                    datarows.append(models.IndicatorData(
+                        indicator=indicator, geography_id=accumulator.geography_id, data=accumulator.data
+                    ))
+                    flush()
+                accumulator = DataAccumulator(geography_id)
+
+            if primary_value is not None:
+                primary_value = json.loads(primary_value)
+
+            group_idx = next((idx for idx, flag in enumerate(flags) if flag == 0), None)
+            if group_idx is None:
+                # A missing primary group key is not a subindicator
+                if row[1] is not None:
+                    accumulator.add_subindicator_count(primary_value, count)
+            elif values[group_idx] is not None:
+                subindicator = json.loads(values[group_idx])
+                accumulator.add_count(
+                    other_groups[group_idx], subindicator, {primary_group: primary_value, "count": count}
+                )
+
+    if accumulator is not None:
+        datarows.append(models.IndicatorData(
+            indicator=indicator, geography_id=accumulator.geography_id, data=accumulator.data
+        ))
+    flush(force=True)
+
+def get_affected_parents(geography_ids):
+    """
+    Returns the (parent_path, version) of the rollups that hold the geographies.
+    """
+    geographies = models.Geography.objects.filter(id__in=geography_ids).values_list("path", "depth", "version")
     return {
-        "model": "indicator",
-        "name": indicator.name,
-        "id": indicator.id,
-    }           
+        (models.IndicatorDataRollup.get_parent_path(path, depth), version)
+        for path, depth, version in geographies
+    }
+
+def rollup_extraction(indicator, batch_size=100, geography_ids=None):
+    """
+    Aggregates the extracted IndicatorData per parent geography. Each rollup holds the
+    subindicator totals across the children, used as the sibling denominator, and the
+    data of every child keyed by geography code so that the children of a geography
+    can be read from a single row. When geography_ids is passed only the rollups of
+    their parents are rebuilt.
+    """
+    stale = models.IndicatorDataRollup.objects.filter(indicator=indicator)
+    rows = models.IndicatorData.objects.filter(indicator=indicator)
+
+    if geography_ids is not None:
+        parents = get_affected_parents(geography_ids)
+        if not parents:
+            return
+
+        rollup_filter = Q()
+        children_filter = Q()
+        for parent_path, version in parents:
+            rollup_filter |= Q(parent_path=parent_path, version=version)
+            children_filter |= Q(
+                geography__path__startswith=parent_path, geography__version=version,
+                geography__depth=len(parent_path) // models.Geography.steplen + 1
+            )
+        stale = stale.filter(rollup_filter)
+        rows = rows.filter(children_filter)
+
+    stale.delete()
+
+    # Children of the same parent are adjacent when ordered by depth, version and path
+    rows = (rows
+        .order_by("geography__depth", "geography__version", "geography__path")
+        .values_list("geography__path", "geography__depth", "geography__version", "geography__code", "data")
+    )
+    parents = groupby(
+        rows.iterator(),
+        lambda row: (models.IndicatorDataRollup.get_parent_path(row[0], row[1]), row[2])
+    )
+
+    rollups = []
+    for (parent_path, version), children in parents:
+        totals = {}
+        children_data = {}
+        for _, _, _, code, data in children:
+            children_data[code] = data
+            for subindicator, count in ((data or {}).get("subindicators") or {}).items():
+                if count is not None:
+                    totals[subindicator] = totals.get(subindicator, 0) + count
+
+        rollups.append(models.IndicatorDataRollup(
+            indicator=indicator, parent_path=parent_path, version=version,
+            subindicators=totals, children=children_data
+        ))
+        if len(rollups) >= batch_size:
+            models.IndicatorDataRollup.objects.bulk_create(rollups)
+            rollups.clear()
+
+    models.IndicatorDataRollup.objects.bulk_create(rollups)
 
 def extract_counts(indicator, qs):
     """
@@ -1,21 +1,29 @@
 import logging
+import time
 
 from django.db import transaction
 from django.conf import settings
+from django.utils import timezone
 import pandas as pd
+from django_q.tasks import async_task
 
+from wazimap_ng.general.services.arrow_reader import is_arrow_file, read_arrow_chunks
 from wazimap_ng.general.services.csv_helpers import csv_logger
 from wazimap_ng.utils import get_stream_reader, clean_columns
 
-from ..dataloader import loaddata
+from .. import models
+from ..services.dataset_indexes import update_dataset_indexes
+from ..services.normalization import normalize_dataset
+from ..dataloader import loaddata_frame, strip_columns, stringify_groups, update_dataset_groups
+from ..excel_reader import read_excel_chunks
+from .upload_pipeline import process_arrow_pipeline, process_csv_pipeline, process_excel_pipeline
 
 logger = logging.getLogger(__name__)
 
 
 def process_file_data(df, dataset, row_number):
-    df = df.applymap(lambda s:s.strip() if type(s) == str else s)
-    datasource = (dict(d[1]) for d in df.iterrows())
-    return loaddata(dataset, datasource, row_number)
+    df = strip_columns(df)
+    return loaddata_frame(dataset, df, row_number)
 
 
 def process_csv(dataset, buffer, chunksize=1000000):
@@ -24,6 +32,7 @@ def process_csv(dataset, buffer, chunksize=1000000):
     row_number = 1
     error_logs = [];
     warning_logs = [];
+    rows = 0
 
     wrapper_file.seek(0)
     for df in pd.read_csv(wrapper_file, chunksize=chunksize, dtype=str, sep=",", header=None, skiprows=1, encoding=encoding):
@@ -32,16 +41,82 @@ def process_csv(dataset, buffer, chunksize=1000000):
         errors, warnings = process_file_data(df, dataset, row_number)
         error_logs = error_logs + errors
         warning_logs = warning_logs + warnings
-        row_number = row_number + chunksize
+        row_number = row_number + len(df)
+        rows += len(df)
 
     return {
         "error_logs": error_logs,
         "warning_logs": warning_logs,
-        "columns": columns
+        "columns": columns,
+        "rows": rows
     }
 
 
+def process_chunks(dataset, columns, chunks):
+    row_number = 1
+    error_logs = []
+    warning_logs = []
+    rows = 0
+
+    for df in chunks:
+        errors, warnings = process_file_data(df, dataset, row_number)
+        error_logs = error_logs + errors
+        warning_logs = warning_logs + warnings
+        # Parquet and arrow chunks can be shorter than chunksize
+        row_number = row_number + len(df)
+        rows += len(df)
+
+    return {
+        "error_logs": error_logs,
+        "warning_logs": warning_logs,
+        "columns": columns,
+        "rows": rows
+    }
+
+
+def process_excel(dataset, document, chunksize=1000000):
+    columns, chunks = read_excel_chunks(document, chunksize)
+    return process_chunks(dataset, columns, chunks)
+
+
+def process_arrow(dataset, document, chunksize=1000000):
+    columns, chunks = read_arrow_chunks(document, chunksize)
+    return process_chunks(dataset, columns, map(stringify_groups, chunks))
+
+
+def record_geographies(dataset_file, dataset, loaded_since):
+    """
+    Stores the geographies that rows were loaded for on the file so that only those
+    need to be re-extracted.
+    """
+    geography_ids = (models.DatasetData.objects
+        .filter(dataset=dataset, created__gte=loaded_since)
+        .order_by("geography_id")
+        .values_list("geography_id", flat=True)
+        .distinct()
+    )
+    dataset_file.geography_ids = list(geography_ids)
+    models.DatasetFile.objects.filter(pk=dataset_file.pk).update(geography_ids=dataset_file.geography_ids)
+
+
 @transaction.atomic
+def process_file(dataset_file, dataset, chunksize):
+    filename = dataset_file.document.name
+
+    if ".csv" in filename:
+        logger.debug(f"Processing as csv")
+        output = process_csv(dataset, dataset_file.document.open("rb"), chunksize)
+    elif is_arrow_file(filename):
+        logger.debug("Processing as parquet/arrow")
+        output = process_arrow(dataset, dataset_file.document, chunksize)
+    else:
+        logger.debug("Process as other filetype")
+        output = process_excel(dataset, dataset_file.document, chunksize)
+
+    update_dataset_groups(dataset, output["columns"])
+    return output
+
+
 def process_uploaded_file(dataset_file, dataset, **kwargs):
     logger.debug(f"process_uploaded_file: {dataset_file}")
     """
@@ -51,51 +126,61 @@ def process_uploaded_file(dataset_file, dataset, **kwargs):
     After reading data convert to list rather than using numpy array.
 
     Get header index for geography & count and create Result objects.
+
+    Files are loaded by a pool of workers through a staging table when
+    PIPELINE_DATASET_UPLOADS is set, otherwise they are loaded in a single transaction.
+
+    The group keys of the dataset are indexed when DATASET_GROUP_INDEXES is set and the
+    new rows are normalized when NORMALIZED_DATASET_STORAGE is set.
+
+    A task re-extracting the indicators of the dataset for the geographies in the file is
+    scheduled when INCREMENTAL_INDICATOR_EXTRACTION is set.
     """
 
     filename = dataset_file.document.name
     chunksize = getattr(settings, "CHUNK_SIZE_LIMIT", 1000000)
     logger.debug(f"Processing: {filename}")
 
-    columns = None
-    error_logs = []
-    warning_logs = []
-    row_number = 1
-
-    if ".csv" in filename:
-        logger.debug(f"Processing as csv")
-        csv_output = process_csv(dataset, dataset_file.document.open("rb"), chunksize)
-        error_logs = csv_output["error_logs"]
-        warning_logs = csv_output["warning_logs"]
-        columns = csv_output["columns"]
+    start = time.perf_counter()
+    loaded_since = timezone.now()
+
+    if getattr(settings, "PIPELINE_DATASET_UPLOADS", False):
+        if ".csv" in filename:
+            logger.debug(f"Processing as csv with the upload pipeline")
+            output = process_csv_pipeline(dataset_file, dataset, chunksize)
+        elif is_arrow_file(filename):
+            logger.debug(f"Processing as parquet/arrow with the upload pipeline")
+            output = process_arrow_pipeline(dataset_file, dataset, chunksize)
+        else:
+            logger.debug(f"Processing as other filetype with the upload pipeline")
+            output = process_excel_pipeline(dataset_file, dataset, chunksize)
     else:
-        logger.debug("Process as other filetype")
-        skiprows = 1
-        i_chunk = 0
-        df = pd.read_excel(dataset_file.document.open(), nrows=1, dtype=str)
-        df.dropna(how='any', axis='columns', inplace=True)
-        columns = df.columns.str.lower().str.strip()
-        while True:
-            df = pd.read_excel(
-                dataset_file.document.open(), nrows=chunksize, skiprows=skiprows, header=None
-            )
-            skiprows += chunksize
-            # When there is no data, we know we can break out of the loop.
-            if not df.shape[0]:
-                break
-            else:
-                df.dropna(how='any', axis='columns', inplace=True)
-                df.columns = columns
-                errors, warnings = process_file_data(df, dataset, row_number)
-                error_logs = error_logs + errors
-                warning_logs = warning_logs + warnings
-                row_number = row_number + chunksize
-            i_chunk += 1
-
-    groups = [group for group in columns.to_list() if group not in ["geography", "count"]]
-
-    dataset.groups = list(set(groups + dataset.groups))
-    dataset.save()
+        output = process_file(dataset_file, dataset, chunksize)
+
+    error_logs = output["error_logs"]
+    warning_logs = output["warning_logs"]
+    columns = output["columns"]
+    rows = output["rows"]
+
+    duration = time.perf_counter() - start
+    rows_per_second = round(rows / duration) if duration > 0 else rows
+    logger.info(f"Processed {rows} rows from {filename} in {duration:.2f}s ({rows_per_second} rows/s)")
+
+    record_geographies(dataset_file, dataset, loaded_since)
+    if getattr(settings, "DATASET_GROUP_INDEXES", False):
+        update_dataset_indexes(dataset)
+    if getattr(settings, "NORMALIZED_DATASET_STORAGE", False):
+        normalize_dataset(dataset)
+
+    if getattr(settings, "INCREMENTAL_INDICATOR_EXTRACTION", False) and dataset_file.geography_ids:
+        async_task(
+            "wazimap_ng.datasets.tasks.incremental_indicator_extraction",
+            dataset_file,
+            task_name=f"Data Extraction: {dataset.name}",
+            hook="wazimap_ng.datasets.hooks.process_task_info",
+            key=kwargs.get("key"),
+            type="data_extraction", assign=False, notify=True
+        )
 
     error_file_log = incorrect_file_log = None
     if error_logs:
@@ -115,5 +200,7 @@ def process_uploaded_file(dataset_file, dataset, **kwargs):
         "dataset_id": dataset.id,
         "error_log": error_file_log,
         "incorrect_rows_log": incorrect_file_log,
-        "warning_log": warning_logs or None
+        "warning_log": warning_logs or None,
+        "rows": rows,
+        "rows_per_second": rows_per_second
     }
@@ -0,0 +1,253 @@
+import codecs
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from io import BytesIO
+from itertools import islice
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from wazimap_ng.general.services.arrow_reader import read_arrow_chunks
+from wazimap_ng.utils import get_stream_reader, clean_columns
+
+from .. import models
+from ..excel_reader import read_excel_chunks
+from ..dataloader import (
+    copy_datarows, create_groups, get_group_list, strip_columns, stringify_groups, update_dataset_groups,
+    validate_frame
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_staging_table(dataset_file):
+    return f"datasets_datasetdata_staging_{dataset_file.id}"
+
+
+def create_staging_table(table):
+    table = connection.ops.quote_name(table)
+    datasetdata_table = connection.ops.quote_name(models.DatasetData._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        # Unlogged tables skip the WAL which makes loading much faster. The data is only
+        # needed until it is copied into DatasetData.
+        cursor.execute(f"""
+            CREATE UNLOGGED TABLE {table} AS
+            SELECT created, updated, dataset_id, geography_id, data FROM {datasetdata_table} WITH NO DATA
+        """)
+
+
+def drop_staging_table(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(table)}")
+
+
+def swap_staging_table(table, dataset, columns, has_rows):
+    """
+    Moves the staged rows into DatasetData and updates the groups of the dataset
+    in a single transaction so that the upload becomes visible all at once.
+    """
+    datasetdata_table = connection.ops.quote_name(models.DatasetData._meta.db_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {datasetdata_table} (created, updated, dataset_id, geography_id, data)
+                SELECT created, updated, dataset_id, geography_id, data FROM {connection.ops.quote_name(table)}
+            """)
+        create_groups(dataset, get_group_list(columns) if has_rows else [])
+        update_dataset_groups(dataset, columns)
+
+
+def update_progress(dataset_file, **progress):
+    dataset_file.progress = {**(dataset_file.progress or {}), **progress}
+    models.DatasetFile.objects.filter(pk=dataset_file.pk).update(progress=dataset_file.progress)
+
+
+def read_line_chunks(fileobj, chunksize):
+    """
+    Splits the file after the header into chunks of chunksize lines without parsing
+    them. Fields with embedded newlines are not supported.
+    """
+    fileobj.readline()
+    while True:
+        lines = list(islice(fileobj, chunksize))
+        if not lines:
+            break
+        yield b"".join(lines)
+
+
+def load_frame(dataset_id, version, staging_table, df, row_number):
+    """
+    Validates a chunk and copies the valid rows into the staging table. Runs in a pool worker.
+    """
+    try:
+        df = strip_columns(df)
+
+        valid_ids, records, errors, warnings = validate_frame(df, version, row_number)
+        copy_datarows(dataset_id, zip(valid_ids, records), table=staging_table)
+
+        return len(df), errors, warnings
+    finally:
+        connection.close()
+
+
+def load_chunk(dataset_id, version, staging_table, columns, encoding, raw, row_number):
+    """
+    Parses a chunk of csv lines before loading it with load_frame.
+    """
+    if not raw.strip():
+        return 0, [], []
+
+    df = pd.read_csv(BytesIO(raw), dtype=str, sep=",", header=None, encoding=encoding)
+    df.dropna(how='all', axis='columns', inplace=True)
+    df.columns = columns
+
+    return load_frame(dataset_id, version, staging_table, df, row_number)
+
+
+def setup_worker():
+    import configurations
+    configurations.setup()
+
+
+def get_executor(workers):
+    if multiprocessing.current_process().daemon:
+        # django-q workers are daemonic processes which are not allowed to have children.
+        # Parsing, validation and json encoding hold the GIL so threads only overlap the
+        # COPY and other database I/O of the chunks. Files loaded with load_dataset --sync
+        # run outside django-q and are parsed by a process pool.
+        logger.info("Running the upload pipeline on threads, chunks are parsed one at a time")
+        return ThreadPoolExecutor(workers)
+
+    # Workers are spawned rather than forked so that they never share the parent's database connections
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context("spawn"), initializer=setup_worker
+    )
+
+
+def run_pipeline(dataset_file, dataset, columns, jobs, total=None):
+    """
+    Runs the load jobs on a pool of workers, see get_executor, and then moves the staged
+    rows into DatasetData in one transaction. jobs is an iterator of (function, args, size)
+    tuples where size is used to report progress against total.
+
+    Progress is written to DatasetFile.progress as chunks complete.
+    """
+    workers = getattr(settings, "UPLOAD_PIPELINE_WORKERS", 4)
+    staging_table = get_staging_table(dataset_file)
+
+    results = {}
+    pending = {}
+    rows = 0
+    loaded = 0
+
+    def collect(futures):
+        nonlocal rows, loaded
+        for future in futures:
+            idx, size = pending.pop(future)
+            chunk_rows, errors, warnings = future.result()
+            results[idx] = (errors, warnings)
+            rows += chunk_rows
+            loaded += size
+            update_progress(
+                dataset_file, chunks_done=len(results), rows=rows,
+                percent=min(round(100 * loaded / total), 99) if total else None
+            )
+
+    update_progress(dataset_file, status="loading", chunks_done=0, rows=0, percent=0)
+    create_staging_table(staging_table)
+
+    try:
+        with get_executor(workers) as executor:
+            for idx, (func, args, size) in enumerate(jobs):
+                future = executor.submit(func, dataset.id, dataset.geography_hierarchy.version, staging_table, *args)
+                pending[future] = (idx, size)
+
+                # Bound the number of chunks held in memory
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+
+            done, _ = wait(pending)
+            collect(done)
+
+        update_progress(dataset_file, status="swapping")
+        swap_staging_table(staging_table, dataset, columns, rows > 0)
+        update_progress(dataset_file, status="done", percent=100)
+    except Exception:
+        update_progress(dataset_file, status="failed")
+        raise
+    finally:
+        drop_staging_table(staging_table)
+
+    error_logs = []
+    warning_logs = []
+    for idx in sorted(results):
+        errors, warnings = results[idx]
+        error_logs.extend(errors)
+        warning_logs.extend(warnings)
+
+    return {
+        "error_logs": error_logs,
+        "warning_logs": warning_logs,
+        "columns": columns,
+        "rows": rows
+    }
+
+
+def process_csv_pipeline(dataset_file, dataset, chunksize=1000000):
+    """
+    Splits a csv file into chunks of lines which are parsed, validated and copied into
+    the staging table by the workers.
+    """
+    encoding, wrapper_file = get_stream_reader(dataset_file.document.open("rb"))
+    _, columns = clean_columns(wrapper_file)
+
+    # The byte order mark is part of the header line which is skipped when splitting
+    if codecs.lookup(encoding).name == "utf-8-sig":
+        encoding = "utf-8"
+
+    if "\n".encode(encoding) != b"\n":
+        raise ValueError(f"Files encoded as {encoding} can not be split into lines, upload them without the pipeline")
+
+    def jobs():
+        document = dataset_file.document.open("rb")
+        for idx, raw in enumerate(read_line_chunks(document, chunksize)):
+            row_number = 1 + idx * chunksize
+            yield load_chunk, (list(columns), encoding, raw, row_number), len(raw)
+
+    return run_pipeline(dataset_file, dataset, columns, jobs(), total=dataset_file.document.size)
+
+
+def process_frames_pipeline(dataset_file, dataset, columns, chunks):
+    """
+    Validates and copies DataFrame chunks into the staging table on the workers.
+    """
+    def jobs():
+        row_number = 1
+        for df in chunks:
+            # Parquet and arrow chunks can be shorter than chunksize
+            yield load_frame, (df, row_number), len(df)
+            row_number += len(df)
+
+    return run_pipeline(dataset_file, dataset, columns, jobs())
+
+
+def process_excel_pipeline(dataset_file, dataset, chunksize=1000000):
+    """
+    Reads a workbook in a single pass and validates and copies the chunks into the
+    staging table on the workers.
+    """
+    columns, chunks = read_excel_chunks(dataset_file.document, chunksize)
+    return process_frames_pipeline(dataset_file, dataset, columns, chunks)
+
+
+def process_arrow_pipeline(dataset_file, dataset, chunksize=1000000):
+    """
+    Reads a parquet or arrow file batch by batch and validates and copies the chunks into
+    the staging table on the workers.
+    """
+    columns, chunks = read_arrow_chunks(dataset_file.document, chunksize)
+    return process_frames_pipeline(dataset_file, dataset, columns, map(stringify_groups, chunks))
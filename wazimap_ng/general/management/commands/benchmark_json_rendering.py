@@ -0,0 +1,66 @@
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from wazimap_ng.streaming import StreamingJSONResponse
+
+
+def generate_boundaries(features, points):
+    """
+    Generates a payload shaped like the children boundaries response.
+    """
+    return {
+        "ward": OrderedDict([
+            ("type", "FeatureCollection"),
+            ("features", [
+                OrderedDict([
+                    ("id", idx),
+                    ("type", "Feature"),
+                    ("geometry", {
+                        "type": "MultiPolygon",
+                        "coordinates": [[[[18.0 + p / points, -33.0 - idx / features] for p in range(points)]]]
+                    }),
+                    ("properties", {"code": f"WARD{idx}", "name": f"Ward {idx}", "area": idx * 1.5, "parent": "CPT"}),
+                ])
+                for idx in range(features)
+            ]),
+        ])
+    }
+
+
+def render(data):
+    return len(JSONRenderer().render(data))
+
+
+def stream(data):
+    return sum(len(chunk) for chunk in StreamingJSONResponse(data).streaming_content)
+
+
+class Command(BaseCommand):
+    help = """Compares the time and peak memory used to encode a generated children boundaries payload
+with DRF's JSONRenderer and with the streaming JSON response. The payload is built before
+measuring so the peak only covers the encoding.
+Example: python3 manage.py benchmark_json_rendering --features 2000 --points 500"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--features", type=int, default=2000, help="Number of boundaries.")
+        parser.add_argument("--points", type=int, default=500, help="Number of coordinates per boundary.")
+
+    def handle(self, *args, **options):
+        data = generate_boundaries(options["features"], options["points"])
+
+        for name, renderer in [("JSONRenderer", render), ("streaming", stream)]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            size = renderer(data)
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            self.stdout.write(
+                f"{name}: {size / 1024 / 1024:.1f}MB response in {duration:.2f}s, "
+                f"{peak / 1024 / 1024:.1f}MB peak allocations"
+            )
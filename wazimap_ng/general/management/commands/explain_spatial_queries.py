@@ -0,0 +1,104 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.boundaries.services.tiles import get_boundary_tile_sql
+from wazimap_ng.general.services.query_plans import explain, summarize_plan
+from wazimap_ng.general.services.tiles import get_tile_params, lonlat_to_tile
+from wazimap_ng.points.models import Location
+from wazimap_ng.points.services.membership import get_membership_sql
+from wazimap_ng.points.services.tiles import get_location_tile_sql
+
+LOCATION_INDEX = "idx_points_location_coords"
+BOUNDARY_INDEX = "idx_boundaries_geom"
+
+
+def get_checks(location, boundary, zoom):
+    """
+    Returns (name, sql, params, table, index) for each spatial query that is expected to
+    read table through index.
+    """
+    location_table = Location._meta.db_table
+    boundary_table = GeographyBoundary._meta.db_table
+    checks = []
+
+    if location is not None:
+        x, y = lonlat_to_tile(location.coordinates.x, location.coordinates.y, zoom)
+        checks.append((
+            f"location tile {zoom}/{x}/{y}", get_location_tile_sql(),
+            get_tile_params(zoom, x, y, category_id=location.category_id),
+            location_table, LOCATION_INDEX
+        ))
+        sql, params = get_membership_sql("l.id", Location.objects.filter(pk=location.pk))
+        checks.append(("location memberships", sql, params, boundary_table, BOUNDARY_INDEX))
+
+    if boundary is not None:
+        point = boundary.geom.point_on_surface
+        x, y = lonlat_to_tile(point.x, point.y, zoom)
+        checks.append((
+            f"boundary tile {zoom}/{x}/{y}", get_boundary_tile_sql(zoom),
+            get_tile_params(zoom, x, y, version=boundary.geography.version, level=None),
+            boundary_table, BOUNDARY_INDEX
+        ))
+        sql, params = get_membership_sql("b.id", GeographyBoundary.objects.filter(pk=boundary.pk))
+        checks.append(("boundary memberships", sql, params, location_table, LOCATION_INDEX))
+
+    return checks
+
+
+class Command(BaseCommand):
+    help = """Runs EXPLAIN ANALYZE on the spatial queries behind vector tiles and location memberships and
+reports a regression when a query doesn't use its spatial index or is slower than --max-ms.
+By default sequential scans are disabled so that the check does not depend on the size of the tables,
+use --allow-seqscan to see the plans the planner picks on its own.
+Example: python3 manage.py explain_spatial_queries --zoom 12 --max-ms 200"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--location", type=int, default=None, help="Location to sample, defaults to the first location.")
+        parser.add_argument("--boundary", type=int, default=None, help="Boundary to sample, defaults to the first boundary with a geometry.")
+        parser.add_argument("--zoom", type=int, default=12, help="Zoom level of the sampled tiles.")
+        parser.add_argument("--max-ms", type=float, default=None, help="Report queries slower than this as regressions.")
+        parser.add_argument("--allow-seqscan", action="store_true", help="Leave sequential scans enabled.")
+
+    def get_sample(self, queryset, pk):
+        if pk is not None:
+            return queryset.get(pk=pk)
+        return queryset.order_by("pk").first()
+
+    def handle(self, *args, **options):
+        location = self.get_sample(Location.objects.all(), options["location"])
+        boundary = self.get_sample(
+            GeographyBoundary.objects.filter(geom__isnull=False).select_related("geography"), options["boundary"]
+        )
+
+        checks = get_checks(location, boundary, options["zoom"])
+        if not checks:
+            raise CommandError("There are no locations or boundaries to sample")
+
+        regressions = []
+        with transaction.atomic():
+            if not options["allow_seqscan"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, sql, params, table, index in checks:
+                summary = summarize_plan(explain(sql, params))
+                problems = []
+                if index not in summary["indexes"]:
+                    problems.append(f"{index} not used")
+                if table in summary["seq_scans"]:
+                    problems.append(f"sequential scan on {table}")
+                if options["max_ms"] is not None and summary["time"] > options["max_ms"]:
+                    problems.append(f"slower than {options['max_ms']}ms")
+
+                status = "REGRESSION" if problems else "OK"
+                self.stdout.write(
+                    f"{status} {name}: {summary['time']:.2f}ms, "
+                    f"indexes: {', '.join(summary['indexes']) or '-'}"
+                    + (f" ({'; '.join(problems)})" if problems else "")
+                )
+                if problems:
+                    regressions.append(name)
+
+        if regressions:
+            raise CommandError(f"Spatial query regressions: {', '.join(regressions)}")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wazimap_ng.datasets.models import Geography, GeographyHierarchy
+from wazimap_ng.profile.models import Profile
+from wazimap_ng.cache import ensure_profile_version
+from wazimap_ng.general.services.materialization import materialize_geographies
+
+
+class Command(BaseCommand):
+    help = "Precomputes the consolidated profile payload for every geography of a hierarchy. Example: python3 manage.py materialize_profiles 'SA Boundaries 2016'"
+
+    def add_arguments(self, parser):
+        parser.add_argument("hierarchy", type=str, help="Name of the geography hierarchy to warm.")
+        parser.add_argument("--profile", type=str, default=None, help="Only warm this profile (name as it exists in the database).")
+
+    def handle(self, *args, **options):
+        try:
+            hierarchy = GeographyHierarchy.objects.get(name=options["hierarchy"])
+        except GeographyHierarchy.DoesNotExist:
+            hierarchies = ", ".join(h.name for h in GeographyHierarchy.objects.all())
+            raise CommandError(f"Hierarchy {options['hierarchy']} does not exist. The following hierarchies are available: {hierarchies}")
+
+        profiles = Profile.objects.filter(geography_hierarchy=hierarchy)
+        if options["profile"] is not None:
+            profiles = profiles.filter(name=options["profile"])
+
+        if not profiles.exists():
+            raise CommandError(f"No profiles found for hierarchy: {hierarchy}")
+
+        for profile in profiles:
+            content_version = ensure_profile_version(profile.id)
+            geographies = Geography.get_tree(hierarchy.root_geography)
+            count = materialize_geographies(profile, geographies.iterator(), content_version)
+            self.stdout.write(f"{profile}: materialized {count} geographies ({content_version})")
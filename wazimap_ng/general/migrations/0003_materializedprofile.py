@@ -0,0 +1,32 @@
+# Generated by Django 2.2.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0110_metadata_url'),
+        ('profile', '0047_profileindicator_configuration'),
+        ('general', '0002_auto_20200624_0311'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterializedProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('content_version', models.CharField(max_length=64)),
+                ('payload', models.TextField()),
+                ('geography', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='datasets.Geography')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='profile.Profile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='materializedprofile',
+            constraint=models.UniqueConstraint(fields=('profile', 'geography'), name='unique_materialized_profile_geography'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.13 on 2026-10-18 18:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profile', '0047_profileindicator_configuration'),
+        ('general', '0003_materializedprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('version', models.DateTimeField()),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content_version', to='profile.Profile')),
+            ],
+        ),
+    ]
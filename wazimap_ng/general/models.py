@@ -13,4 +13,36 @@ class MetaData(BaseModel):
     description = models.TextField(blank=True)
     licence = models.ForeignKey(
         'datasets.Licence', null=True, blank=True, on_delete=models.SET_NULL,
-    )
\ No newline at end of file
+    )
+
+
+class MaterializedProfile(BaseModel):
+    """
+    Precomputed consolidated profile payload (see general.views.consolidated_profile)
+    for a single profile and geography. content_version holds the profile etag that
+    was current when the payload was built - a row with an older version is stale.
+    """
+    profile = models.ForeignKey("profile.Profile", on_delete=models.CASCADE)
+    geography = models.ForeignKey("datasets.Geography", on_delete=models.CASCADE)
+    content_version = models.CharField(max_length=64)
+    payload = models.TextField()
+
+    def __str__(self):
+        return f"{self.profile} - {self.geography} ({self.content_version})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "geography"], name="unique_materialized_profile_geography")
+        ]
+
+
+class ProfileVersion(BaseModel):
+    """
+    Content version of a profile, set by cache.update_profile_cache. It is stored here
+    so that every worker agrees on it, the django cache only fronts it.
+    """
+    profile = models.OneToOneField("profile.Profile", on_delete=models.CASCADE, related_name="content_version")
+    version = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.profile} ({self.version})"
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PARQUET_EXTENSIONS = ["parquet"]
+ARROW_EXTENSIONS = ["arrow", "feather"]
+
+
+def is_arrow_file(filename):
+    return Path(filename).suffix.lower().lstrip(".") in PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+
+
+@contextmanager
+def open_source(document):
+    """
+    Memory maps documents stored on the local filesystem, other storages are read
+    through a file object. The memory map, or the file if it was opened here, is
+    closed on exit. Files that were already open, such as uploads that have not been
+    saved yet, are left open.
+    """
+    if pyarrow is None:
+        raise ValueError("pyarrow needs to be installed to read parquet and arrow files")
+
+    # Files that are being uploaded are not in the storage yet
+    if getattr(document, "_committed", True):
+        try:
+            source = pyarrow.memory_map(document.path)
+        except (AttributeError, NotImplementedError):
+            # Remote storages and plain files have no local path
+            pass
+        else:
+            with source:
+                yield source
+            return
+
+    opened = document.closed
+    document.open("rb")
+    document.seek(0)
+    try:
+        yield document
+    finally:
+        if opened:
+            document.close()
+
+
+def open_ipc(source):
+    try:
+        return pyarrow.ipc.open_file(source)
+    except pyarrow.ArrowInvalid:
+        # Not the file format, try the streaming format
+        source.seek(0)
+        return pyarrow.ipc.open_stream(source)
+
+
+def is_parquet(document):
+    return Path(document.name).suffix.lower().lstrip(".") in PARQUET_EXTENSIONS
+
+
+def iter_batches(document):
+    """
+    Iterates over the record batches of a parquet file, one row group at a time, or of
+    an Arrow IPC file or stream.
+    """
+    with open_source(document) as source:
+        if is_parquet(document):
+            parquet_file = pyarrow.parquet.ParquetFile(source)
+            for idx in range(parquet_file.num_row_groups):
+                yield from parquet_file.read_row_group(idx).to_batches()
+        else:
+            reader = open_ipc(source)
+            if isinstance(reader, pyarrow.ipc.RecordBatchFileReader):
+                for idx in range(reader.num_record_batches):
+                    yield reader.get_batch(idx)
+            else:
+                yield from reader
+
+
+def read_schema(document):
+    with open_source(document) as source:
+        if is_parquet(document):
+            return pyarrow.parquet.ParquetFile(source).schema_arrow
+        return open_ipc(source).schema
+
+
+def read_arrow_columns(document):
+    """
+    Returns the cleaned column names of a parquet or arrow file without reading its data.
+    """
+    return pd.Index(read_schema(document).names).str.lower().str.strip()
+
+
+def to_frame(batch, columns):
+    # Integer columns with nulls stay integers instead of becoming floats
+    df = pyarrow.Table.from_batches([batch]).to_pandas(integer_object_nulls=True)
+    df.columns = columns
+    return df
+
+
+def read_arrow_chunks(document, chunksize):
+    """
+    Reads a parquet or arrow file batch by batch. Returns the cleaned column names and a
+    generator of DataFrames with at most chunksize rows each. Columns keep the types of
+    the file, string columns are object columns as in a csv read with dtype=str.
+    """
+    columns = read_arrow_columns(document)
+
+    def chunks():
+        for batch in iter_batches(document):
+            for offset in range(0, batch.num_rows, chunksize):
+                yield to_frame(batch.slice(offset, chunksize), columns)
+
+    return columns, chunks()
@@ -0,0 +1,116 @@
+import logging
+
+from django.db.models import F
+
+from wazimap_ng.profile import serializers as profile_serializers
+from wazimap_ng.boundaries import views as boundaries_views
+from wazimap_ng.boundaries.models import DEFAULT_RESOLUTION
+from wazimap_ng.points import views as point_views
+from wazimap_ng.cache import get_profile_version
+from wazimap_ng.streaming import JSONFragment, render
+
+from ..models import MaterializedProfile
+
+logger = logging.getLogger(__name__)
+
+
+def get_children_layer(code, version, level, boundary_format):
+    """
+    Returns the children of the given level as a FeatureCollection or as a topology with
+    a single object, None if there are no children at that level.
+    """
+    layers = boundaries_views.geography_children_layers_helper(code, version)
+    if level not in layers:
+        return None
+
+    if boundary_format == "topojson":
+        return JSONFragment(boundaries_views.geography_children_topology_helper(code, version, DEFAULT_RESOLUTION, level))
+    return JSONFragment(layers[level])
+
+
+def build_consolidated_profile(profile, geography, boundary_format="geojson"):
+    """
+    The boundaries are the encoded JSON returned by the boundary helpers. They are
+    passed on as JSONFragments to be written into the response as they are.
+    """
+    version = geography.version
+
+    profile_js = profile_serializers.ExtendedProfileSerializer(profile, geography)
+    boundary_js = JSONFragment(boundaries_views.geography_item_helper(geography.code, version))
+    if boundary_format == "topojson":
+        children_boundary_js = JSONFragment(boundaries_views.geography_children_topology_helper(geography.code, version))
+    else:
+        children_boundary_js = JSONFragment(boundaries_views.geography_children_helper(geography.code, version))
+
+    parent_layers = []
+    parents = profile_js["geography"]["parents"]
+    children_levels = [p["level"] for p in parents[1:]] + [profile_js["geography"]["level"]]
+    pairs = zip(parents, children_levels)
+    for parent, children_level in pairs:
+        layer = get_children_layer(parent["code"], version, children_level, boundary_format)
+        if layer is not None:
+            parent_layers.append(layer)
+
+    return ({
+        "profile": profile_js,
+        "boundary": boundary_js,
+        "children": children_boundary_js,
+        "parent_layers": parent_layers,
+        "themes": point_views.boundary_point_count_helper(profile, geography)
+    })
+
+
+def render_consolidated_profile(profile, geography):
+    js = build_consolidated_profile(profile, geography)
+    return render(js).decode("utf-8")
+
+
+def get_materialized_payload(profile_id, geography_code):
+    """
+    Returns the stored payload for this profile and geography if it was built for
+    the current content version of the profile, None if it is missing or stale.
+    Codes are only unique per version so the geography must be in the version of
+    the profile's hierarchy.
+    """
+    content_version = get_profile_version(profile_id)
+    if content_version is None:
+        return None
+
+    return (MaterializedProfile.objects
+        .filter(
+            profile_id=profile_id, geography__code=geography_code, content_version=content_version,
+            geography__version=F("profile__geography_hierarchy__root_geography__version"),
+        )
+        .values_list("payload", flat=True)
+        .first()
+    )
+
+
+def materialize_geography(profile, geography, content_version):
+    payload = render_consolidated_profile(profile, geography)
+    MaterializedProfile.objects.update_or_create(
+        profile=profile, geography=geography,
+        defaults={"content_version": content_version, "payload": payload}
+    )
+    return payload
+
+
+def materialize_geographies(profile, geographies, content_version):
+    """
+    Rebuilds the payloads of the given geographies. Stops early if the profile
+    was updated again in the meantime as a newer task will take over.
+    """
+    count = 0
+    for geography in geographies:
+        current_version = get_profile_version(profile.id)
+        if current_version is not None and current_version != content_version:
+            logger.info(f"Profile {profile} has been updated since {content_version} - stopping")
+            break
+
+        try:
+            materialize_geography(profile, geography, content_version)
+            count += 1
+        except Exception as e:
+            logger.exception(f"Could not materialize {profile} for {geography}: {e}")
+
+    return count
@@ -0,0 +1,37 @@
+import json
+
+from django.db import connection
+
+
+def explain(sql, params, analyze=True):
+    """
+    Returns the plan of a query as returned by EXPLAIN (FORMAT JSON). The query is
+    executed when analyze is True so it must not have side effects.
+    """
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN ({options}) {sql}", params)
+        plan = cursor.fetchone()[0]
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def iter_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from iter_nodes(child)
+
+
+def summarize_plan(plan):
+    """
+    Returns the indexes used by the plan, the relations it reads with sequential scans and
+    its execution time in ms, which is None if the query was not analyzed.
+    """
+    nodes = list(iter_nodes(plan["Plan"]))
+    return {
+        "indexes": sorted({node["Index Name"] for node in nodes if "Index Name" in node}),
+        "seq_scans": sorted({node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"}),
+        "time": plan.get("Execution Time"),
+    }
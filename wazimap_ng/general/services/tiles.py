@@ -0,0 +1,79 @@
+import math
+
+from django.db import connection
+from rest_framework.negotiation import BaseContentNegotiation
+
+# Half the width of the world in web mercator (EPSG:3857)
+WORLD_EXTENT = 20037508.342789244
+MAX_ZOOM = 22
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+class TileContentNegotiation(BaseContentNegotiation):
+    """
+    Tiles are returned whatever the Accept header asks for. Errors are rendered with the
+    first renderer of the view.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def lonlat_to_tile(lon, lat, z):
+    """
+    Returns the (x, y) of the XYZ tile at zoom level z that contains the point.
+    """
+    n = 2 ** z
+    lat = max(min(lat, 85.0511), -85.0511)
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_envelope(z, x, y):
+    """
+    Returns the (xmin, ymin, xmax, ymax) bounds of an XYZ tile in web mercator.
+    """
+    size = 2 * WORLD_EXTENT / 2 ** z
+    return (
+        -WORLD_EXTENT + x * size,
+        WORLD_EXTENT - (y + 1) * size,
+        -WORLD_EXTENT + (x + 1) * size,
+        WORLD_EXTENT - y * size,
+    )
+
+
+def get_tile_params(z, x, y, **params):
+    """
+    Adds the tile bounds as xmin, ymin, xmax and ymax and the tile extent and buffer as
+    extent and buffer to the query parameters.
+    """
+    xmin, ymin, xmax, ymax = tile_envelope(z, x, y)
+    return dict(
+        params, xmin=xmin, ymin=ymin, xmax=xmax, ymax=ymax,
+        extent=TILE_EXTENT, buffer=TILE_BUFFER
+    )
+
+
+def render_tile(sql, z, x, y, **params):
+    """
+    Runs a query that returns a single ST_AsMVT value and returns the tile as bytes. The
+    query receives the parameters added by get_tile_params.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, get_tile_params(z, x, y, **params))
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None:
+        return b""
+    return bytes(row[0])
@@ -0,0 +1,28 @@
+import logging
+
+from wazimap_ng.datasets.models import Geography
+from wazimap_ng.profile.models import Profile
+
+from .services.materialization import materialize_geographies
+
+logger = logging.getLogger(__name__)
+
+
+def materialize_profile(profile_id, content_version, **kwargs):
+    """
+    Precompute the consolidated payload of every geography in the profile's hierarchy.
+    Triggered by cache.update_profile_cache.
+    """
+    profile = Profile.objects.get(pk=profile_id)
+    root_geography = profile.geography_hierarchy.root_geography
+    geographies = Geography.get_tree(root_geography)
+
+    count = materialize_geographies(profile, geographies.iterator(), content_version)
+    logger.info(f"Materialized {count} geographies for {profile} ({content_version})")
+
+    return {
+        "model": "profile",
+        "name": profile.name,
+        "id": profile.id,
+        "geographies": count,
+    }
@@ -2,7 +2,8 @@ from django.views.decorators.http import condition
 from django.views.decorators.cache import never_cache
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth.decorators import user_passes_test
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
+from django.conf import settings
 
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
@@ -12,42 +13,43 @@ from ..profile import serializers as profile_serializers
 from ..datasets import models as dataset_models
 from ..datasets import views as dataset_views
 from ..boundaries import models as boundaries_models
-from ..boundaries import views as boundaries_views
-from ..cache import etag_profile_updated, last_modified_profile_updated
-from ..points import views as point_views
+from ..boundaries.views import get_boundary_format
+from ..cache import etag_profile_updated, last_modified_profile_updated, ensure_profile_version, get_cache_stats
 from ..points import models as point_models
+from ..streaming import json_response
+from .services import materialization
 
-def consolidated_profile_helper(profile_id, geography_code):
+def consolidated_profile_helper(profile_id, geography_code, boundary_format="geojson"):
     profile = get_object_or_404(profile_models.Profile, pk=profile_id)
     version = profile.geography_hierarchy.root_geography.version
     geography = dataset_models.Geography.objects.get(code=geography_code, version=version)
 
-    profile_js = profile_serializers.ExtendedProfileSerializer(profile, geography)
-    boundary_js = boundaries_views.geography_item_helper(geography_code, version)
-    children_boundary_js = boundaries_views.geography_children_helper(geography_code, version)
+    return materialization.build_consolidated_profile(profile, geography, boundary_format)
 
-    parent_layers = []
-    parents = profile_js["geography"]["parents"]
-    children_levels = [p["level"] for p in parents[1:]] + [profile_js["geography"]["level"]]
-    pairs = zip(parents, children_levels)
-    for parent, children_level in pairs:
-        layer = boundaries_views.geography_children_helper(parent["code"], version)
-        if children_level in layer:
-            parent_layers.append(layer[children_level])
+def materialized_profile_helper(profile_id, geography_code):
+    payload = materialization.get_materialized_payload(profile_id, geography_code)
+    if payload is not None:
+        return payload
 
-    return ({
-        "profile": profile_js,
-        "boundary": boundary_js,
-        "children": children_boundary_js,
-        "parent_layers": parent_layers,
-        "themes": point_views.boundary_point_count_helper(profile, geography)
-    })
+    # Missing or stale - compute it now and store it for the next request
+    profile = get_object_or_404(profile_models.Profile, pk=profile_id)
+    version = profile.geography_hierarchy.root_geography.version
+    geography = dataset_models.Geography.objects.get(code=geography_code, version=version)
+    content_version = ensure_profile_version(profile_id)
+
+    return materialization.materialize_geography(profile, geography, content_version)
 
 @condition(etag_func=etag_profile_updated, last_modified_func=last_modified_profile_updated)
 @api_view()
 def consolidated_profile(request, profile_id, geography_code):
-    js = consolidated_profile_helper(profile_id, geography_code)
-    return Response(js)
+    boundary_format = get_boundary_format(request)
+    # Only the default format is materialized
+    if getattr(settings, "MATERIALIZE_PROFILES", False) and boundary_format == "geojson":
+        payload = materialized_profile_helper(profile_id, geography_code)
+        return HttpResponse(payload, content_type="application/json")
+
+    js = consolidated_profile_helper(profile_id, geography_code, boundary_format)
+    return json_response(request, js, fragments=True)
 
 @condition(etag_func=etag_profile_updated, last_modified_func=last_modified_profile_updated)
 @api_view()
@@ -79,3 +81,8 @@ def notifications_view(request):
         "task_list": task_list,
         "notifications": messages,
     })
+
+@user_passes_test(authenticate_admin)
+@never_cache
+def cache_stats_view(request):
+    return JsonResponse(get_cache_stats())
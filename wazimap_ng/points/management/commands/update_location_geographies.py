@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+from wazimap_ng.points.models import Location
+from wazimap_ng.points.services.membership import update_location_memberships, update_boundary_memberships
+
+
+class Command(BaseCommand):
+    help = """Recomputes the geographies that contain each location. Memberships are updated when points are
+uploaded, when locations or boundaries are saved and when boundaries are loaded with loadshp, this is needed
+for data loaded before that and after bulk updates.
+Example: python3 manage.py update_location_geographies --collection 12 --batch-size 10000
+         python3 manage.py update_location_geographies --version 'SA Boundaries 2016'"""
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--collection", type=int, nargs="+", default=None, help="Only update the locations of these collections.")
+        group.add_argument("--version", type=str, default=None, help="Only update the boundaries of this geography version.")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Locations placed per INSERT.")
+
+    def handle(self, *args, **options):
+        if options["version"] is not None:
+            boundaries = GeographyBoundary.objects.filter(geography__version=options["version"])
+            count = update_boundary_memberships(boundaries)
+        else:
+            locations = Location.objects.order_by("id")
+            if options["collection"] is not None:
+                locations = locations.filter(category_id__in=options["collection"])
+
+            ids = list(locations.values_list("id", flat=True))
+            batch_size = options["batch_size"]
+            count = 0
+            for idx in range(0, len(ids), batch_size):
+                count += update_location_memberships(Location.objects.filter(id__in=ids[idx:idx + batch_size]))
+                self.stdout.write(f"Placed {min(idx + batch_size, len(ids))} of {len(ids)} locations")
+
+        self.stdout.write(f"Stored {count} location memberships")
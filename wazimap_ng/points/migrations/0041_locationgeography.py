@@ -0,0 +1,27 @@
+# Generated by Django 2.2.13 on 2026-10-18 15:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets', '0113_indicatordatarollup_children'),
+        ('points', '0040_merge_20210111_1807'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LocationGeography',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geography', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_memberships', to='datasets.Geography')),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geography_memberships', to='points.Location')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='locationgeography',
+            constraint=models.UniqueConstraint(fields=('geography', 'location'), name='unique_location_geography'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.13 on 2026-10-18 16:20
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0041_locationgeography'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='coordinates',
+            field=django.contrib.gis.db.models.fields.PointField(spatial_index=False, srid=4326),
+        ),
+        # Django doesn't drop or create spatial indexes when spatial_index changes
+        migrations.RunSQL(
+            "DROP INDEX IF EXISTS points_location_coordinates_id",
+            "CREATE INDEX IF NOT EXISTS points_location_coordinates_id ON points_location USING GIST (coordinates)",
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['coordinates'], name='idx_points_location_coords'),
+        ),
+    ]
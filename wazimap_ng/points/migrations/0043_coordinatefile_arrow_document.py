@@ -0,0 +1,20 @@
+# Generated by Django 2.2.13 on 2026-10-18 18:05
+
+import django.core.validators
+from django.db import migrations, models
+import wazimap_ng.points.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('points', '0042_explicit_spatial_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='coordinatefile',
+            name='document',
+            field=models.FileField(help_text='File Type required : CSV, Parquet or Arrow | Fields that are required: Name, Longitude, latitude', upload_to=wazimap_ng.points.models.get_file_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['csv', 'parquet', 'arrow', 'feather'])]),
+        ),
+    ]
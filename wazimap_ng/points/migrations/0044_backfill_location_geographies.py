@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Max, Min
+
+BATCH_SIZE = 10000
+
+
+def backfill_memberships(apps, schema_editor):
+    """
+    Stores the geographies that contain each existing location, in batches of location ids
+    so that large point collections aren't joined against the boundaries in one statement.
+    """
+    Location = apps.get_model("points", "Location")
+    LocationGeography = apps.get_model("points", "LocationGeography")
+    GeographyBoundary = apps.get_model("boundaries", "GeographyBoundary")
+
+    quote_name = schema_editor.connection.ops.quote_name
+    sql = f"""
+        INSERT INTO {quote_name(LocationGeography._meta.db_table)} (location_id, geography_id)
+        SELECT l.id, b.geography_id
+        FROM {quote_name(Location._meta.db_table)} l
+        JOIN {quote_name(GeographyBoundary._meta.db_table)} b ON l.coordinates && b.geom AND ST_Within(l.coordinates, b.geom)
+        WHERE l.id >= %s AND l.id < %s
+        ON CONFLICT DO NOTHING
+    """
+
+    bounds = Location.objects.aggregate(first=Min("id"), last=Max("id"))
+    if bounds["first"] is None:
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(bounds["first"], bounds["last"] + 1, BATCH_SIZE):
+            cursor.execute(sql, [start, start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('boundaries', '0030_explicit_spatial_indexes'),
+        ('points', '0043_coordinatefile_arrow_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_memberships, migrations.RunPython.noop),
+    ]
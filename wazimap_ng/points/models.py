@@ -2,6 +2,7 @@ import os
 
 from django.contrib.gis.db import models
 from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GistIndex
 from django.core.validators import FileExtensionValidator
 from django.core.exceptions import ValidationError
 
@@ -11,6 +12,7 @@ from wazimap_ng.profile.models import Profile
 from django_q.models import Task
 from wazimap_ng import utils
 from wazimap_ng.general.models import BaseModel
+from wazimap_ng.general.services.arrow_reader import is_arrow_file, read_arrow_columns
 from wazimap_ng.config.common import PERMISSION_TYPES
 from colorfield.fields import ColorField
 
@@ -51,7 +53,8 @@ class Category(BaseModel):
 class Location(BaseModel):
     name = models.CharField(max_length=255)
     category = models.ForeignKey(Category, related_name="locations", on_delete=models.CASCADE, verbose_name="collection")
-    coordinates = models.PointField()
+    # Indexed explicitly in Meta so that the index name is known to explain_spatial_queries
+    coordinates = models.PointField(spatial_index=False)
     data = JSONField(default=dict, blank=True)
     url = models.CharField(max_length=150, null=True, blank=True, help_text="Optional url for this point")
     image = models.ImageField(
@@ -64,6 +67,28 @@ class Location(BaseModel):
     def __str__(self):
         return "%s: %s" % (self.category, self.name)
 
+    class Meta:
+        indexes = [
+            GistIndex(fields=["coordinates"], name="idx_points_location_coords"),
+        ]
+
+
+class LocationGeography(models.Model):
+    """
+    Precomputed membership of a location in the boundaries of every geography that contains
+    it, maintained by wazimap_ng.points.services.membership.
+    """
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, related_name="geography_memberships")
+    geography = models.ForeignKey("datasets.Geography", on_delete=models.CASCADE, related_name="location_memberships")
+
+    def __str__(self):
+        return f"{self.location} in {self.geography}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["geography", "location"], name="unique_location_geography")
+        ]
+
 
 class ProfileCategory(BaseModel):
     profile = models.ForeignKey(Profile, on_delete=models.CASCADE)
@@ -87,8 +112,8 @@ class ProfileCategory(BaseModel):
 class CoordinateFile(BaseModel):
     document = models.FileField(
         upload_to=get_file_path,
-        validators=[FileExtensionValidator(allowed_extensions=["csv",])],
-        help_text="File Type required : CSV | Fields that are required: Name, Longitude, latitude"
+        validators=[FileExtensionValidator(allowed_extensions=["csv", "parquet", "arrow", "feather"])],
+        help_text="File Type required : CSV, Parquet or Arrow | Fields that are required: Name, Longitude, latitude"
     )
     task = models.ForeignKey(Task, on_delete=models.SET_NULL, blank=True, null=True)
     name = models.CharField(max_length=50)
@@ -104,9 +129,12 @@ class CoordinateFile(BaseModel):
         document_name = self.document.name
         headers = []
         try:
-            headers = pd.read_csv(
-                BytesIO(self.document.read()), nrows=1, dtype=str
-            ).columns.str.lower()
+            if is_arrow_file(document_name):
+                headers = read_arrow_columns(self.document)
+            else:
+                headers = pd.read_csv(
+                    BytesIO(self.document.read()), nrows=1, dtype=str
+                ).columns.str.lower()
         except pd.errors.ParserError as e:
             raise ValidationError(
                 "Not able to parse passed file. Error while reading file: %s" % str(e)
@@ -115,6 +143,11 @@ class CoordinateFile(BaseModel):
             raise ValidationError(
                 "File seems to be empty. Error while reading file: %s" % str(e)
             )
+        except ValueError as e:
+            # Raised by pyarrow for files that are not parquet or arrow, or when it is not installed
+            raise ValidationError(
+                "Not able to parse passed file. Error while reading file: %s" % str(e)
+            )
 
         required_headers = ["longitude", "latitude", "name"]
 
@@ -0,0 +1,27 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class GeoJsonCursorPagination(CursorPagination):
+    """
+    Keyset pagination of locations by id which keeps every page as cheap as the first.
+    Pages are only used when page_size is requested or LOCATIONS_PAGE_SIZE is set, the
+    full collection is returned otherwise.
+    """
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 10000
+
+    def __init__(self):
+        self.page_size = getattr(settings, "LOCATIONS_PAGE_SIZE", None)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("type", "FeatureCollection"),
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("features", data["features"]),
+        ]))
@@ -36,6 +36,16 @@ class LocationSerializer(GeoFeatureModelSerializer):
 
         fields = ('id', 'data', "name", "url", "image")
 
+class LightLocationSerializer(GeoFeatureModelSerializer):
+    """
+    Only the fields needed to place and label a location on the map.
+    """
+    class Meta:
+        model = models.Location
+        geo_field = "coordinates"
+
+        fields = ('id', "name")
+
 class LocationInlineSerializer(serializers.ModelSerializer):
     class Meta:
         model = models.Location
@@ -2,21 +2,26 @@ import logging
 
 from wazimap_ng.points.models import Location, Category, ProfileCategory
 from wazimap_ng.profile.models import Profile
-from wazimap_ng.datasets.models import Geography
+from wazimap_ng.datasets.services import geography_resolver
 from wazimap_ng.boundaries.models import GeographyBoundary
 
 logger = logging.getLogger(__name__)
 
-def get_locations(queryset, profile, category=None, geography_code=None):
+def get_locations(queryset, profile, category=None, geography_code=None, bbox=None):
     geography = None
 
+    if bbox is not None:
+        # && on the spatial index, for points this is the same as containment
+        queryset = queryset.filter(coordinates__bboverlaps=bbox)
+
     if category is not None:
         queryset = queryset.filter(category=category)
 
     if geography_code is not None:
         version = profile.geography_hierarchy.root_geography.version
-        geography = Geography.objects.get(code=geography_code, version=version) 
-        boundary = GeographyBoundary.objects.get(geography=geography)
+        geography_id = geography_resolver.resolve(geography_code, version)
+        if not GeographyBoundary.objects.filter(geography_id=geography_id).exists():
+            raise GeographyBoundary.DoesNotExist(f"No boundary for geography {geography_code} ({version})")
 
-        queryset = queryset.filter(coordinates__within=boundary.geom)
+        queryset = queryset.filter(geography_memberships__geography_id=geography_id)
     return queryset
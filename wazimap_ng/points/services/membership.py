@@ -0,0 +1,61 @@
+from django.db import connection, transaction
+
+from wazimap_ng.boundaries.models import GeographyBoundary
+
+from .. import models
+
+MEMBERSHIP_SQL = """
+    SELECT l.id, b.geography_id
+    FROM {location_table} l
+    JOIN {boundary_table} b ON l.coordinates && b.geom AND ST_Within(l.coordinates, b.geom)
+    WHERE {column} IN ({ids_sql})
+"""
+
+
+def get_membership_sql(column, queryset):
+    """
+    Returns the query and parameters that select the (location_id, geography_id) pairs
+    for the locations or boundaries in the queryset, column is l.id or b.id.
+    """
+    quote_name = connection.ops.quote_name
+    ids_sql, ids_params = queryset.values("pk").query.sql_with_params()
+    sql = MEMBERSHIP_SQL.format(
+        location_table=quote_name(models.Location._meta.db_table),
+        boundary_table=quote_name(GeographyBoundary._meta.db_table),
+        column=column,
+        ids_sql=ids_sql
+    )
+    return sql, ids_params
+
+
+def insert_memberships(column, queryset):
+    sql, params = get_membership_sql(column, queryset)
+    membership_table = connection.ops.quote_name(models.LocationGeography._meta.db_table)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            INSERT INTO {membership_table} (location_id, geography_id)
+            {sql}
+            ON CONFLICT DO NOTHING
+        """, params)
+        return cursor.rowcount
+
+
+@transaction.atomic
+def update_location_memberships(locations):
+    """
+    Recomputes the geographies that contain each location in the queryset, at every level
+    that has boundaries. Returns the number of memberships stored.
+    """
+    models.LocationGeography.objects.filter(location__in=locations.values("pk")).delete()
+    return insert_memberships("l.id", locations)
+
+
+@transaction.atomic
+def update_boundary_memberships(boundaries):
+    """
+    Recomputes the locations that fall within each boundary in the queryset. Returns the
+    number of memberships stored.
+    """
+    models.LocationGeography.objects.filter(geography__in=boundaries.values("geography_id")).delete()
+    return insert_memberships("b.id", boundaries)
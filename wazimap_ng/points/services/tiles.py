@@ -0,0 +1,36 @@
+from django.db import connection
+
+from wazimap_ng.general.services.tiles import render_tile
+
+from .. import models
+
+LOCATION_TILE_SQL = """
+    WITH bounds AS (
+        SELECT ST_MakeEnvelope(%(xmin)s, %(ymin)s, %(xmax)s, %(ymax)s, 3857) AS geom
+    ), features AS (
+        SELECT
+            ST_AsMVTGeom(
+                ST_Transform(l.coordinates, 3857), bounds.geom, %(extent)s, %(buffer)s, true
+            ) AS geom,
+            l.id, l.name, l.url, l.data
+        FROM {location_table} l
+        CROSS JOIN bounds
+        WHERE l.category_id = %(category_id)s
+            AND l.coordinates && ST_Transform(bounds.geom, 4326)
+    )
+    SELECT ST_AsMVT(features, 'points', %(extent)s, 'geom') FROM features WHERE geom IS NOT NULL
+"""
+
+
+def get_location_tile_sql():
+    return LOCATION_TILE_SQL.format(
+        location_table=connection.ops.quote_name(models.Location._meta.db_table)
+    )
+
+
+def get_location_tile(category_id, z, x, y):
+    """
+    Returns a vector tile with a "points" layer holding the locations of the category
+    that fall in the tile.
+    """
+    return render_tile(get_location_tile_sql(), z, x, y, category_id=category_id)
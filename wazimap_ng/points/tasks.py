@@ -3,14 +3,38 @@ import logging
 from django.db import transaction
 from django.conf import settings
 
+from . import models
 from .dataloader import loaddata
 import pandas as pd
+from wazimap_ng.general.services.arrow_reader import is_arrow_file, read_arrow_chunks
 from wazimap_ng.general.services.csv_helpers import csv_logger
 from wazimap_ng.utils import get_stream_reader, clean_columns
+from wazimap_ng.points.services.membership import update_location_memberships
 
 logger = logging.getLogger(__name__)
 
 
+def read_csv_chunks(document, chunksize):
+    buffer = document.open("rb")
+    encoding, wrapper_file = get_stream_reader(buffer)
+    old_columns, new_columns = clean_columns(wrapper_file)
+
+    def chunks():
+        for df in pd.read_csv(
+            wrapper_file,
+            chunksize=chunksize,
+            skiprows=1,
+            sep=",",
+            header=None,
+            keep_default_na=False,
+            encoding=encoding,
+        ):
+            df.columns = old_columns
+            yield df.loc[:, new_columns]
+
+    return new_columns, chunks()
+
+
 @transaction.atomic
 def process_uploaded_file(point_file, subtheme, **kwargs):
     """
@@ -19,31 +43,27 @@ def process_uploaded_file(point_file, subtheme, **kwargs):
     Read files using pandas according to file extension.
     After reading data convert to list rather than using numpy array.
     """
-    buffer = point_file.document.open("rb")
-    encoding, wrapper_file = get_stream_reader(buffer)
-    old_columns, new_columns = clean_columns(wrapper_file)
-
     chunksize = getattr(settings, "CHUNK_SIZE_LIMIT", 1000000)
     row_number = 1
     error_logs = []
 
-    for df in pd.read_csv(
-        wrapper_file,
-        chunksize=chunksize,
-        skiprows=1,
-        sep=",",
-        header=None,
-        keep_default_na=False,
-        encoding=encoding,
-    ):
-        df.columns = old_columns
-        df = df.loc[:, new_columns]
+    if is_arrow_file(point_file.document.name):
+        new_columns, chunks = read_arrow_chunks(point_file.document, chunksize)
+        # Missing values are empty strings as in csv files
+        chunks = (df.astype(object).where(df.notna(), "") for df in chunks)
+    else:
+        new_columns, chunks = read_csv_chunks(point_file.document, chunksize)
+
+    for df in chunks:
         datasource = (dict(d[1]) for d in df.iterrows())
         logs = loaddata(subtheme, datasource, row_number)
 
         error_logs = error_logs + logs
         logger.info(logs)
-        row_number = row_number + chunksize
+        row_number = row_number + len(df)
+
+    # Locations are bulk created so they are placed in their geographies here
+    update_location_memberships(models.Location.objects.filter(category=subtheme))
 
     error_file_log = incorrect_file_log = None
     if error_logs:
@@ -4,27 +4,32 @@ from collections import defaultdict
 
 from django.views.decorators.http import condition
 from django.utils.decorators import method_decorator
-from django.http import Http404
+from django.http import Http404, HttpResponse
 from django.db.models import Count
 from django.forms.models import model_to_dict
 from django.http import Http404
 from django.core.exceptions import ObjectDoesNotExist
+from django.contrib.gis.geos import Polygon
 from django.shortcuts import get_object_or_404
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework_gis.pagination import GeoJsonPagination
+from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework import generics
 
 from wazimap_ng.profile.models import Profile
 from wazimap_ng.datasets.models import Geography
 from wazimap_ng.points.services.locations import get_locations
+from wazimap_ng.points.services.tiles import get_location_tile
+from wazimap_ng.general.services.tiles import is_valid_tile, MVT_CONTENT_TYPE, TileContentNegotiation
 from wazimap_ng.general.serializers import MetaDataSerializer
+from wazimap_ng.utils import truthy
 
 from . import models
 from . import serializers
-from ..cache import etag_point_updated, last_modified_point_updated
-from ..boundaries.models import GeographyBoundary
+from .pagination import GeoJsonCursorPagination
+from ..cache import etag_point_updated, last_modified_point_updated, cache_decorator, location_tile_tags
 
 logger = logging.getLogger(__name__)
 
@@ -47,10 +52,33 @@ class CategoryList(generics.ListAPIView):
         return Response(data)
 
 
+def get_bbox(request):
+    """
+    Parses the bbox=min_lon,min_lat,max_lon,max_lat parameter.
+    """
+    bbox = request.query_params.get("bbox")
+    if bbox is None:
+        return None
+
+    try:
+        xmin, ymin, xmax, ymax = [float(value) for value in bbox.split(",")]
+    except ValueError:
+        raise ValidationError({"bbox": "Expected min_lon,min_lat,max_lon,max_lat"})
+
+    polygon = Polygon.from_bbox((xmin, ymin, xmax, ymax))
+    polygon.srid = 4326
+    return polygon
+
+
 class LocationList(generics.ListAPIView):
-    pagination_class = GeoJsonPagination
+    pagination_class = GeoJsonCursorPagination
     serializer_class = serializers.LocationSerializer
-    queryset = models.Location.objects.all().prefetch_related("category")
+    queryset = models.Location.objects.order_by("id")
+
+    def get_serializer_class(self):
+        if truthy(self.request.query_params.get("light")):
+            return serializers.LightLocationSerializer
+        return self.serializer_class
 
     def list(self, request, profile_id, profile_category_id=None, geography_code=None):
         try:
@@ -61,22 +89,50 @@ class LocationList(generics.ListAPIView):
 
             queryset = get_locations(
                 self.get_queryset(), profile, profile_category.category,
-                geography_code
+                geography_code or request.query_params.get("geography_code"),
+                bbox=get_bbox(request)
             )
-            serializer = self.get_serializer(queryset, many=True)
-            data = serializer.data
-            return Response(data)
         except ObjectDoesNotExist as e:
             logger.exception(e)
             raise Http404
 
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
     @method_decorator(condition(etag_func=etag_point_updated, last_modified_func=last_modified_point_updated))
     def dispatch(self, *args, **kwargs):
         return super().dispatch(*args, **kwargs)
 
+
+@cache_decorator("location_tile", tags=location_tile_tags)
+def location_tile_helper(category_id, z, x, y):
+    return get_location_tile(category_id, z, x, y)
+
+
+class LocationTile(APIView):
+    """
+    Returns a Mapbox vector tile of the locations of a profile category. This is a DRF
+    view so that the locations of private profiles are protected by ProfilePermissions.
+    """
+    content_negotiation_class = TileContentNegotiation
+
+    def get(self, request, profile_id, profile_category_id, z, x, y):
+        if not is_valid_tile(z, x, y):
+            raise Http404
+
+        profile_category = get_object_or_404(
+            models.ProfileCategory, id=profile_category_id, profile_id=profile_id
+        )
+        tile = location_tile_helper(profile_category.category_id, z, x, y)
+        return HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
+
 def boundary_point_count_helper(profile, geography):
-    boundary = GeographyBoundary.objects.get(geography__code=geography.code, geography__version=geography.version)
-    locations = models.Location.objects.filter(coordinates__contained=boundary.geom)
+    locations = models.Location.objects.filter(geography_memberships__geography=geography)
     location_count = (
         locations
             .filter(category__profilecategory__profile=profile)
@@ -0,0 +1,237 @@
+import copy
+import json
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from wazimap_ng.utils import qsdict, mergedict, expand_nested_list, pivot
+from wazimap_ng.profile.serializers.indicator_data_serializer import build_indicator_tree
+
+
+def merge_indicator_tree(subcategories, indicator_data, children_indicator_data):
+    # The previous implementation, kept here for comparison
+    indicator_data2 = list(expand_nested_list(indicator_data, "jsdata"))
+
+    c = qsdict(subcategories,
+        lambda x: x.category.name,
+        lambda x: {"description": x.category.description}
+    )
+
+    s = qsdict(subcategories,
+        lambda x: x.category.name,
+        lambda x: "subcategories",
+        "name",
+        lambda x: {"description": x.description}
+    )
+
+    d_groups = qsdict(indicator_data,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: "groups",
+        lambda x: x["jsdata"]["groups"]
+    )
+
+    d_groups2 = qsdict(children_indicator_data,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: "groups",
+        lambda x: "children",
+        "geography_code",
+        lambda x: x["jsdata"]["groups"]
+    )
+    d_groups2 = pivot(d_groups2, [0, 1, 2, 3, 4, 5, 8, 9, 10, 6, 7])
+
+    d_subindicators = qsdict(indicator_data,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: "subindicators",
+        lambda x: "count",
+        lambda x: dict(x["jsdata"]["subindicators"]),
+    )
+
+    d_subindicators = pivot(d_subindicators, [0, 1, 2, 3, 4, 5, 7, 6])
+
+    d_children = qsdict(children_indicator_data,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: "subindicators",
+        "geography_code",
+        lambda x: "children",
+        lambda x: x["jsdata"]["subindicators"]
+    )
+
+    d_children = pivot(d_children, [0, 1, 2, 3, 4, 5, 8, 7, 6])
+
+    # This is needed in additio to d3 in case the parent geography does not have this indicator
+    # In which case it won't return metadata
+    d_children2 = qsdict(children_indicator_data,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: {
+            "description": x["description"],
+            "choropleth_method": x["choropleth_method"],
+            "metadata": {
+                "source": x["metadata_source"],
+                "description": x["metadata_description"],
+                "url": x["metadata_url"],
+                "licence": {
+                    "name": x["licence_name"],
+                    "url": x["licence_url"]
+                }
+            },
+            "chart_configuration": x["indicator_chart_configuration"],
+        },
+    )
+
+    d3 = qsdict(indicator_data2,
+        "category",
+        lambda x: "subcategories",
+        "subcategory",
+        lambda x: "indicators",
+        "profile_indicator_label",
+        lambda x: {
+            "description": x["description"],
+            "choropleth_method": x["choropleth_method"],
+            "metadata": {
+                "source": x["metadata_source"],
+                "description": x["metadata_description"],
+                "url": x["metadata_url"],
+                "licence": {
+                    "name": x["licence_name"],
+                    "url": x["licence_url"]
+                }
+            },
+            "chart_configuration": x["indicator_chart_configuration"],
+        },
+    )
+
+
+    new_dict = {}
+    mergedict(new_dict, c)
+    mergedict(new_dict, s)
+    mergedict(new_dict, d_groups)
+    mergedict(new_dict, d_groups2)
+    mergedict(new_dict, d_subindicators)
+    mergedict(new_dict, d_children)
+    mergedict(new_dict, d_children2)
+    mergedict(new_dict, d3)
+
+    return new_dict
+
+
+def generate_profile(indicators, children, groups, subindicators):
+    """
+    Generates subcategories and rearranged and sorted IndicatorData rows shaped like
+    the ones IndicatorDataSerializer passes to the builder.
+    """
+    categories = [
+        SimpleNamespace(name=f"Category {idx}", description=f"Category {idx} description")
+        for idx in range(max(indicators // 30, 1))
+    ]
+    subcategories = [
+        SimpleNamespace(name=f"Subcategory {idx}", description=f"Subcategory {idx} description", category=category)
+        for category in categories
+        for idx in range(3)
+    ]
+
+    def row(idx, scale, code):
+        subcategory = subcategories[idx % len(subcategories)]
+        values = [f"value {v}" for v in range(subindicators)]
+        return {
+            "jsdata": {
+                "groups": {
+                    f"group {g}": {
+                        f"subindicator {s}": {value: {"count": scale * (s + 1)} for value in values}
+                        for s in range(subindicators)
+                    }
+                    for g in range(groups)
+                },
+                "subindicators": {value: scale * 10.0 for value in values},
+            },
+            "geography_code": code,
+            "description": f"Indicator {idx} description",
+            "indicator_name": f"Indicator {idx}",
+            "indicator_group": ["group"],
+            "profile_indicator_label": f"Indicator {idx}",
+            "subcategory": subcategory.name,
+            "category": subcategory.category.name,
+            "choropleth_method": "subindicator",
+            "dataset": idx,
+            "metadata_source": "Source",
+            "metadata_description": "Description",
+            "metadata_url": "http://example.com",
+            "licence_url": "http://example.com/licence",
+            "licence_name": "Licence",
+            "indicator_chart_configuration": {"types": {"Value": {"formatting": "0,0"}}},
+        }
+
+    indicator_data = [row(idx, 1.0, "PARENT") for idx in range(indicators)]
+    children_indicator_data = [
+        row(idx, float(child), f"CHILD{child}") for child in range(children) for idx in range(indicators)
+    ]
+
+    return subcategories, indicator_data, children_indicator_data
+
+
+class Command(BaseCommand):
+    help = """Compares the CPU time and peak memory of building the profile tree with the single pass
+builder and with the previous qsdict/pivot/mergedict assembly on a generated profile.
+Example: python3 manage.py benchmark_profile_builder --indicators 300"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--indicators", type=int, default=300, help="Number of profile indicators.")
+        parser.add_argument("--children", type=int, default=10, help="Number of child geographies.")
+        parser.add_argument("--groups", type=int, default=2, help="Number of groups per indicator.")
+        parser.add_argument("--subindicators", type=int, default=5, help="Number of subindicators per group.")
+        parser.add_argument("--repeat", type=int, default=3, help="Number of runs, the fastest is reported.")
+
+    def measure(self, builder, data, repeat):
+        best = None
+        for _ in range(repeat):
+            # Both builders modify their input
+            args = copy.deepcopy(data)
+            start = time.process_time()
+            builder(*args)
+            duration = time.process_time() - start
+            best = duration if best is None else min(best, duration)
+
+        args = copy.deepcopy(data)
+        tracemalloc.start()
+        output = builder(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return best, peak, output
+
+    def handle(self, *args, **options):
+        data = generate_profile(
+            options["indicators"], options["children"], options["groups"], options["subindicators"]
+        )
+
+        results = {}
+        for name, builder in [("previous", merge_indicator_tree), ("single pass", build_indicator_tree)]:
+            duration, peak, output = self.measure(builder, data, options["repeat"])
+            results[name] = json.dumps(output)
+            self.stdout.write(f"{name}: {duration * 1000:.1f}ms cpu, {peak / 1024 / 1024:.1f}MB peak allocations")
+
+        if results["previous"] != results["single pass"]:
+            self.stderr.write("The builders produced different output")
+        else:
+            self.stdout.write("The output of both builders is identical")
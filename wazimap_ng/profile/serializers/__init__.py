@@ -5,6 +5,7 @@ from django.core.serializers import serialize
 
 from .. import models
 from .indicator_data_serializer import IndicatorDataSerializer
+from .indicator_data_lookup import IndicatorDataLookup
 from .metrics_serializer import MetricsSerializer
 from .profile_logo import ProfileLogoSerializer
 from .overview_serializer import OverviewSerializer
@@ -0,0 +1,80 @@
+from collections import defaultdict
+
+from django.db.models import Q
+
+from wazimap_ng.datasets.models import IndicatorData, IndicatorDataRollup
+
+from .. import models
+
+
+class IndicatorDataLookup:
+    """
+    Loads the IndicatorData needed by the key metrics and highlights of a profile in at
+    most two queries. Data for the geography itself is loaded for every indicator. Sibling
+    denominators come from IndicatorDataRollup, sibling rows are only loaded for indicators
+    that use the sibling denominator and have not been rolled up yet.
+    """
+    def __init__(self, profile, geography):
+        self.geography = geography
+        self._geography_data = {}
+        self._sibling_data = defaultdict(list)
+        self._sibling_totals = {}
+        self._load(profile)
+
+    def _load(self, profile):
+        metrics = models.ProfileKeyMetrics.objects.filter(profile=profile)
+        highlights = models.ProfileHighlight.objects.filter(profile=profile)
+
+        indicator_ids = (
+            Q(indicator_id__in=metrics.values("variable_id"))
+            | Q(indicator_id__in=highlights.values("indicator_id"))
+        )
+        sibling_indicator_ids = (
+            Q(indicator_id__in=metrics.filter(denominator="sibling").values("variable_id"))
+            | Q(indicator_id__in=highlights.filter(denominator="sibling").values("indicator_id"))
+        )
+
+        rollups = (IndicatorDataRollup.objects
+            .filter(sibling_indicator_ids)
+            .filter(
+                parent_path=IndicatorDataRollup.get_parent_path(self.geography.path, self.geography.depth),
+                version=self.geography.version
+            )
+            .values_list("indicator_id", "subindicators")
+        )
+        self._sibling_totals = dict(rollups)
+
+        siblings = Q(sibling_indicator_ids, geography__in=self.geography.get_siblings())
+        if self._sibling_totals:
+            siblings &= ~Q(indicator_id__in=list(self._sibling_totals))
+
+        indicator_data = (IndicatorData.objects
+            .filter(indicator_ids)
+            .filter(Q(geography_id=self.geography.id) | siblings)
+            .order_by("id")
+            .values_list("indicator_id", "geography_id", "data")
+        )
+
+        for indicator_id, geography_id, data in indicator_data:
+            if geography_id == self.geography.id:
+                # Keep the first row as .first() did when there are multiple results
+                self._geography_data.setdefault(indicator_id, data)
+            self._sibling_data[indicator_id].append((geography_id, data))
+
+    def geography_data(self, indicator_id):
+        """
+        Returns the data of the indicator for the geography or None if there is none.
+        """
+        return self._geography_data.get(indicator_id)
+
+    def sibling_total(self, indicator_id, subindicator):
+        """
+        Returns the total of the subindicator across the geography and its siblings.
+        """
+        if indicator_id in self._sibling_totals:
+            return self._sibling_totals[indicator_id].get(subindicator, 0)
+
+        return sum(
+            data["subindicators"].get(subindicator, 0)
+            for _, data in self._sibling_data.get(indicator_id, [])
+        )
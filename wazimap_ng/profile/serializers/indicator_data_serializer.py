@@ -3,14 +3,33 @@ from collections.abc import Iterable
 
 from django.db.models import F
 
-from wazimap_ng.datasets.models import IndicatorData 
-from wazimap_ng.utils import qsdict, mergedict, expand_nested_list, pivot
+from wazimap_ng.datasets.models import IndicatorData, IndicatorDataRollup
+from wazimap_ng.utils import mergedict
 
 from .. import models
 from .profile_indicator_sorter import ProfileIndicatorSorter
 
 logger = logging.getLogger(__name__)
 
+def get_indicator_fields():
+    return dict(
+        description=F("indicator__profileindicator__description"),
+        indicator_name=F("indicator__name"),
+        indicator_group=F("indicator__groups"),
+        profile_indicator_label=F("indicator__profileindicator__label"),
+        profile_indicator_order=F("indicator__profileindicator__order"),
+        subcategory=F("indicator__profileindicator__subcategory__name"),
+        category=F("indicator__profileindicator__subcategory__category__name"),
+        choropleth_method=F("indicator__profileindicator__choropleth_method__name"),
+        dataset=F("indicator__dataset"),
+        metadata_source=F("indicator__dataset__metadata__source"),
+        metadata_description=F("indicator__dataset__metadata__description"),
+        metadata_url=F("indicator__dataset__metadata__url"),
+        licence_url=F("indicator__dataset__metadata__licence__url"),
+        licence_name=F("indicator__dataset__metadata__licence__name"),
+        indicator_chart_configuration=F("indicator__profileindicator__chart_configuration"),
+    )
+
 def get_indicator_data(profile, geographies):
 
     data = (IndicatorData.objects
@@ -19,28 +38,42 @@ def get_indicator_data(profile, geographies):
             indicator__profileindicator__profile=profile,
             geography__in=geographies
         )
-        .values(
-            jsdata=F("data"),
-            description=F("indicator__profileindicator__description"),
-            indicator_name=F("indicator__name"),
-            indicator_group=F("indicator__groups"),
-            profile_indicator_label=F("indicator__profileindicator__label"),
-            subcategory=F("indicator__profileindicator__subcategory__name"),
-            category=F("indicator__profileindicator__subcategory__category__name"),
-            choropleth_method=F("indicator__profileindicator__choropleth_method__name"),
-            dataset=F("indicator__dataset"),
-            metadata_source=F("indicator__dataset__metadata__source"),
-            metadata_description=F("indicator__dataset__metadata__description"),
-            metadata_url=F("indicator__dataset__metadata__url"),
-            licence_url=F("indicator__dataset__metadata__licence__url"),
-            licence_name=F("indicator__dataset__metadata__licence__name"),
-            indicator_chart_configuration=F("indicator__profileindicator__chart_configuration"),
-        )
+        .values(jsdata=F("data"), geography_code=F("geography__code"), **get_indicator_fields())
         .order_by("indicator__profileindicator__order")
     )
 
     return data
 
+def get_children_indicator_data(profile, geography):
+    """
+    Returns the same rows as get_indicator_data for the children of the geography. The
+    rows are read from one IndicatorDataRollup per indicator. Indicators that have not
+    been rolled up yet are read from IndicatorData.
+    """
+    rollups = (IndicatorDataRollup.objects
+        .filter(
+            indicator__in=profile.indicators.all(),
+            indicator__profileindicator__profile=profile,
+            parent_path=geography.path,
+            version=geography.version
+        )
+        .values(children_data=F("children"), **get_indicator_fields())
+        .order_by("indicator__profileindicator__order")
+    )
+
+    rows = []
+    for rollup in rollups:
+        children_data = rollup.pop("children_data")
+        for code, data in children_data.items():
+            rows.append({"jsdata": data, "geography_code": code, **rollup})
+
+    not_rolled_up = (get_indicator_data(profile, geography.get_children())
+        .exclude(indicator__in=IndicatorDataRollup.objects.values("indicator_id"))
+    )
+    rows.extend(not_rolled_up)
+
+    return sorted(rows, key=lambda row: row["profile_indicator_order"])
+
 def rearrange_group(data):
     for row in data:
         group_dict = row["jsdata"]["groups"]
@@ -57,6 +90,123 @@ def rearrange_group(data):
         yield row
 
 
+def index_rows(rows):
+    """
+    Indexes rows by category, subcategory and label. The last row wins when
+    labels repeat and keys keep the order in which they were first seen.
+    """
+    index = {}
+    for row in rows:
+        labels = index.setdefault(row["category"], {}).setdefault(row["subcategory"], {})
+        labels[row["profile_indicator_label"]] = row
+    return index
+
+def index_children_rows(rows):
+    """
+    Indexes the rows of the children like index_rows but keeps the row of every child.
+    """
+    index = {}
+    for row in rows:
+        labels = index.setdefault(row["category"], {}).setdefault(row["subcategory"], {})
+        labels.setdefault(row["profile_indicator_label"], []).append(row)
+    return index
+
+def iter_index(index):
+    for category, subcategories in index.items():
+        for subcategory, labels in subcategories.items():
+            for label, row in labels.items():
+                yield (category, "subcategories", subcategory, "indicators", label), row
+
+def get_node(d, keys):
+    """
+    Returns the dict at keys, creating (or replacing non-dict values with) empty
+    dicts along the way.
+    """
+    for key in keys:
+        child = d.get(key)
+        if not isinstance(child, dict):
+            child = d[key] = {}
+        d = child
+    return d
+
+def get_metadata(row):
+    return {
+        "description": row["description"],
+        "choropleth_method": row["choropleth_method"],
+        "metadata": {
+            "source": row["metadata_source"],
+            "description": row["metadata_description"],
+            "url": row["metadata_url"],
+            "licence": {
+                "name": row["licence_name"],
+                "url": row["licence_url"]
+            }
+        },
+        "chart_configuration": row["indicator_chart_configuration"],
+    }
+
+def build_indicator_tree(subcategories, indicator_data, children_indicator_data):
+    """
+    Builds the category -> subcategory -> indicator tree in one pass over the rows of the
+    geography and one pass over the rows of its children.
+
+    Keys are added in the order in which the tree used to be merged together: category and
+    subcategory descriptions, the groups of the geography and then of its children, the
+    subindicators of the geography and then of its children and finally the metadata.
+    The values of the children are keyed by their geography code.
+    """
+    tree = {}
+    for subcategory in subcategories:
+        category = tree.setdefault(subcategory.category.name, {})
+        category["description"] = subcategory.category.description
+        get_node(category, ["subcategories", subcategory.name])["description"] = subcategory.description
+
+    parents = index_rows(indicator_data)
+    children = index_children_rows(children_indicator_data)
+
+    for path, row in iter_index(parents):
+        get_node(tree, path)["groups"] = row["jsdata"]["groups"]
+
+    for path, rows in iter_index(children):
+        indicator = None
+        for row in rows:
+            for group, group_subindicators in row["jsdata"]["groups"].items():
+                for subindicator, values in group_subindicators.items():
+                    for value, counts in values.items():
+                        if indicator is None:
+                            indicator = get_node(tree, path)
+                        children_counts = get_node(indicator, ["groups", group, subindicator, value, "children"])
+                        children_counts[row["geography_code"]] = counts["count"]
+
+    for path, row in iter_index(parents):
+        subindicators = row["jsdata"]["subindicators"]
+        if len(subindicators) > 0:
+            indicator = get_node(tree, path)
+            for subindicator, count in subindicators.items():
+                get_node(indicator, ["subindicators", subindicator])["count"] = count
+
+    for path, rows in iter_index(children):
+        for row in rows:
+            subindicators = row["jsdata"]["subindicators"]
+            if len(subindicators) > 0:
+                indicator = get_node(tree, path)
+                for subindicator, count in subindicators.items():
+                    get_node(indicator, ["subindicators", subindicator, "children"])[row["geography_code"]] = count
+
+    for path, rows in iter_index(children):
+        mergedict(get_node(tree, path), get_metadata(rows[-1]))
+
+    for path, row in iter_index(parents):
+        mergedict(get_node(tree, path), get_metadata(row))
+
+    return tree
+
+def get_subcategories(profile):
+    return (models.IndicatorSubcategory.objects.filter(category__profile=profile)
+        .order_by("category__order", "order")
+        .select_related("category")
+    )
+
 def IndicatorDataSerializer(profile, geography):
 
     sorters = ProfileIndicatorSorter(profile)
@@ -65,134 +215,8 @@ def IndicatorDataSerializer(profile, geography):
     indicator_data = rearrange_group(indicator_data)
     indicator_data = sorters.sort(indicator_data)
 
-    children_indicator_data = get_indicator_data(profile, geography.get_children())
+    children_indicator_data = get_children_indicator_data(profile, geography)
     children_indicator_data = rearrange_group(children_indicator_data)
     children_indicator_data = sorters.sort(children_indicator_data)
 
-    indicator_data2 = list(expand_nested_list(indicator_data, "jsdata"))
-
-    subcategories = (models.IndicatorSubcategory.objects.filter(category__profile=profile)
-        .order_by("category__order", "order")
-        .select_related("category")
-    )
-
-    c = qsdict(subcategories,
-        lambda x: x.category.name,
-        lambda x: {"description": x.category.description}
-    )
-
-    s = qsdict(subcategories,
-        lambda x: x.category.name,
-        lambda x: "subcategories",
-        "name",
-        lambda x: {"description": x.description}
-    )
-
-    d_groups = qsdict(indicator_data,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: "groups",
-        lambda x: x["jsdata"]["groups"]
-    )
-
-    d_groups2 = qsdict(children_indicator_data,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: "groups",
-        lambda x: "children",
-        "geography_code",
-        lambda x: x["jsdata"]["groups"]
-    )
-    d_groups2 = pivot(d_groups2, [0, 1, 2, 3, 4, 5, 8, 9, 10, 6, 7])
-
-    d_subindicators = qsdict(indicator_data,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: "subindicators",
-        lambda x: "count",
-        lambda x: dict(x["jsdata"]["subindicators"]),
-    )
-
-    d_subindicators = pivot(d_subindicators, [0, 1, 2, 3, 4, 5, 7, 6])
-
-    d_children = qsdict(children_indicator_data,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: "subindicators",
-        "geography_code",
-        lambda x: "children",
-        lambda x: x["jsdata"]["subindicators"]
-    )
-
-    d_children = pivot(d_children, [0, 1, 2, 3, 4, 5, 8, 7, 6])
-
-    # This is needed in additio to d3 in case the parent geography does not have this indicator
-    # In which case it won't return metadata
-    d_children2 = qsdict(children_indicator_data,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: {
-            "description": x["description"],
-            "choropleth_method": x["choropleth_method"],
-            "metadata": {
-                "source": x["metadata_source"],
-                "description": x["metadata_description"],
-                "url": x["metadata_url"],
-                "licence": {
-                    "name": x["licence_name"],
-                    "url": x["licence_url"]
-                }
-            },
-            "chart_configuration": x["indicator_chart_configuration"],
-        },
-    )
-
-    d3 = qsdict(indicator_data2,
-        "category",
-        lambda x: "subcategories",
-        "subcategory",
-        lambda x: "indicators",
-        "profile_indicator_label",
-        lambda x: {
-            "description": x["description"],
-            "choropleth_method": x["choropleth_method"],
-            "metadata": {
-                "source": x["metadata_source"],
-                "description": x["metadata_description"],
-                "url": x["metadata_url"],
-                "licence": {
-                    "name": x["licence_name"],
-                    "url": x["licence_url"]
-                }
-            },
-            "chart_configuration": x["indicator_chart_configuration"],
-        },
-    )
-
-
-    new_dict = {}
-    mergedict(new_dict, c)
-    mergedict(new_dict, s)
-    mergedict(new_dict, d_groups)
-    mergedict(new_dict, d_groups2)
-    mergedict(new_dict, d_subindicators)
-    mergedict(new_dict, d_children)
-    mergedict(new_dict, d_children2)
-    mergedict(new_dict, d3)
-
-    return new_dict
+    return build_indicator_tree(get_subcategories(profile), indicator_data, children_indicator_data)
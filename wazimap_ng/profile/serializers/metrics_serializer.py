@@ -1,47 +1,37 @@
 from wazimap_ng.utils import mergedict
 
-from wazimap_ng.datasets.models import IndicatorData 
-
 from .. import models
+from .indicator_data_lookup import IndicatorDataLookup
 
 def get_subindicator(metric):
     subindicators = metric.variable.subindicators
     idx = metric.subindicator if metric.subindicator is not None else 0
     return subindicators[idx]
 
-def sibling(profile_key_metric, geography):
-    siblings = geography.get_siblings()
-    
-    indicator_data = IndicatorData.objects.filter(indicator__profilekeymetrics=profile_key_metric, geography__in=siblings)
-    if indicator_data.count() > 0:
+def sibling(profile_key_metric, geography, lookup):
+    data = lookup.geography_data(profile_key_metric.variable_id)
+    if data is not None:
         subindicator = get_subindicator(profile_key_metric)
-        numerator = None
-        denominator = 0
-        for datum in indicator_data:
-            if datum.geography == geography:
-                numerator = datum.data["subindicators"].get(subindicator, 0)
-            s = datum.data["subindicators"]
-            denominator += s[subindicator]
+        numerator = data["subindicators"].get(subindicator, 0)
+        denominator = lookup.sibling_total(profile_key_metric.variable_id, subindicator)
 
-        if denominator > 0 and numerator is not None:
+        if denominator > 0:
             return numerator / denominator
     return None
 
-def absolute_value(profile_key_metric, geography):
-    indicator_data = IndicatorData.objects.filter(indicator__profilekeymetrics=profile_key_metric, geography=geography)
-    if indicator_data.count() > 0:
+def absolute_value(profile_key_metric, geography, lookup):
+    data = lookup.geography_data(profile_key_metric.variable_id)
+    if data is not None:
         subindicator = get_subindicator(profile_key_metric)
-        data = indicator_data.first().data # TODO what to do with multiple results
         return data["subindicators"][subindicator]
     return None
 
-def subindicator(profile_key_metric, geography):
-    indicator_data = IndicatorData.objects.filter(indicator__profilekeymetrics=profile_key_metric, geography=geography)
-    if indicator_data.count() > 0:
-        indicator_data = indicator_data.first() # Fix this need to cater for multiple results
+def subindicator(profile_key_metric, geography, lookup):
+    data = lookup.geography_data(profile_key_metric.variable_id)
+    if data is not None:
         subindicator = get_subindicator(profile_key_metric)
-        numerator = indicator_data.data["subindicators"].get(subindicator, 0)
-        denominator = sum(indicator_data.data["subindicators"].values())
+        numerator = data["subindicators"].get(subindicator, 0)
+        denominator = sum(data["subindicators"].values())
 
         if denominator > 0 and numerator is not None:
             return numerator / denominator
@@ -53,17 +43,24 @@ algorithms = {
     "subindicators": subindicator
 }
 
-def MetricsSerializer(profile, geography):
+def MetricsSerializer(profile, geography, lookup=None):
+    """
+    lookup is an IndicatorDataLookup that can be shared with HighlightsSerializer,
+    one is created if it is not provided.
+    """
+    if lookup is None:
+        lookup = IndicatorDataLookup(profile, geography)
+
     out_js = {}
     profile_key_metrics = (models.ProfileKeyMetrics.objects
         .filter(profile=profile)
         .order_by("order")
-        .select_related("subcategory", "subcategory__category")
+        .select_related("subcategory", "subcategory__category", "variable")
     )
     for profile_key_metric in profile_key_metrics:
         denominator = profile_key_metric.denominator
         method = algorithms.get(denominator, absolute_value)
-        val = method(profile_key_metric, geography)
+        val = method(profile_key_metric, geography, lookup)
         if val is not None:
             js = {
                 profile_key_metric.subcategory.category.name: {
@@ -7,7 +7,7 @@ from wazimap_ng.datasets.serializers import GeographyHierarchySerializer
 from wazimap_ng.cms.serializers import ContentSerializer
 from .. import models
 from . import IndicatorDataSerializer, MetricsSerializer, ProfileLogoSerializer, HighlightsSerializer, OverviewSerializer
-from . import ProfileIndicatorSerializer
+from . import ProfileIndicatorSerializer, IndicatorDataLookup
 
 class SimpleProfileSerializer(serializers.ModelSerializer):
     class Meta:
@@ -41,9 +41,10 @@ def ExtendedProfileSerializer(profile, geography):
     models.ProfileKeyMetrics.objects.filter(subcategory__category__profile=profile)
 
     profile_data = IndicatorDataSerializer(profile, geography)
-    metrics_data = MetricsSerializer(profile, geography)
+    lookup = IndicatorDataLookup(profile, geography)
+    metrics_data = MetricsSerializer(profile, geography, lookup)
     logo_json = ProfileLogoSerializer(profile)
-    highlights = HighlightsSerializer(profile, geography)
+    highlights = HighlightsSerializer(profile, geography, lookup)
     overview = OverviewSerializer(profile)
 
     geo_js = AncestorGeographySerializer().to_representation(geography)
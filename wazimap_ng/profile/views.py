@@ -18,8 +18,10 @@ from rest_framework.exceptions import NotFound
 from . import models
 from . import serializers
 from ..cache import etag_profile_updated, last_modified_profile_updated
+from ..streaming import json_response
 
 from wazimap_ng.datasets.models import Geography
+from wazimap_ng.datasets.services import geography_resolver
 
 logger = logging.getLogger(__name__)
 
@@ -63,10 +65,13 @@ class ProfileByUrl(generics.RetrieveAPIView):
 def profile_geography_data(request, profile_id, geography_code):
     profile = get_object_or_404(models.Profile, pk=profile_id)
     version = profile.geography_hierarchy.root_geography.version
-    geography = get_object_or_404(Geography, code=geography_code, version=version)
+    try:
+        geography = geography_resolver.resolve_geography(geography_code, version)
+    except Geography.DoesNotExist:
+        raise Http404
 
     js = serializers.ExtendedProfileSerializer(profile, geography)
-    return Response(js)
+    return json_response(request, js)
 
 class ProfileCategoriesList(generics.ListAPIView):
     queryset = models.IndicatorCategory.objects.all()
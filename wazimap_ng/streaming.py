@@ -0,0 +1,135 @@
+import json
+from collections.abc import Iterator, Mapping
+
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CHUNK_SIZE = 64 * 1024
+
+_encoder = JSONEncoder()
+
+
+class JSONFragment:
+    """
+    JSON that is already encoded, e.g. a stored GeoJSON feature. iter_json writes it into
+    the output as is instead of decoding and encoding it again. Fragments must be within
+    the depth that iter_json walks.
+    """
+    def __init__(self, encoded):
+        self.encoded = encoded.encode("utf-8") if isinstance(encoded, str) else encoded
+
+
+def dumps(obj):
+    """
+    Encodes obj as compact utf-8 JSON. orjson is used when it is installed. Types it doesn't
+    handle, including datetimes so that they are formatted as DRF does, are converted by
+    DRF's encoder.
+
+    Without orjson the output is the same as DRF's JSONRenderer. With orjson it decodes to
+    the same values but is not byte identical: floats may be written differently (e.g. 1e-7
+    rather than 1e-07) and NaN and Infinity are written as null where JSONRenderer raises
+    a ValueError.
+    """
+    if isinstance(obj, JSONFragment):
+        return obj.encoded
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_encoder.default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+    return json.dumps(obj, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_key(key):
+    if isinstance(key, str):
+        return dumps(key)
+    elif key is None:
+        return b'"null"'
+    elif isinstance(key, bool):
+        return b'"true"' if key else b'"false"'
+    return dumps(str(key))
+
+
+def iter_json(data, depth=3):
+    """
+    Yields the JSON encoding of data in pieces. Mappings, lists, tuples and iterators are
+    walked up to depth levels deep, values below that are encoded in one call.
+
+    This avoids building the full encoded payload, and the bytes copy that JSONRenderer
+    makes of it, but data itself is already in memory when it is passed in. Only values
+    that are iterators are consumed lazily, so a view has to produce large arrays with
+    generators for its peak memory to be lower than the size of the data.
+    """
+    if depth > 0 and isinstance(data, Mapping):
+        yield b"{"
+        for idx, (key, value) in enumerate(data.items()):
+            yield (b"," if idx else b"") + encode_key(key) + b":"
+            yield from iter_json(value, depth - 1)
+        yield b"}"
+    elif depth > 0 and isinstance(data, (list, tuple, Iterator)):
+        yield b"["
+        for idx, value in enumerate(data):
+            if idx:
+                yield b","
+            yield from iter_json(value, depth - 1)
+        yield b"]"
+    else:
+        yield dumps(data)
+
+
+def render(data, depth=3):
+    """
+    Returns the JSON encoding of data, which may contain JSONFragments, as bytes.
+    """
+    return b"".join(iter_json(data, depth))
+
+
+def iter_chunks(pieces, chunk_size=CHUNK_SIZE):
+    """
+    Joins small pieces into chunks of roughly chunk_size bytes.
+    """
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield b"".join(buffer)
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    Streams data as JSON. The data is kept on the response as it is on DRF's Response.
+    """
+    def __init__(self, data, depth=3, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(iter_chunks(iter_json(data, depth)), **kwargs)
+        self.data = data
+
+
+def json_response(request, data, fragments=False):
+    """
+    Returns a StreamingJSONResponse when STREAM_JSON_RESPONSES is enabled and JSON was
+    negotiated, otherwise a DRF Response so that the browsable API keeps working.
+    DRF can't render JSONFragments so data that contains them is always returned as JSON.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    if getattr(settings, "STREAM_JSON_RESPONSES", False) and renderer is not None and renderer.format == "json":
+        return StreamingJSONResponse(data)
+
+    if fragments:
+        return HttpResponse(render(data), content_type="application/json")
+
+    return Response(data)
@@ -16,7 +16,7 @@ from .boundaries import views as boundaries_views
 from .general import views as general_views
 from .cache import cache_headers as cache
 
-from wazimap_ng.general.views import logout_view, notifications_view
+from wazimap_ng.general.views import logout_view, notifications_view, cache_stats_view
 
 def trigger_error(request):
     division_by_zero = 1 / 0
@@ -26,6 +26,7 @@ urlpatterns = [
     # Admin
     path("admin/", admin.site.urls),
     path("admin/notifications", notifications_view, name="notifications"),
+    path("admin/cache_stats", cache_stats_view, name="cache-stats"),
 
     # Api
     path("api/v1/rest-auth/", include("rest_auth.urls")),
@@ -99,6 +100,11 @@ urlpatterns = [
     path("api/v1/profile/<int:profile_id>/points/themes/categories/", cache(points_views.ProfileCategoryList.as_view())),
     path("api/v1/profile/<int:profile_id>/points/category/<int:profile_category_id>/points/", cache(points_views.LocationList.as_view()), name="category-points"),
     path("api/v1/profile/<int:profile_id>/points/category/<int:profile_category_id>/geography/<str:geography_code>/points/", cache(points_views.LocationList.as_view()), name="category-points-geography"),
+    path(
+        "api/v1/profile/<int:profile_id>/points/category/<int:profile_category_id>/tiles/<int:z>/<int:x>/<int:y>.mvt",
+        cache(points_views.LocationTile.as_view()),
+        name="category-points-tile"
+    ),
     path("api/v1/profile/<int:profile_id>/points/profile_categories/", cache(points_views.ProfileCategoryList.as_view()), name="profile-category"),
     path("api/v1/profile/<int:profile_id>/points/theme/<int:theme_id>/profile_categories/", cache(points_views.ProfileCategoryList.as_view()), name="profile-category-theme"),
 
@@ -129,6 +135,11 @@ urlpatterns = [
         cache(boundaries_views.GeographyChildren.as_view()),
         name="boundaries-children"
     ),
+    path(
+        "api/v1/tiles/boundaries/<str:version>/<int:z>/<int:x>/<int:y>.mvt",
+        cache(boundaries_views.boundary_tile),
+        name="boundaries-tile"
+    ),
     #path("api/v1/boundaries/provinces/", boundaries_views.provinces),
 
     path(